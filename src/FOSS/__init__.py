@@ -12,5 +12,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .ugvcontroller import UGVController
-from .armcontroller import ArmController
+import importlib
+
+# Public names and the submodule defining them. Submodules are imported on first
+# access, so `import FOSS` (e.g. from the foss CLI) does not pull in requests or numpy.
+_EXPORTS = {
+    "UGVController": "ugvcontroller",
+    "RoArmM2S": "armcontroller",
+    "Transport": "transport",
+    "HTTPTransport": "transport",
+    "SerialTransport": "transport",
+    "get_transport": "transport",
+    "AsyncHTTPTransport": "aio",
+    "AsyncUGVController": "aio",
+    "AsyncRoArmM2S": "aio",
+    "Fleet": "fleet",
+    "ArmGroup": "espnow",
+    "DaemonClient": "client",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,298 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import math
+
+from .armcontroller import RoArmM2S
+from .commands import ROARM_M2S, UGV
+from .results import ARM_RESULTS, UGV_RESULTS, make_result
+from .transport import Transport, quote_command
+from .ugvcontroller import UGVController
+
+
+class AsyncHTTPTransport(Transport):
+    """
+    Non-blocking HTTP transport for the ESP32 '/js?json=' endpoint, built on asyncio streams.
+
+    Keeps a small pool of keep-alive connections per device and never has more than
+    `max_in_flight` requests outstanding, so a single event loop can drive many devices
+    without a thread per call and without exhausting the ESP32 sockets.
+    """
+
+    def __init__(self, ip, connect_timeout=2.0, read_timeout=5.0, max_in_flight=2):
+        """
+        Initialize the asyncio HTTP transport.
+
+        Args:
+            ip (str): The device address, optionally with a port (e.g., '192.168.4.1' or '127.0.0.1:8080').
+            connect_timeout (float): Seconds to wait for the TCP connection (default: 2.0).
+            read_timeout (float): Seconds to wait for the full reply once connected (default: 5.0).
+            max_in_flight (int): Maximum number of concurrent requests to the device (default: 2).
+        """
+        self.ip = ip
+        host, _, port = ip.partition(":")
+        self.host = host
+        self.port = int(port or 80)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_in_flight = max_in_flight
+        self._idle = []
+        self._slots = None
+
+    async def send(self, command_json):
+        """
+        Send a JSON command to the device.
+
+        Args:
+            command_json (str): The JSON command to send.
+
+        Returns:
+            str: The response text from the device.
+
+        Raises:
+            OSError: If the device cannot be reached or the reply is malformed.
+            asyncio.TimeoutError: If the connection or reply takes longer than the timeouts.
+        """
+        if self._slots is None:
+            # Created lazily so the transport can be built outside the running loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        async with self._slots:
+            reused = bool(self._idle)
+            try:
+                return await self._request(command_json, reused)
+            except (ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The device dropped the idle keep-alive connection: retry once on a new one
+                return await self._request(command_json, False)
+
+    async def _request(self, command_json, reuse):
+        if reuse and self._idle:
+            reader, writer = self._idle.pop()
+        else:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.connect_timeout)
+
+        try:
+            request = (
+                f"GET /js?json={quote_command(command_json)} HTTP/1.1\r\n"
+                f"Host: {self.ip}\r\n"
+                "Connection: keep-alive\r\n\r\n"
+            )
+            writer.write(request.encode("ascii"))
+            body, keep_alive = await asyncio.wait_for(self._read_response(reader), self.read_timeout)
+        except BaseException:
+            writer.close()
+            raise
+
+        if keep_alive:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        return body.decode("utf-8", errors="replace")
+
+    async def _read_response(self, reader):
+        status = await reader.readline()
+        if not status:
+            raise ConnectionResetError(f"{self.ip} closed the connection before replying")
+        if not status.startswith(b"HTTP/1."):
+            raise ConnectionError(f"Malformed HTTP response from {self.ip}: {status!r}")
+        keep_alive = status.startswith(b"HTTP/1.1")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        if connection == "close":
+            keep_alive = False
+        elif connection == "keep-alive":
+            keep_alive = True
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            return b"".join(chunks), keep_alive
+
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"])), keep_alive
+
+        # No framing information: the body ends when the device closes the connection
+        return await reader.read(), False
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _blocking_only(name, controller):
+    def method(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__}.{name}() is not supported: it needs the blocking transport, use {controller} for it")
+    method.__name__ = name
+    method.__doc__ = f"Not supported by the asyncio controller, use {controller}.{name}()."
+    return method
+
+
+class AsyncUGVController(UGVController):
+    """
+    asyncio version of UGVController.
+
+    Every movement and configuration method has the same name and arguments as in
+    UGVController but returns a coroutine, e.g. `await ugv.move(0.5, 0.5)`.
+    connect_to_wifi() is still a regular blocking call. The helpers built on the blocking
+    transport (send queue, scheduler, metrics, deadlines, feedback stream, path following)
+    are not supported and raise TypeError.
+    """
+
+    enable_send_queue = _blocking_only("enable_send_queue", "UGVController")
+    enable_scheduler = _blocking_only("enable_scheduler", "UGVController")
+    enable_metrics = _blocking_only("enable_metrics", "UGVController")
+    enable_deadlines = _blocking_only("enable_deadlines", "UGVController")
+    start_feedback = _blocking_only("start_feedback", "UGVController")
+    follow_path = _blocking_only("follow_path", "UGVController")
+
+    def __init__(self, ssid="UGV", password="12345678", ip="192.168.4.1", interface_name=None, transport=None, max_in_flight=2):
+        """
+        Initialize the asyncio UGV controller.
+
+        Args:
+            ssid (str): The Wi-Fi SSID (default: 'UGV').
+            password (str): The Wi-Fi password (default: '12345678').
+            ip (str): The rover's IP address (default: '192.168.4.1').
+            interface_name (str): Optional wireless interface name (e.g., 'wlan0').
+            transport (AsyncHTTPTransport): Optional asyncio transport used to deliver commands.
+            max_in_flight (int): Concurrent requests allowed to the rover when no transport is given (default: 2).
+        """
+        transport = transport or AsyncHTTPTransport(ip, max_in_flight=max_in_flight)
+        super().__init__(ssid=ssid, password=password, ip=ip, interface_name=interface_name, transport=transport)
+
+    async def send_command(self, command_json):
+        """
+        Send an encoded JSON command to the rover without blocking the event loop.
+
+        Args:
+            command_json (str): The JSON command to send.
+
+        Returns:
+            str: The response text from the rover, or None on a communication error.
+        """
+        try:
+            response = await self.transport.send(command_json)
+            print(f"Response: {response}")
+            return response
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f"Error communicating with the rover: {e}")
+            return None
+
+    async def _command(self, code, *args):
+        shadow = self.shadow
+        if shadow is None:
+            return make_result(UGV_RESULTS, code, await self.send_command(UGV[code](*args)))
+        result = shadow.lookup(code, args)
+        if result is None:
+            result = make_result(UGV_RESULTS, code, await self.send_command(UGV[code](*args)))
+            shadow.update(code, args, result)
+        return result
+
+
+class AsyncRoArmM2S(RoArmM2S):
+    """
+    asyncio version of RoArmM2S.
+
+    Every cmd_* method has the same name and arguments as in RoArmM2S but returns a
+    coroutine, e.g. `await arm.cmd_servo_rad_feedback()`. The helpers built on the blocking
+    transport (send queue, scheduler, metrics, deadlines, feedback stream, file sync) are
+    not supported and raise TypeError. enable_workspace_check() works as in RoArmM2S.
+    """
+
+    enable_send_queue = _blocking_only("enable_send_queue", "RoArmM2S")
+    enable_scheduler = _blocking_only("enable_scheduler", "RoArmM2S")
+    enable_metrics = _blocking_only("enable_metrics", "RoArmM2S")
+    enable_deadlines = _blocking_only("enable_deadlines", "RoArmM2S")
+    start_feedback = _blocking_only("start_feedback", "RoArmM2S")
+    sync_files = _blocking_only("sync_files", "RoArmM2S")
+
+    def __init__(self, ip_address, transport=None, max_in_flight=2):
+        """
+        Initialize the asyncio arm controller.
+
+        Args:
+            ip_address (str): The arm's IP address.
+            transport (AsyncHTTPTransport): Optional asyncio transport used to deliver commands.
+            max_in_flight (int): Concurrent requests allowed to the arm when no transport is given (default: 2).
+        """
+        super().__init__(ip_address, transport=transport or AsyncHTTPTransport(ip_address, max_in_flight=max_in_flight))
+
+    async def send_command(self, command_json):
+        return await self.transport.send(command_json)
+
+    async def _command(self, code, *args):
+        if self.workspace is not None and code in (104, 1041):
+            self.workspace.require(*args[:4])
+        shadow = self.shadow
+        if shadow is None:
+            return make_result(ARM_RESULTS, code, await self.send_command(ROARM_M2S[code](*args)))
+        result = shadow.lookup(code, args)
+        if result is None:
+            result = make_result(ARM_RESULTS, code, await self.send_command(ROARM_M2S[code](*args)))
+            shadow.update(code, args, result)
+        return result
+
+    async def do_some_crazy_move(self, radius=None, speed=0.5, acceleration=0.5):
+        """
+        Coroutine version of RoArmM2S.do_some_crazy_move().
+        """
+        if radius is None:
+            current_position = await self.cmd_servo_rad_feedback()
+            radius = current_position.get('radius', 1)
+
+        segments = 36
+        angle_increment = 2 * math.pi / segments
+
+        for i in range(segments + 1):
+            angle = i * angle_increment
+            await self.cmd_xyzt_goal_ctrl(radius * math.cos(angle), radius * math.sin(angle), 0, angle, speed)
+
+    async def open_jaw(self, open_cmd=1.0, speed=0.5, acceleration=0.5):
+        """
+        Coroutine version of RoArmM2S.open_jaw().
+        """
+        await self.cmd_eoat_hand_ctrl(open_cmd, speed, acceleration)
+        print(f"Jaw opened with command: {open_cmd}")
+
+    async def close_jaw(self, close_cmd=0.0, speed=0.5, acceleration=0.5):
+        """
+        Coroutine version of RoArmM2S.close_jaw().
+        """
+        await self.cmd_eoat_hand_ctrl(close_cmd, speed, acceleration)
+        print(f"Jaw closed with command: {close_cmd}")
@@ -10,178 +10,397 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import requests
 import math
 
+from .commands import ROARM_M2S as _COMMANDS
+from .filesync import FileSync
+from .deadline import ARM_IDEMPOTENT, ARM_QUERIES, CircuitBreaker, DeadlineTransport
+from .metrics import METRICS, NO_METRICS, InstrumentedTransport
+from .results import ARM_RESULTS, make_result
+from .scheduler import ARM_GROUPS, CommandScheduler
+from .sendqueue import ARM_COALESCED, CoalescingTransport
+from .telemetry import ArmFeedbackStream
+from .transport import get_transport
+
 class RoArmM2S:
-    def __init__(self, ip_address):
+    def __init__(self, ip_address, transport=None):
+        self.ip_address = ip_address
         self.base_url = f"http://{ip_address}/js?json="
+        self.transport = transport or get_transport(ip_address)
+        self.feedback = None
+        self.file_sync = None
+        self.workspace = None
+        self.shadow = None
 
     def send_command(self, command_json):
-        url = self.base_url + command_json
-        response = requests.get(url)
-        return response.text
+        return self.transport.send(command_json)
+
+    def _command(self, code, *args):
+        """
+        Encode, send and wrap the reply of command `code` in its typed result (see FOSS.results).
+        """
+        if self.workspace is not None and code in (104, 1041):
+            self.workspace.require(*args[:4])
+        shadow = self.shadow
+        if shadow is None:
+            return make_result(ARM_RESULTS, code, self.send_command(_COMMANDS[code](*args)))
+        result = shadow.lookup(code, args)
+        if result is None:
+            result = make_result(ARM_RESULTS, code, self.send_command(_COMMANDS[code](*args)))
+            shadow.update(code, args, result)
+        return result
+
+    def enable_send_queue(self, rate_hz=20.0):
+        """
+        Queue commands and send them at a fixed control rate instead of one request per call.
+
+        Unsent motion setpoints (cmd_xyzt_direct_ctrl, cmd_xyzt_goal_ctrl, cmd_joints_rad_ctrl, ...)
+        are replaced by the newest one of the same type. Commands return None in this mode.
+
+        Args:
+            rate_hz (float): Control rate in Hz (default: 20.0).
+
+        Returns:
+            CoalescingTransport: The send queue, with sent/dropped counters in stats().
+        """
+        if not isinstance(self.transport, CoalescingTransport):
+            self.transport = CoalescingTransport(self.transport, rate_hz=rate_hz, coalesce=ARM_COALESCED)
+        return self.transport
+
+    def enable_scheduler(self, max_in_flight=2):
+        """
+        Send commands of independent subsystems concurrently, e.g. cmd_light_ctrl() and cmd_wifi_info()
+        no longer wait for motion commands (and the other way round) when several threads
+        drive the arm. Commands of one subsystem keep their order and motion commands always
+        get a free connection.
+
+        Args:
+            max_in_flight (int): Concurrent requests the arm accepts (default: 2).
+
+        Returns:
+            CommandScheduler: The scheduler; submit() returns a Future for pipelining.
+        """
+        if not isinstance(self.transport, CommandScheduler):
+            self.transport = CommandScheduler(self.transport, groups=ARM_GROUPS, max_in_flight=max_in_flight)
+        return self.transport
+
+    def enable_metrics(self, metrics=None, device=None):
+        """
+        Record latency, errors and bytes of every command sent to the arm.
+
+        The instrumentation sits under the send queue or scheduler (if enabled), so it measures the real
+        round trips. Set `metrics.enabled = False` to pause it at almost no cost.
+
+        Args:
+            metrics (Metrics): Registry to record into (default: FOSS.metrics.METRICS).
+            device (str): Device label in the metrics (default: the arm's IP address).
+
+        Returns:
+            InstrumentedTransport: The instrumented transport, to register pre/post-send hooks on.
+        """
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if not isinstance(owner.transport, InstrumentedTransport):
+            owner.transport = InstrumentedTransport(owner.transport, device or self.ip_address, metrics)
+        elif owner.transport.metrics is NO_METRICS:
+            # Instrumented for hooks only (Recorder.attach()): start publishing
+            owner.transport.metrics = metrics or METRICS
+        return owner.transport
+
+    def disable_metrics(self):
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if isinstance(owner.transport, InstrumentedTransport):
+            owner.transport = owner.transport.transport
+
+    def enable_deadlines(self, deadline=1.0, hedge_after=0.1, retries=2, failure_threshold=3, reset_timeout=2.0, deadlines=None):
+        """
+        Give every command a deadline and fail fast while the arm is unreachable.
+
+        Read-only queries are hedged and retried, other idempotent commands are retried after
+        fast failures and the rest is sent once. Failures raise FOSS.deadline errors (DeadlineExceeded,
+        DeviceUnavailable, CommunicationError), all OSError subclasses.
+
+        Args:
+            deadline (float): Seconds a command may take, all attempts included (default: 1.0).
+            hedge_after (float): Seconds before a query is sent a second time, None disables hedging (default: 0.1).
+            retries (int): Extra attempts for idempotent commands (default: 2).
+            failure_threshold (int): Consecutive failures that open the circuit breaker (default: 3).
+            reset_timeout (float): Seconds the breaker stays open before a probe (default: 2.0).
+            deadlines (dict): Deadline by "T" code for slower commands.
+
+        Returns:
+            DeadlineTransport: The deadline layer, with counters and the breaker state in stats().
+        """
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if not isinstance(owner.transport, DeadlineTransport):
+            owner.transport = DeadlineTransport(owner.transport, deadline=deadline, deadlines=deadlines, queries=ARM_QUERIES,
+                                                idempotent=ARM_IDEMPOTENT, hedge_after=hedge_after, retries=retries,
+                                                breaker=CircuitBreaker(failure_threshold, reset_timeout), device=self.ip_address)
+        return owner.transport
+
+    def disable_deadlines(self):
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if isinstance(owner.transport, DeadlineTransport):
+            owner.transport.close()
+            owner.transport = owner.transport.transport
+
+    def enable_workspace_check(self, workspace=None):
+        """
+        Reject unreachable cmd_xyzt_goal_ctrl/cmd_xyzt_direct_ctrl targets (and trajectory
+        samples played by TrajectoryExecutor) with a ValueError before they are sent.
+
+        Args:
+            workspace (Workspace): Workspace index (default: Workspace.load(), cached on disk).
+
+        Returns:
+            Workspace: The index used for the checks.
+        """
+        if workspace is None:
+            from .workspace import Workspace
+            workspace = Workspace.load()
+        self.workspace = workspace
+        return workspace
+
+    def disable_workspace_check(self):
+        self.workspace = None
+
+    def enable_shadow(self, refresh=5.0, **refresh_overrides):
+        """
+        Skip setters that would not change the arm's last acknowledged state (LED, switches,
+        torque lock, joint PID, gripper settings) and answer them with the previous reply.
+
+        Args:
+            refresh (float): Seconds after which an unchanged setter is sent again anyway (default: 5.0).
+            **refresh_overrides: Refresh interval by state name, e.g. torque=1.0.
+
+        Returns:
+            StateShadow: The shadow, with sent/suppressed counters in stats().
+        """
+        if self.shadow is None:
+            from .shadow import StateShadow
+            self.shadow = StateShadow.for_arm(refresh, **refresh_overrides)
+        return self.shadow
+
+    def disable_shadow(self):
+        self.shadow = None
+
+    def start_worker(self, rate_hz=50.0, feedback_hz=10.0, address=None, **options):
+        """
+        Start a separate process that owns the link to the arm and streams setpoints at a
+        fixed rate, so the control timing no longer depends on this process' load or GIL.
+
+        Setpoints go through shared memory, e.g. `worker.set(1041, x, y, z, t)`; the latest feedback
+        and send statistics come back the same way. Use it instead of this controller's
+        own commands while it runs.
+
+        Args:
+            rate_hz (float): Control rate in Hz (default: 50.0).
+            feedback_hz (float): Feedback poll rate in Hz, 0 disables polling (default: 10.0).
+            address (str): IP address or serial port the worker opens (default: the arm's IP address).
+            **options: Other ControlWorker options (keepalive, track_width, serial_timeout, start_method).
+
+        Returns:
+            ControlWorker: The running worker; call stop() when done.
+        """
+        from .worker import ControlWorker
+        return ControlWorker("arm", address or self.ip_address, rate_hz=rate_hz, feedback_hz=feedback_hz, **options).start()
+
+    def start_feedback(self, rate_hz=20.0, capacity=4096, poll=True):
+        """
+        Start a background feedback stream that keeps the latest arm state in memory.
+
+        Args:
+            rate_hz (float): Feedback rate in Hz (default: 20.0).
+            capacity (int): Number of samples kept for windowed reads (default: 4096).
+            poll (bool): Request feedback every period; disable when the transport streams it (default: True).
+
+        Returns:
+            ArmFeedbackStream: The stream; read `latest` for the current pose or window() for history.
+        """
+        if self.feedback is None:
+            self.feedback = ArmFeedbackStream(self, rate_hz=rate_hz, capacity=capacity, poll=poll).start()
+        return self.feedback
+
+    def stop_feedback(self):
+        if self.feedback is not None:
+            self.feedback.stop()
+            self.feedback = None
+
+    def sync_files(self, local_dir, delete=False, state_path=None):
+        """
+        Mirror a local directory to the flash file system, sending only new or changed files.
+
+        Args:
+            local_dir (str): Directory with the files to push.
+            delete (bool): Also delete flash files pushed by earlier syncs that are missing from `local_dir` (default: False).
+            state_path (str): Optional JSON file keeping the sync cache between runs.
+
+        Returns:
+            SyncReport: Uploaded, skipped and deleted files and the number of requests sent.
+        """
+        if self.file_sync is None or (state_path and self.file_sync.state_path != state_path):
+            self.file_sync = FileSync(self, state_path=state_path)
+        return self.file_sync.sync(local_dir, delete=delete)
 
     # WiFi Settings
     def cmd_wifi_on_boot(self):
-        return self.send_command('{"T":401,"cmd":3}')
+        return self._command(401, 3)
 
     def cmd_set_ap(self, ssid, password):
-        return self.send_command(f'{{"T":402,"ssid":"{ssid}","password":"{password}"}}')
+        return self._command(402, ssid, password)
 
     def cmd_set_sta(self, ssid, password):
-        return self.send_command(f'{{"T":403,"ssid":"{ssid}","password":"{password}"}}')
+        return self._command(403, ssid, password)
 
     def cmd_wifi_apsta(self, ap_ssid, ap_password, sta_ssid, sta_password):
-        return self.send_command(f'{{"T":404,"ap_ssid":"{ap_ssid}","ap_password":"{ap_password}","sta_ssid":"{sta_ssid}","sta_password":"{sta_password}"}}')
+        return self._command(404, ap_ssid, ap_password, sta_ssid, sta_password)
 
     def cmd_wifi_info(self):
-        return self.send_command('{"T":405}')
+        return self._command(405)
 
     def cmd_wifi_config_create_by_status(self):
-        return self.send_command('{"T":406}')
+        return self._command(406)
 
     def cmd_wifi_config_create_by_input(self, mode, ap_ssid, ap_password, sta_ssid, sta_password):
-        return self.send_command(f'{{"T":407,"mode":{mode},"ap_ssid":"{ap_ssid}","ap_password":"{ap_password}","sta_ssid":"{sta_ssid}","sta_password":"{sta_password}"}}')
+        return self._command(407, mode, ap_ssid, ap_password, sta_ssid, sta_password)
 
     # ESP-NOW Settings
     def cmd_broadcast_follower(self, mode, mac):
-        return self.send_command(f'{{"T":300,"mode":{mode},"mac":"{mac}"}}')
+        return self._command(300, mode, mac)
 
     def cmd_esp_now_config(self, mode, dev, cmd, megs):
-        return self.send_command(f'{{"T":301,"mode":{mode},"dev":{dev},"cmd":{cmd},"megs":{megs}}}')
+        return self._command(301, mode, dev, cmd, megs)
 
     def cmd_get_mac_address(self):
-        return self.send_command('{"T":302}')
+        return self._command(302)
 
     def cmd_esp_now_add_follower(self, mac):
-        return self.send_command(f'{{"T":303,"mac":"{mac}"}}')
+        return self._command(303, mac)
 
     def cmd_esp_now_remove_follower(self, mac):
-        return self.send_command(f'{{"T":304,"mac":"{mac}"}}')
+        return self._command(304, mac)
 
     def cmd_esp_now_many_ctrl(self, dev, b, s, e, h, cmd, megs):
-        return self.send_command(f'{{"T":305,"dev":{dev},"b":{b},"s":{s},"e":{e},"h":{h},"cmd":{cmd},"megs":"{megs}"}}')
+        return self._command(305, dev, b, s, e, h, cmd, megs)
 
     def cmd_esp_now_single(self, mac, dev, b, s, e, h, cmd, megs):
-        return self.send_command(f'{{"T":306,"mac":"{mac}","dev":{dev},"b":{b},"s":{s},"e":{e},"h":{h},"cmd":{cmd},"megs":"{megs}"}}')
+        return self._command(306, mac, dev, b, s, e, h, cmd, megs)
 
     # Torque Control
     def cmd_torque_ctrl(self, cmd):
-        return self.send_command(f'{{"T":210,"cmd":{cmd}}}')
+        return self._command(210, cmd)
 
     # Dynamic Adaptation
     def cmd_set_new_x(self, mode, b, s, e, h):
-        return self.send_command(f'{{"T":112,"mode":{mode},"b":{b},"s":{s},"e":{e},"h":{h}}}')
+        return self._command(112, mode, b, s, e, h)
 
     # Moving Control
     def cmd_move_init(self):
-        return self.send_command('{"T":100}')
+        return self._command(100)
 
     def cmd_single_joint_ctrl(self, joint, rad, spd, acc):
-        return self.send_command(f'{{"T":101,"joint":{joint},"rad":{rad},"spd":{spd},"acc":{acc}}}')
+        return self._command(101, joint, rad, spd, acc)
 
     def cmd_joints_rad_ctrl(self, base, shoulder, elbow, hand, spd, acc):
-        return self.send_command(f'{{"T":102,"base":{base},"shoulder":{shoulder},"elbow":{elbow},"hand":{hand},"spd":{spd},"acc":{acc}}}')
+        return self._command(102, base, shoulder, elbow, hand, spd, acc)
 
     def cmd_xyzt_goal_ctrl(self, x, y, z, t, spd):
-        return self.send_command(f'{{"T":104,"x":{x},"y":{y},"z":{z},"t":{t},"spd":{spd}}}')
+        return self._command(104, x, y, z, t, spd)
 
     def cmd_xyzt_direct_ctrl(self, x, y, z, t):
-        return self.send_command(f'{{"T":1041,"x":{x},"y":{y},"z":{z},"t":{t}}}')
+        return self._command(1041, x, y, z, t)
 
     def cmd_servo_rad_feedback(self):
-        return self.send_command('{"T":105}')
+        return self._command(105)
 
     def cmd_eoat_hand_ctrl(self, cmd, spd, acc):
-        return self.send_command(f'{{"T":106,"cmd":{cmd},"spd":{spd},"acc":{acc}}}')
+        return self._command(106, cmd, spd, acc)
 
     def cmd_single_joint_angle(self, joint, angle, spd, acc):
-        return self.send_command(f'{{"T":121,"joint":{joint},"angle":{angle},"spd":{spd},"acc":{acc}}}')
+        return self._command(121, joint, angle, spd, acc)
 
     def cmd_joints_angle_ctrl(self, b, s, e, h, spd, acc):
-        return self.send_command(f'{{"T":122,"b":{b},"s":{s},"e":{e},"h":{h},"spd":{spd},"acc":{acc}}}')
+        return self._command(122, b, s, e, h, spd, acc)
 
     def cmd_constant_ctrl(self, m, axis, cmd, spd):
-        return self.send_command(f'{{"T":123,"m":{m},"axis":{axis},"cmd":{cmd},"spd":{spd}}}')
+        return self._command(123, m, axis, cmd, spd)
 
     def cmd_delay_millis(self, cmd):
-        return self.send_command(f'{{"T":111,"cmd":{cmd}}}')
+        return self._command(111, cmd)
 
     # EOAT Control
     def cmd_eoat_type(self, mode):
-        return self.send_command(f'{{"T":1,"mode":{mode}}}')
+        return self._command(1, mode)
 
     def cmd_config_eoat(self, pos, ea, eb):
-        return self.send_command(f'{{"T":2,"pos":{pos},"ea":{ea},"eb":{eb}}}')
+        return self._command(2, pos, ea, eb)
 
     def cmd_eoat_grab_torque(self, tor):
-        return self.send_command(f'{{"T":107,"tor":{tor}}}')
+        return self._command(107, tor)
 
     # Joints PID Control
     def cmd_set_joint_pid(self, joint, p, i):
-        return self.send_command(f'{{"T":108,"joint":{joint},"p":{p},"i":{i}}}')
+        return self._command(108, joint, p, i)
 
     def cmd_reset_pid(self):
-        return self.send_command('{"T":109}')
+        return self._command(109)
 
     # Mission & Steps Edit
     def cmd_create_mission(self, name, intro):
-        return self.send_command(f'{{"T":220,"name":"{name}","intro":"{intro}"}}')
+        return self._command(220, name, intro)
 
     def cmd_mission_content(self, name):
-        return self.send_command(f'{{"T":221,"name":"{name}"}}')
+        return self._command(221, name)
 
     def cmd_append_step_json(self, name, step):
-        return self.send_command(f'{{"T":222,"name":"{name}","step":"{step}"}}')
+        return self._command(222, name, step)
 
     def cmd_replace_step_json(self, name, step_num, step):
-        return self.send_command(f'{{"T":228,"name":"{name}","stepNum":{step_num},"step":"{step}"}}')
+        return self._command(228, name, step_num, step)
 
     # File System Control
     def cmd_scan_files(self):
-        return self.send_command('{"T":200}')
+        return self._command(200)
 
     def cmd_create_file(self, name, content):
-        return self.send_command(f'{{"T":201,"name":"{name}","content":"{content}"}}')
+        return self._command(201, name, content)
 
     def cmd_read_file(self, name):
-        return self.send_command(f'{{"T":202,"name":"{name}"}}')
+        return self._command(202, name)
 
     def cmd_delete_file(self, name):
-        return self.send_command(f'{{"T":203,"name":"{name}"}}')
+        return self._command(203, name)
 
     def cmd_append_line(self, name, content):
-        return self.send_command(f'{{"T":204,"name":"{name}","content":"{content}"}}')
+        return self._command(204, name, content)
 
     # Switch Control
     def cmd_switch_ctrl(self, pwm_a, pwm_b):
-        return self.send_command(f'{{"T":113,"pwm_a":{pwm_a},"pwm_b":{pwm_b}}}')
+        return self._command(113, pwm_a, pwm_b)
 
     def cmd_light_ctrl(self, led):
-        return self.send_command(f'{{"T":114,"led":{led}}}')
+        return self._command(114, led)
 
     def cmd_switch_off(self):
-        return self.send_command('{"T":115}')
+        return self._command(115)
 
     # ESP32 Settings
     def cmd_reboot(self):
-        return self.send_command('{"T":600}')
+        return self._command(600)
 
     def cmd_free_flash_space(self):
-        return self.send_command('{"T":601}')
+        return self._command(601)
 
     def cmd_boot_mission_info(self):
-        return self.send_command('{"T":602}')
+        return self._command(602)
 
     def cmd_reset_boot_mission(self):
-        return self.send_command('{"T":603}')
+        return self._command(603)
 
     def cmd_nvs_clear(self):
-        return self.send_command('{"T":604}')
+        return self._command(604)
 
     def cmd_info_print(self, cmd):
-        return self.send_command(f'{{"T":605,"cmd":{cmd}}}')
+        return self._command(605, cmd)
 
     def do_some_crazy_move(self, radius=None, speed=0.5, acceleration=0.5):
         """
@@ -197,9 +416,7 @@ class RoArmM2S:
         # Fetch current position if radius is not provided
         if radius is None:
             # Assuming self.cmd_servo_rad_feedback() fetches current position in [x, y, z, t]
-            current_position = self.cmd_servo_rad_feedback()  
-            if isinstance(current_position, str):  # If response is a string, parse it
-                current_position = eval(current_position)  # Replace eval with a proper parser in production
+            current_position = self.cmd_servo_rad_feedback()
             radius = current_position.get('radius', 1)  # Default to 1 if radius isn't provided
 
         # Break the circle into segments
@@ -0,0 +1,96 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+
+class CmdVelBridge:
+    """
+    Forwards velocity commands (e.g. from a ROS 2 cmd_vel topic) to UGVController.cmd_ros_control.
+
+    This is the ROS independent part of FOSS.node.CmdVelBridgeNode: on_twist() is called
+    for every incoming message and tick() from a fixed rate timer. A tick only talks to the
+    rover when the command changed or the keepalive interval elapsed, and sends a stop
+    once when no command arrived within the deadman timeout.
+    """
+
+    def __init__(self, ugv, deadman_timeout=0.5, keepalive=0.5, max_linear=None, max_angular=None, clock=time.monotonic):
+        """
+        Args:
+            ugv (UGVController): The rover to drive.
+            deadman_timeout (float): Seconds without a command before the rover is stopped (default: 0.5).
+            keepalive (float): Seconds after which an unchanged command is sent again (default: 0.5).
+            max_linear (float): Optional clamp for the linear velocity in m/s.
+            max_angular (float): Optional clamp for the angular velocity in rad/s.
+            clock (callable): Monotonic clock in seconds (default: time.monotonic).
+        """
+        self.ugv = ugv
+        self.deadman_timeout = deadman_timeout
+        self.keepalive = keepalive
+        self.max_linear = max_linear
+        self.max_angular = max_angular
+        self.clock = clock
+
+        self.target = (0.0, 0.0)
+        self.received_at = None
+        self.sent = None
+        self.sent_at = None
+        self.commands = 0
+        self.errors = 0
+        self.deadman_stops = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+
+    @staticmethod
+    def _clamp(value, limit):
+        if limit is None:
+            return value
+        return max(-limit, min(limit, value))
+
+    def on_twist(self, linear, angular):
+        """
+        Store a new velocity command; it is sent on the next tick().
+        """
+        self.target = (self._clamp(float(linear), self.max_linear), self._clamp(float(angular), self.max_angular))
+        self.received_at = self.clock()
+
+    def tick(self):
+        """
+        Send the current command to the rover if needed.
+
+        Returns:
+            float: Round trip of the command sent, or None if nothing was sent.
+        """
+        now = self.clock()
+        if self.received_at is None or now - self.received_at > self.deadman_timeout:
+            command = (0.0, 0.0)
+        else:
+            command = self.target
+
+        if command == self.sent and now - self.sent_at < self.keepalive:
+            return None
+        if command == (0.0, 0.0) and self.sent not in (None, (0.0, 0.0)) and command != self.target:
+            self.deadman_stops += 1
+
+        start = time.perf_counter()
+        response = self.ugv.cmd_ros_control(*command)
+        latency = time.perf_counter() - start
+
+        self.commands += 1
+        if response is None:
+            self.errors += 1
+        self.sent, self.sent_at = command, now
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        return latency
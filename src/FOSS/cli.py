@@ -0,0 +1,179 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The `foss` command line.
+
+    foss daemon --ugv 192.168.4.1 --arm arm=/dev/ttyUSB0 &
+    foss devices
+    foss call ugv move 0.5 0.5
+    foss send arm '{"T":105}'
+
+Everything but `foss daemon` only talks to the daemon socket, so it never imports the
+controllers, requests or numpy.
+"""
+
+import argparse
+import json
+import signal
+import sys
+
+from .client import DaemonClient, DaemonError
+
+
+def _parse_value(text):
+    """
+    Command line arguments are JSON when they parse as JSON (0.5, true, [1, 2]), else strings.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parse_device(spec, kind):
+    """
+    Split a '[name=]address' device option. Addresses starting with /dev/ are serial ports.
+    """
+    name, _, address = spec.rpartition("=")
+    return name or kind, address
+
+
+def _build_devices(args):
+    from .transport import SerialTransport
+
+    devices = {}
+    for kind, specs in (("ugv", args.ugv), ("arm", args.arm)):
+        for spec in specs:
+            name, address = _parse_device(spec, kind)
+            if name in devices:
+                raise SystemExit(f"foss: duplicate device name {name!r}, use NAME=ADDRESS")
+            transport = None
+            if address.startswith("/dev/"):
+                transport = SerialTransport(address, response_timeout=args.serial_timeout)
+            if kind == "ugv":
+                from .ugvcontroller import UGVController
+                device = UGVController(ip=address, transport=transport)
+            else:
+                from .armcontroller import RoArmM2S
+                device = RoArmM2S(address, transport=transport)
+            if args.metrics:
+                device.enable_metrics(device=name)
+            if args.scheduler:
+                device.enable_scheduler()
+            if args.deadline:
+                device.enable_deadlines(args.deadline)
+            if args.shadow is not None:
+                device.enable_shadow(args.shadow)
+            if args.send_queue:
+                device.enable_send_queue(args.send_queue)
+            devices[name] = device
+    if not devices:
+        raise SystemExit("foss: no devices, use --ugv and/or --arm")
+    return devices
+
+
+def _run_daemon(args):
+    from .daemon import ControlDaemon
+
+    daemon = ControlDaemon(_build_devices(args), path=args.socket)
+    if args.wifi:
+        for name, device in daemon.devices.items():
+            if hasattr(device, "connect_to_wifi"):
+                try:
+                    device.connect_to_wifi(exit_on_error=False)
+                except ConnectionError:
+                    print(f"Continuing without Wi-Fi for {name}.")
+
+    def terminate(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    with daemon:
+        print(f"FOSS daemon serving {', '.join(sorted(daemon.devices))} on {daemon.path}", flush=True)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def _print_result(result):
+    if result is None:
+        return
+    print(result if isinstance(result, str) else json.dumps(result, indent=2, sort_keys=True))
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="foss", description="Drive FOSS robots through the control daemon.")
+    parser.add_argument("--socket", help="Daemon socket path (default: $FOSS_SOCKET, $XDG_RUNTIME_DIR/foss.sock or /tmp/foss-<uid>.sock).")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for the daemon's reply (default: 10).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    daemon = commands.add_parser("daemon", help="Run the control daemon in the foreground.")
+    daemon.add_argument("--ugv", action="append", default=[], metavar="[NAME=]ADDRESS", help="Rover IP address or serial port (name defaults to 'ugv').")
+    daemon.add_argument("--arm", action="append", default=[], metavar="[NAME=]ADDRESS", help="RoArm-M2-S IP address or serial port (name defaults to 'arm').")
+    daemon.add_argument("--serial-timeout", type=float, default=1.0, help="Seconds to wait for a reply on serial ports (default: 1).")
+    daemon.add_argument("--send-queue", type=float, metavar="RATE_HZ", help="Queue and coalesce commands at this rate.")
+    daemon.add_argument("--scheduler", action="store_true", help="Send commands of independent subsystems concurrently.")
+    daemon.add_argument("--deadline", type=float, metavar="SECONDS", help="Give every command a deadline, hedge queries and fail fast while a device is unreachable.")
+    daemon.add_argument("--shadow", type=float, nargs="?", const=5.0, metavar="REFRESH", help="Skip setters that would not change the device state, re-sending them every REFRESH seconds (default: 5).")
+    daemon.add_argument("--metrics", action="store_true", help="Record per-command latency metrics.")
+    daemon.add_argument("--wifi", action="store_true", help="Connect to the rovers' Wi-Fi networks on start.")
+
+    commands.add_parser("ping", help="Check that the daemon is running.")
+    commands.add_parser("devices", help="List the daemon's devices.")
+    commands.add_parser("metrics", help="Show the daemon's latency metrics.")
+
+    call = commands.add_parser("call", help="Call a controller method, e.g. 'foss call ugv move 0.5 0.5'.")
+    call.add_argument("device")
+    call.add_argument("method")
+    call.add_argument("args", nargs="*", type=_parse_value)
+
+    send = commands.add_parser("send", help="Send a raw JSON command, e.g. foss send arm '{\"T\":105}'.")
+    send.add_argument("device")
+    send.add_argument("json")
+
+    wifi = commands.add_parser("wifi", help="(Re)connect to a rover's Wi-Fi network.")
+    wifi.add_argument("device")
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.command == "daemon":
+        return _run_daemon(args)
+
+    with DaemonClient(args.socket, timeout=args.timeout) as client:
+        try:
+            if args.command == "call":
+                result = client.call(args.device, args.method, *args.args)
+            elif args.command == "send":
+                result = client.send(args.device, args.json)
+            elif args.command == "wifi":
+                result = client.wifi(args.device)
+            else:
+                result = getattr(client, args.command)()
+        except DaemonError as e:
+            print(f"foss: {e}", file=sys.stderr)
+            return 1
+        except OSError as e:
+            print(f"foss: cannot reach the daemon at {client.path}: {e}", file=sys.stderr)
+            return 2
+    _print_result(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Client for the FOSS control daemon (see FOSS.daemon).
+
+The daemon listens on a Unix socket and speaks newline-delimited JSON: every request
+is one JSON object on one line, answered by one line {"ok": true, "result": ...} or
+{"ok": false, "error": "..."}. This module only uses the standard library, so short
+lived scripts can drive a robot without importing requests or opening a connection
+to the device themselves.
+"""
+
+import json
+import os
+import socket
+import threading
+
+
+def default_socket_path():
+    """
+    Return the daemon socket path: $FOSS_SOCKET, else $XDG_RUNTIME_DIR/foss.sock, else /tmp/foss-<uid>.sock.
+    """
+    path = os.environ.get("FOSS_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "foss.sock")
+    return f"/tmp/foss-{os.getuid()}.sock"
+
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon rejects a request or the device call fails.
+    """
+
+
+class DaemonClient:
+    """
+    Persistent connection to the control daemon.
+
+    The socket is opened on the first request and reused for every following one,
+    so a request costs a single local round trip. Requests from several threads are
+    serialized on the connection.
+    """
+
+    def __init__(self, path=None, timeout=10.0):
+        """
+        Args:
+            path (str): Daemon socket path (default: default_socket_path()).
+            timeout (float): Seconds to wait for a reply (default: 10.0).
+        """
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def request(self, message):
+        """
+        Send one request and wait for its reply.
+
+        Args:
+            message (dict): The request, e.g. {"op": "call", "device": "ugv", "method": "move", "args": [0.5, 0.5]}.
+
+        Returns:
+            The "result" of the reply.
+
+        Raises:
+            DaemonError: If the daemon answers with an error.
+            OSError: If the daemon is not running or the connection is lost.
+        """
+        data = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                self._sock.sendall(data)
+                line = self._reader.readline()
+            except OSError:
+                self._close()
+                raise
+            if not line:
+                self._close()
+                raise ConnectionError("The daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error"))
+        return reply.get("result")
+
+    def ping(self):
+        return self.request({"op": "ping"})
+
+    def devices(self):
+        """
+        Returns:
+            dict: Device name to controller class name.
+        """
+        return self.request({"op": "devices"})
+
+    def call(self, device, method, *args, **kwargs):
+        """
+        Call a controller method in the daemon, e.g. call("ugv", "move", 0.5, 0.5).
+
+        Returns:
+            The method's return value (replies from the device are strings).
+        """
+        return self.request({"op": "call", "device": device, "method": method, "args": args, "kwargs": kwargs})
+
+    def send(self, device, command_json):
+        """
+        Send an already encoded JSON command to a device, e.g. send("arm", '{"T":105}').
+
+        Returns:
+            str: The response text from the device.
+        """
+        return self.request({"op": "send", "device": device, "command": command_json})
+
+    def wifi(self, device):
+        """
+        Ask the daemon to (re)connect to the device's Wi-Fi network.
+        """
+        return self.request({"op": "wifi", "device": device})
+
+    def metrics(self):
+        """
+        Returns:
+            dict: The daemon's latency metrics snapshot.
+        """
+        return self.request({"op": "metrics"})
+
+    def _close(self):
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = self._reader = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
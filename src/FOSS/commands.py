@@ -0,0 +1,201 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Registry of the JSON commands understood by the Waveshare ESP32 firmware.
+
+Each command is declared once, by "T" code, with the name and type of its fields.
+From that declaration an encoder function is compiled that turns positional arguments
+into compact, correctly escaped JSON, e.g.:
+
+    >>> ROARM_M2S[104](235, 0, 234, 3.14, 0.25)
+    '{"T":104,"x":235.0,"y":0.0,"z":234.0,"t":3.14,"spd":0.25}'
+
+Encoders emit plain JSON; transports that need it (HTTP) URL-encode it themselves.
+Float fields must be finite (JSON has no NaN or Infinity) and int fields are rounded to
+the nearest integer, so a computed 0.9 is sent as 1 rather than truncated to 0.
+"""
+
+import json
+import math
+
+# Compact JSON for ad-hoc command dicts and for the string fields of compiled commands
+encode_json = json.JSONEncoder(ensure_ascii=True, separators=(",", ":")).encode
+
+# Replies are decoded with orjson when it is installed (pip install FOSS[fast]); both
+# accept str or bytes and raise a ValueError subclass on malformed input
+try:
+    from orjson import loads as decode_json
+except ImportError:
+    decode_json = json.loads
+
+
+def _int_field(value, field):
+    if isinstance(value, (int, str)):
+        return int(value)
+    try:
+        return int(round(value))
+    except (ValueError, OverflowError):
+        raise ValueError(f"Field {field!r} must be a finite number, got {value!r}") from None
+
+
+def _float_field(value, field):
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Field {field!r} must be a finite number, got {value!r}")
+    return value
+
+
+# How each declared field type is rendered into the JSON template
+_FIELD_FORMATS = {
+    int: ("%d", "_int_field({0}, {0!r})"),
+    float: ("%r", "_float_field({0}, {0!r})"),
+    str: ("%s", "_encode_str(str({0}))"),
+}
+
+
+def _compile(code, name, fields):
+    template = '{"T":%d' % code
+    values = []
+    for field, kind in fields:
+        placeholder, conversion = _FIELD_FORMATS[kind]
+        template += ',"%s":%s' % (field, placeholder)
+        values.append(conversion.format(field))
+    template += "}"
+
+    arguments = ", ".join(field for field, _ in fields)
+    if values:
+        body = f"return {template!r} % ({', '.join(values)},)"
+    else:
+        body = f"return {template!r}"
+    source = f"def {name}({arguments}):\n    {body}\n"
+
+    namespace = {"_encode_str": encode_json, "_int_field": _int_field, "_float_field": _float_field}
+    exec(source, namespace)
+    encoder = namespace[name]
+    encoder.code = code
+    encoder.fields = tuple(fields)
+    return encoder
+
+
+class CommandSet(dict):
+    """
+    The commands of one device family, keyed by "T" code.
+
+    Values are compiled encoder functions taking the declared fields as positional
+    arguments and returning the JSON command text. Each encoder also carries its `code`
+    and `fields` (tuple of (name, type) pairs) as attributes.
+    """
+
+    def __init__(self, device, commands):
+        """
+        Args:
+            device (str): Human readable device family name.
+            commands (list): (code, name, fields) tuples, where fields is a tuple of (name, type) pairs
+                             and type is one of int, float or str.
+        """
+        super().__init__()
+        self.device = device
+        self.names = {}
+        for code, name, fields in commands:
+            self[code] = _compile(code, name, fields)
+            self.names[name] = code
+
+    def encode(self, code, *args):
+        """
+        Encode command `code` with the given field values.
+
+        Args:
+            code (int): The "T" code of the command.
+            *args: Field values, in the declared order.
+
+        Returns:
+            str: The compact JSON command.
+        """
+        return self[code](*args)
+
+
+# Wave Rover / UGV base
+UGV = CommandSet("UGV", [
+    (1, "speed_ctrl", (("L", float), ("R", float))),
+    (2, "motor_pid", (("P", float), ("I", float), ("D", float), ("L", float))),
+    (13, "ros_ctrl", (("X", float), ("Z", float))),
+    (130, "base_feedback", ()),
+    (131, "feedback_flow", (("cmd", int),)),
+])
+
+# RoArm-M2-S
+ROARM_M2S = CommandSet("RoArm-M2-S", [
+    # WiFi Settings
+    (401, "wifi_on_boot", (("cmd", int),)),
+    (402, "set_ap", (("ssid", str), ("password", str))),
+    (403, "set_sta", (("ssid", str), ("password", str))),
+    (404, "wifi_apsta", (("ap_ssid", str), ("ap_password", str), ("sta_ssid", str), ("sta_password", str))),
+    (405, "wifi_info", ()),
+    (406, "wifi_config_create_by_status", ()),
+    (407, "wifi_config_create_by_input", (("mode", int), ("ap_ssid", str), ("ap_password", str), ("sta_ssid", str), ("sta_password", str))),
+    # ESP-NOW Settings
+    (300, "broadcast_follower", (("mode", int), ("mac", str))),
+    (301, "esp_now_config", (("mode", int), ("dev", int), ("cmd", int), ("megs", int))),
+    (302, "get_mac_address", ()),
+    (303, "esp_now_add_follower", (("mac", str),)),
+    (304, "esp_now_remove_follower", (("mac", str),)),
+    (305, "esp_now_many_ctrl", (("dev", int), ("b", float), ("s", float), ("e", float), ("h", float), ("cmd", int), ("megs", str))),
+    (306, "esp_now_single", (("mac", str), ("dev", int), ("b", float), ("s", float), ("e", float), ("h", float), ("cmd", int), ("megs", str))),
+    # Torque Control
+    (210, "torque_ctrl", (("cmd", int),)),
+    # Dynamic Adaptation
+    (112, "set_new_x", (("mode", int), ("b", float), ("s", float), ("e", float), ("h", float))),
+    # Moving Control
+    (100, "move_init", ()),
+    (101, "single_joint_ctrl", (("joint", int), ("rad", float), ("spd", float), ("acc", float))),
+    (102, "joints_rad_ctrl", (("base", float), ("shoulder", float), ("elbow", float), ("hand", float), ("spd", float), ("acc", float))),
+    (104, "xyzt_goal_ctrl", (("x", float), ("y", float), ("z", float), ("t", float), ("spd", float))),
+    (1041, "xyzt_direct_ctrl", (("x", float), ("y", float), ("z", float), ("t", float))),
+    (105, "servo_rad_feedback", ()),
+    (106, "eoat_hand_ctrl", (("cmd", float), ("spd", float), ("acc", float))),
+    (121, "single_joint_angle", (("joint", int), ("angle", float), ("spd", float), ("acc", float))),
+    (122, "joints_angle_ctrl", (("b", float), ("s", float), ("e", float), ("h", float), ("spd", float), ("acc", float))),
+    (123, "constant_ctrl", (("m", int), ("axis", int), ("cmd", int), ("spd", float))),
+    (111, "delay_millis", (("cmd", int),)),
+    # EOAT Control
+    (1, "eoat_type", (("mode", int),)),
+    (2, "config_eoat", (("pos", int), ("ea", float), ("eb", float))),
+    (107, "eoat_grab_torque", (("tor", int),)),
+    # Joints PID Control
+    (108, "set_joint_pid", (("joint", int), ("p", float), ("i", float))),
+    (109, "reset_pid", ()),
+    # Mission & Steps Edit
+    (220, "create_mission", (("name", str), ("intro", str))),
+    (221, "mission_content", (("name", str),)),
+    (222, "append_step_json", (("name", str), ("step", str))),
+    (228, "replace_step_json", (("name", str), ("stepNum", int), ("step", str))),
+    # File System Control
+    (200, "scan_files", ()),
+    (201, "create_file", (("name", str), ("content", str))),
+    (202, "read_file", (("name", str),)),
+    (203, "delete_file", (("name", str),)),
+    (204, "append_line", (("name", str), ("content", str))),
+    # Switch Control
+    (113, "switch_ctrl", (("pwm_a", int), ("pwm_b", int))),
+    (114, "light_ctrl", (("led", int),)),
+    (115, "switch_off", ()),
+    # ESP32 Settings
+    (600, "reboot", ()),
+    (601, "free_flash_space", ()),
+    (602, "boot_mission_info", ()),
+    (603, "reset_boot_mission", ()),
+    (604, "nvs_clear", ()),
+    (605, "info_print", (("cmd", int),)),
+])
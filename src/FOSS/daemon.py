@@ -0,0 +1,179 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Long-running control daemon.
+
+The daemon owns the UGVController/RoArmM2S instances, their warm keep-alive
+connections (or serial ports) and the Wi-Fi state, and serves requests from
+FOSS.client.DaemonClient and the `foss` CLI over a Unix socket. A command from a
+shell script then costs one local round trip instead of a Python start-up, the
+requests import and a fresh TCP connection to the ESP32.
+"""
+
+import json
+import os
+import socket
+import socketserver
+
+from .client import default_socket_path
+from .metrics import METRICS
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        daemon = self.server.daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = {"ok": True, "result": daemon.handle(json.loads(line))}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply, separators=(",", ":"), default=str).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlDaemon:
+    """
+    Serve named controllers over a Unix socket.
+
+    Each client connection is handled by its own thread, and requests on a connection are
+    answered in order. Controllers are shared by every client, so their pooled transports
+    stay connected between requests.
+
+    Requests (one JSON object per line):
+        {"op": "ping"}
+        {"op": "devices"}
+        {"op": "call", "device": "ugv", "method": "move", "args": [0.5, 0.5], "kwargs": {}}
+        {"op": "send", "device": "arm", "command": "{\\"T\\":105}"}
+        {"op": "wifi", "device": "ugv"}
+        {"op": "metrics"}
+    """
+
+    def __init__(self, devices, path=None):
+        """
+        Args:
+            devices (dict): Device name to controller (UGVController, RoArmM2S, ...).
+            path (str): Socket path (default: FOSS.client.default_socket_path()).
+        """
+        self.devices = dict(devices)
+        self.path = path or default_socket_path()
+        self.server = None
+
+    def _device(self, message):
+        name = message.get("device")
+        device = self.devices.get(name)
+        if device is None:
+            raise KeyError(f"Unknown device {name!r}, known devices: {', '.join(sorted(self.devices))}")
+        return device
+
+    def handle(self, message):
+        """
+        Execute one request.
+
+        Args:
+            message (dict): The decoded request.
+
+        Returns:
+            The request result, encoded as JSON in the reply.
+        """
+        op = message.get("op")
+        if op == "call":
+            method = message.get("method", "")
+            if method.startswith("_"):
+                raise AttributeError(f"{method!r} is private")
+            return getattr(self._device(message), method)(*message.get("args", ()), **message.get("kwargs", {}))
+        if op == "send":
+            device = self._device(message)
+            if getattr(device, "shadow", None) is not None:
+                device.shadow.clear()  # The state shadow cannot tell what a raw command changes
+            return device.send_command(message["command"])
+        if op == "ping":
+            return "pong"
+        if op == "devices":
+            return {name: type(device).__name__ for name, device in self.devices.items()}
+        if op == "wifi":
+            device = self._device(message)
+            if not hasattr(device, "connect_to_wifi"):
+                raise AttributeError(f"{message['device']!r} has no Wi-Fi connection to manage")
+            # Never let nmcli failures take the whole daemon down
+            return device.connect_to_wifi(exit_on_error=False)
+        if op == "metrics":
+            return METRICS.snapshot()
+        raise ValueError(f"Unknown op {op!r}")
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            raise OSError(f"Another daemon is already listening on {self.path}")
+        finally:
+            probe.close()
+
+    def start(self):
+        """
+        Bind the socket (readable by the current user only). Call serve_forever() to serve.
+        """
+        self._remove_stale_socket()
+        umask = os.umask(0o177)
+        try:
+            self.server = _UnixServer(self.path, _RequestHandler)
+        finally:
+            os.umask(umask)
+        self.server.daemon = self
+        return self
+
+    def serve_forever(self):
+        if self.server is None:
+            self.start()
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """
+        Stop serving from another thread.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+
+    def close(self):
+        """
+        Close the socket, stop feedback streams and release every device transport.
+        """
+        if self.server is not None:
+            self.server.server_close()
+            self.server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        for device in self.devices.values():
+            stop_feedback = getattr(device, "stop_feedback", None)
+            if stop_feedback is not None:
+                stop_feedback()
+            device.transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
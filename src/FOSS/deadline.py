@@ -0,0 +1,253 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Deadline-aware sends.
+
+A lost packet on the ESP32 access point should cost a control loop a bounded amount of
+time, not a read timeout per retry. DeadlineTransport gives every command a deadline, and
+spends it according to the command's "T" code:
+
+- Read-only queries (feedback, Wi-Fi info, file listings, ...) are hedged: when the first
+  request has not answered after `hedge_after` seconds a second one is sent, and the first
+  reply wins. They are also retried right away when a request fails fast.
+- Other idempotent commands (absolute setpoints and setters) are retried after fast failures,
+  never hedged.
+- Everything else (relative moves, file appends, reboot, ...) is sent exactly once.
+
+A per-device CircuitBreaker fails fast while the device is unreachable. Failures are typed
+errors derived from OSError, so existing `except OSError` handlers keep working.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .transport import Transport, command_code
+
+
+class DeviceError(OSError):
+    """
+    Base class of the errors raised by DeadlineTransport.
+
+    Attributes:
+        device (str): The device label.
+        code (int): The "T" code of the command, or None.
+    """
+
+    def __init__(self, message, device=None, code=None):
+        super().__init__(message)
+        self.device = device
+        self.code = code
+
+
+class DeadlineExceeded(DeviceError, TimeoutError):
+    """
+    No reply arrived before the command's deadline. Commands that are not idempotent may
+    still have been executed.
+    """
+
+
+class DeviceUnavailable(DeviceError):
+    """
+    The device's circuit breaker is open: recent commands failed, so this one was not sent.
+    """
+
+
+class CommunicationError(DeviceError):
+    """
+    Every attempt failed before the deadline; the last transport error is the __cause__.
+    """
+
+
+# Read-only queries by "T" code: hedged and retried
+ARM_QUERIES = frozenset({105, 200, 202, 221, 302, 405, 601, 602})
+UGV_QUERIES = frozenset({130})
+
+# Commands safe to repeat (queries plus absolute setpoints and setters): retried after fast failures
+ARM_IDEMPOTENT = ARM_QUERIES | {100, 101, 102, 104, 1041, 106, 121, 122, 1, 2, 107, 108, 109, 112, 113, 114, 115, 210, 203, 605}
+UGV_IDEMPOTENT = UGV_QUERIES | {1, 2, 13, 131}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a device is unreachable.
+
+    After `failure_threshold` consecutive failures the breaker opens and rejects every
+    command for `reset_timeout` seconds. Then it lets a single probe through (half-open):
+    its success closes the breaker again, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=2.0):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker (default: 3).
+            reset_timeout (float): Seconds the breaker stays open before a probe (default: 2.0).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Returns:
+            bool: True if a command may be sent now.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        self.success()
+
+
+class DeadlineTransport(Transport):
+    """
+    Send commands with a deadline, hedged or retried according to their "T" code, behind a
+    circuit breaker.
+
+    Attempts run on a small thread pool so the caller can stop waiting at the deadline; an
+    abandoned attempt finishes (or times out) in the background. The wrapped transport is
+    not closed by close(), since it is usually shared.
+    """
+
+    def __init__(self, transport, deadline=1.0, deadlines=None, queries=ARM_QUERIES, idempotent=ARM_IDEMPOTENT,
+                 hedge_after=0.1, retries=2, breaker=None, device=None, max_workers=4):
+        """
+        Args:
+            transport (Transport): The transport to send through.
+            deadline (float): Seconds a command may take, all attempts included (default: 1.0).
+            deadlines (dict): Deadline by "T" code for slower commands, e.g. {200: 3.0}.
+            queries (set): "T" codes that are hedged (default: ARM_QUERIES).
+            idempotent (set): "T" codes that are retried after failures (default: ARM_IDEMPOTENT).
+            hedge_after (float): Seconds before a query is sent a second time, None disables hedging (default: 0.1).
+            retries (int): Extra attempts, hedges included, for idempotent commands (default: 2).
+            breaker (CircuitBreaker): Breaker for the device (default: a new CircuitBreaker()).
+            device (str): Device label used in the errors.
+            max_workers (int): Threads available for concurrent attempts (default: 4).
+        """
+        self.transport = transport
+        self.deadline = deadline
+        self.deadlines = dict(deadlines or {})
+        self.queries = queries
+        self.idempotent = idempotent
+        self.hedge_after = hedge_after
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self.device = device
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FOSS-deadline")
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("sent", "hedged", "retried", "deadline_exceeded", "failed", "rejected"), 0)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def send(self, command_json, deadline=None):
+        """
+        Send a JSON command and wait for the reply until the deadline.
+
+        Args:
+            command_json (str): The JSON command to send.
+            deadline (float): Seconds for this command (default: by "T" code, else `deadline`).
+
+        Returns:
+            str: The response text from the device.
+
+        Raises:
+            DeviceUnavailable: The circuit breaker is open.
+            DeadlineExceeded: No reply before the deadline.
+            CommunicationError: Every attempt failed.
+        """
+        code = command_code(command_json)
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise DeviceUnavailable(f"{self.device or 'device'} is unavailable after repeated failures", self.device, code)
+
+        start = time.monotonic()
+        end = start + (self.deadlines.get(code, self.deadline) if deadline is None else deadline)
+        attempts = 1 + self.retries if code in self.idempotent else 1
+        hedge_at = start + self.hedge_after if self.hedge_after is not None and code in self.queries and attempts > 1 else None
+
+        pending = {self._executor.submit(self.transport.send, command_json)}
+        launched = 1
+        error = None
+        self._count("sent")
+        while pending:
+            now = time.monotonic()
+            if now >= end:
+                break
+            wake = end if hedge_at is None else min(end, max(hedge_at, now))
+            done, pending = wait(pending, timeout=wake - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.breaker.success()
+                    return future.result()
+                error = future.exception()
+
+            if launched < attempts and (not pending or (hedge_at is not None and time.monotonic() >= hedge_at)):
+                self._count("hedged" if pending else "retried")
+                pending.add(self._executor.submit(self.transport.send, command_json))
+                launched += 1
+                if hedge_at is not None:
+                    hedge_at = time.monotonic() + self.hedge_after if launched < attempts else None
+
+        self.breaker.failure()
+        if not pending and error is not None:
+            self._count("failed")
+            raise CommunicationError(f"{self.device or 'device'} T:{code} failed: {error}", self.device, code) from error
+        self._count("deadline_exceeded")
+        raise DeadlineExceeded(f"{self.device or 'device'} T:{code} got no reply within {end - start:.3f} s", self.device, code)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters for sent, hedged, retried, timed out, failed and rejected commands, plus the breaker state.
+        """
+        with self._lock:
+            return {**self._counters, "breaker": self.breaker.state, "breaker_opened": self.breaker.opened}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
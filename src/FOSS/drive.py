@@ -0,0 +1,342 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Differential-drive kinematics and path following for the UGV.
+
+Velocities follow the ROS convention used by cmd_ros_control (T:13), the emulator and the
+base odometry: linear in m/s forward, angular in rad/s counter-clockwise (left) positive.
+The conversions work on NumPy arrays, so whole command series convert in one call:
+
+    >>> left, right = drive.twist_to_wheels(linear, angular)
+
+A Path precomputes its arc length and curvature once. PurePursuit then finds the closest
+point and the lookahead point with binary searches over the arc length, so a control tick
+costs O(log n) whatever the number of waypoints:
+
+    >>> follower = drive.PathFollower(ugv, drive.PurePursuit(drive.Path(waypoints)))
+    >>> report = follower.run()
+"""
+
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+TRACK_WIDTH = 0.2
+
+
+def twist_to_wheels(linear, angular, track_width=TRACK_WIDTH):
+    """
+    Body velocities to wheel speeds.
+
+    Args:
+        linear (float or array): Linear velocity in m/s.
+        angular (float or array): Angular velocity in rad/s, counter-clockwise positive.
+        track_width (float): Distance between left and right wheels in meters (default: 0.2).
+
+    Returns:
+        tuple: (left, right) wheel speeds in m/s, broadcast to a common shape.
+    """
+    linear = np.asarray(linear, dtype=float)
+    offset = np.asarray(angular, dtype=float) * (track_width / 2)
+    return linear - offset, linear + offset
+
+
+def wheels_to_twist(left, right, track_width=TRACK_WIDTH):
+    """
+    Wheel speeds to body velocities.
+
+    Returns:
+        tuple: (linear, angular) in m/s and rad/s, counter-clockwise positive.
+    """
+    left = np.asarray(left, dtype=float)
+    right = np.asarray(right, dtype=float)
+    return (left + right) / 2, (right - left) / track_width
+
+
+def scale_wheels(left, right, max_speed):
+    """
+    Scale wheel speed pairs down so neither exceeds `max_speed`, keeping their ratio
+    (and so the path curvature).
+
+    Returns:
+        tuple: (left, right) wheel speeds.
+    """
+    left = np.asarray(left, dtype=float)
+    right = np.asarray(right, dtype=float)
+    peak = np.maximum(np.abs(left), np.abs(right))
+    scale = np.where(peak > max_speed, max_speed / np.maximum(peak, 1e-12), 1.0)
+    return left * scale, right * scale
+
+
+class Path:
+    """
+    A polyline of (x, y) waypoints in meters with its geometry precomputed.
+
+    Attributes:
+        points (ndarray): (N, 2) waypoints, consecutive duplicates removed.
+        arc_length (ndarray): (N,) arc length at every waypoint, from 0 to `length`.
+        headings (ndarray): (N - 1,) heading of every segment in radians.
+        curvature (ndarray): (N,) discrete curvature at every waypoint in 1/m (0 at the ends).
+    """
+
+    def __init__(self, waypoints):
+        """
+        Args:
+            waypoints (array): (N, 2) x, y positions in meters, N >= 2.
+        """
+        points = np.asarray(waypoints, dtype=float)[:, :2]
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+        points = points[keep]
+        if len(points) < 2:
+            raise ValueError("A path needs at least two distinct waypoints")
+
+        self.points = points
+        self.segments = np.diff(points, axis=0)
+        self.segment_lengths = np.hypot(self.segments[:, 0], self.segments[:, 1])
+        self.arc_length = np.concatenate(([0.0], np.cumsum(self.segment_lengths)))
+        self.length = float(self.arc_length[-1])
+        self.headings = np.arctan2(self.segments[:, 1], self.segments[:, 0])
+
+        turn = np.angle(np.exp(1j * np.diff(self.headings)))
+        spacing = (self.segment_lengths[:-1] + self.segment_lengths[1:]) / 2
+        self.curvature = np.concatenate(([0.0], turn / spacing, [0.0]))
+
+        # Plain lists for the per-tick scalar lookups, which are faster than NumPy scalars
+        self._arc = self.arc_length.tolist()
+        self._points = points.tolist()
+        self._segments = self.segments.tolist()
+        self._lengths = self.segment_lengths.tolist()
+        self._curvature = self.curvature.tolist()
+
+    def __len__(self):
+        return len(self.points)
+
+    def segment_at(self, s):
+        """
+        Returns:
+            int: Index of the segment containing arc length `s` (clamped to the path), O(log n).
+        """
+        index = np.searchsorted(self.arc_length, s, side="right") - 1
+        return int(min(max(index, 0), len(self._segments) - 1))
+
+    def point_at(self, s):
+        """
+        Returns:
+            tuple: (x, y) at arc length `s`, clamped to the path ends, O(log n).
+        """
+        index = self.segment_at(s)
+        fraction = min(max((s - self._arc[index]) / self._lengths[index], 0.0), 1.0)
+        (x, y), (dx, dy) = self._points[index], self._segments[index]
+        return x + fraction * dx, y + fraction * dy
+
+    def curvature_at(self, s):
+        """
+        Returns:
+            float: Path curvature around arc length `s`, interpolated between waypoints, O(log n).
+        """
+        index = self.segment_at(s)
+        fraction = min(max((s - self._arc[index]) / self._lengths[index], 0.0), 1.0)
+        return self._curvature[index] + fraction * (self._curvature[index + 1] - self._curvature[index])
+
+    def sample(self, spacing):
+        """
+        Resample the path every `spacing` meters in one vectorized pass.
+
+        Returns:
+            ndarray: (M, 2) points.
+        """
+        s = np.append(np.arange(0.0, self.length, spacing), self.length)
+        index = np.clip(np.searchsorted(self.arc_length, s, side="right") - 1, 0, len(self.segments) - 1)
+        fraction = np.clip((s - self.arc_length[index]) / self.segment_lengths[index], 0.0, 1.0)
+        return self.points[index] + fraction[:, None] * self.segments[index]
+
+
+class PurePursuit:
+    """
+    Pure pursuit path follower.
+
+    Every update projects the pose onto the few segments ahead of the current progress
+    (found by binary search over the arc length), steers towards the point `lookahead`
+    meters further along the path and limits the speed by the lateral acceleration in
+    curves and by the braking distance at the goal. Progress along the path never goes
+    backwards, so self-crossing paths are followed in order.
+    """
+
+    def __init__(self, path, lookahead=0.3, speed=0.3, max_angular=2.0, max_lateral_accel=0.5,
+                 max_decel=0.5, goal_tolerance=0.05, search_window=None, max_search_segments=64):
+        """
+        Args:
+            path (Path): The path to follow.
+            lookahead (float): Lookahead distance in meters (default: 0.3).
+            speed (float): Cruise speed in m/s (default: 0.3).
+            max_angular (float): Angular velocity limit in rad/s (default: 2.0).
+            max_lateral_accel (float): Lateral acceleration limit in curves in m/s² (default: 0.5).
+            max_decel (float): Deceleration used to stop at the goal in m/s² (default: 0.5).
+            goal_tolerance (float): Distance to the last waypoint at which the goal is reached, in meters (default: 0.05).
+            search_window (float): Arc length ahead of the progress searched for the closest point (default: 2 * lookahead).
+            max_search_segments (int): Cap on the segments projected per update, for dense paths (default: 64).
+        """
+        self.path = path
+        self.lookahead = lookahead
+        self.speed = speed
+        self.max_angular = max_angular
+        self.max_lateral_accel = max_lateral_accel
+        self.max_decel = max_decel
+        self.goal_tolerance = goal_tolerance
+        self.search_window = search_window or 2 * lookahead
+        self.max_search_segments = max_search_segments
+        self.reset()
+
+    def reset(self):
+        self.progress = 0.0
+        self.cross_track_error = 0.0
+        self.done = False
+
+    def _project(self, x, y):
+        path = self.path
+        first = path.segment_at(self.progress)
+        last = min(path.segment_at(self.progress + self.search_window), first + self.max_search_segments - 1)
+        starts = path.points[first:last + 1]
+        segments = path.segments[first:last + 1]
+        lengths = path.segment_lengths[first:last + 1]
+        relative = np.array((x, y)) - starts
+        fraction = np.clip(np.einsum("ij,ij->i", relative, segments) / lengths ** 2, 0.0, 1.0)
+        offsets = relative - fraction[:, None] * segments
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        best = int(np.argmin(distances))
+        s = path.arc_length[first + best] + fraction[best] * lengths[best]
+        return max(float(s), self.progress), math.sqrt(distances[best])
+
+    def update(self, x, y, theta):
+        """
+        Compute the velocity command for the current pose.
+
+        Args:
+            x, y (float): Position in meters, in the path's frame.
+            theta (float): Heading in radians, counter-clockwise from the x axis.
+
+        Returns:
+            tuple: (linear, angular) in m/s and rad/s; (0.0, 0.0) once the goal is reached.
+        """
+        path = self.path
+        goal_x, goal_y = path._points[-1]
+        remaining = math.hypot(goal_x - x, goal_y - y)
+        if self.done or (path.length - self.progress <= self.lookahead and remaining <= self.goal_tolerance):
+            self.done = True
+            return 0.0, 0.0
+
+        self.progress, self.cross_track_error = self._project(x, y)
+        target_x, target_y = path.point_at(self.progress + self.lookahead)
+
+        # Lookahead point in the robot frame; the arc through it has curvature 2 * lateral / distance²
+        dx, dy = target_x - x, target_y - y
+        cos_theta, sin_theta = math.cos(theta), math.sin(theta)
+        forward = cos_theta * dx + sin_theta * dy
+        lateral = -sin_theta * dx + cos_theta * dy
+        distance_sq = max(forward * forward + lateral * lateral, 1e-12)
+        curvature = 2.0 * lateral / distance_sq
+
+        speed = self.speed
+        bend = max(abs(curvature), abs(path.curvature_at(self.progress + self.lookahead)))
+        if bend > 1e-9:
+            speed = min(speed, math.sqrt(self.max_lateral_accel / bend))
+        speed = min(speed, math.sqrt(2.0 * self.max_decel * max(path.length - self.progress, remaining if forward > 0 else 0.0)))
+        if forward < 0:
+            speed = 0.0  # Target behind: turn in place first
+
+        angular = speed * curvature if speed > 0 else math.copysign(self.max_angular, lateral)
+        if abs(angular) > self.max_angular:
+            angular = math.copysign(self.max_angular, angular)
+            speed = abs(angular / curvature) if curvature else speed
+        return speed, angular
+
+
+FollowReport = namedtuple("FollowReport", ("completed", "ticks", "duration", "late", "max_cross_track_error"))
+FollowReport.__doc__ = "Result of PathFollower.run(): goal reached, control ticks, seconds, missed ticks and worst distance to the path in meters."
+
+
+class PathFollower:
+    """
+    Streams a PurePursuit controller's commands to a UGVController at a fixed rate.
+
+    The pose comes from the rover's base feedback odometry (start_feedback()) unless a
+    `pose` callable is given. Commands go out with cmd_ros_control, or as wheel speeds with
+    move() when `wheel_speeds` is set.
+    """
+
+    def __init__(self, ugv, controller, rate_hz=20.0, pose=None, wheel_speeds=False, max_wheel_speed=None, track_width=TRACK_WIDTH):
+        """
+        Args:
+            ugv (UGVController): The rover to drive.
+            controller (PurePursuit): The path follower.
+            rate_hz (float): Control rate in Hz (default: 20.0).
+            pose (callable): Returns the current (x, y, theta); defaults to the base feedback odometry.
+            wheel_speeds (bool): Send wheel speeds with move() instead of cmd_ros_control (default: False).
+            max_wheel_speed (float): Wheel speed limit in m/s when sending wheel speeds.
+            track_width (float): Distance between left and right wheels in meters (default: 0.2).
+        """
+        self.ugv = ugv
+        self.controller = controller
+        self.period = 1.0 / rate_hz
+        self.wheel_speeds = wheel_speeds
+        self.max_wheel_speed = max_wheel_speed
+        self.track_width = track_width
+        if pose is None:
+            feedback = ugv.feedback or ugv.start_feedback(rate_hz=rate_hz, track_width=track_width)
+            pose = lambda: feedback.pose  # noqa: E731
+        self.pose = pose
+
+    def _send(self, linear, angular):
+        if not self.wheel_speeds:
+            return self.ugv.cmd_ros_control(linear, angular)
+        left, right = twist_to_wheels(linear, angular, self.track_width)
+        if self.max_wheel_speed is not None:
+            left, right = scale_wheels(left, right, self.max_wheel_speed)
+        return self.ugv.move(float(left), float(right))
+
+    def run(self, timeout=None):
+        """
+        Follow the path until the goal is reached (or `timeout` seconds passed), then stop.
+
+        Returns:
+            FollowReport: Completion, timing and tracking error.
+        """
+        controller = self.controller
+        ticks = late = 0
+        max_error = 0.0
+        start = next_tick = time.monotonic()
+        try:
+            while not controller.done:
+                if timeout is not None and time.monotonic() - start > timeout:
+                    break
+                pose = self.pose()
+                if pose is not None:
+                    self._send(*controller.update(*pose))
+                    max_error = max(max_error, controller.cross_track_error)
+                ticks += 1
+
+                next_tick += self.period
+                now = time.monotonic()
+                if next_tick < now:
+                    missed = int((now - next_tick) / self.period) + 1
+                    late += missed
+                    next_tick += missed * self.period
+                time.sleep(next_tick - now)
+        finally:
+            self._send(0.0, 0.0)
+        return FollowReport(controller.done, ticks, time.monotonic() - start, late, max_error)
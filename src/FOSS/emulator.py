@@ -0,0 +1,273 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local emulator of the Waveshare ESP32 '/js?json=' HTTP endpoint.
+
+Runs on localhost, understands the "T" codes sent by UGVController and RoArmM2S, keeps
+simulated wheel and joint state, answers feedback queries, and can inject latency,
+jitter and packet loss. Useful for tests and benchmarks without hardware:
+
+    with DeviceEmulator(kind="arm", latency=0.005) as emulator:
+        arm = RoArmM2S(emulator.address)
+        print(arm.cmd_servo_rad_feedback())
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .commands import encode_json
+from .kinematics import forward, inverse
+
+ARM = "arm"
+UGV = "ugv"
+
+# Running emulators by MAC address, the simulated ESP-NOW network
+_RADIO = {}
+_BROADCAST_MAC = "FF:FF:FF:FF:FF:FF"
+
+_INIT_JOINTS = (0.0, 0.0, math.pi / 2, math.pi)
+
+
+class DeviceEmulator:
+    """
+    Emulated RoArm-M2-S ("arm") or UGV base ("ugv") served over HTTP on localhost.
+    """
+
+    def __init__(self, kind=ARM, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, loss=0.0, seed=None, mac=None):
+        """
+        Args:
+            kind (str): ARM or UGV (default: ARM).
+            host (str): Address to listen on (default: '127.0.0.1').
+            port (int): Port to listen on, 0 picks a free one (default: 0).
+            latency (float): Seconds added to every reply (default: 0.0).
+            jitter (float): Extra random delay, uniform in [0, jitter] seconds (default: 0.0).
+            loss (float): Probability of dropping a request without replying (default: 0.0).
+            seed (int): Seed for the jitter/loss random generator.
+            mac (str): MAC address on the simulated ESP-NOW network (default: derived from the port).
+        """
+        self.kind = kind
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.received = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+        # Simulated device state
+        self.joints = list(_INIT_JOINTS)
+        self.wheels = {"L": 0.0, "R": 0.0}
+        self.velocity = {"X": 0.0, "Z": 0.0}
+        self.led = 0
+        self.pwm = (0, 0)
+        self.torque = 1
+        self.files = {}
+        self.followers = set()
+        self.flash_size = 1 << 20
+
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        port = self.server.server_address[1]
+        self.mac = (mac or f"02:00:00:00:{port >> 8:02X}:{port & 0xFF:02X}").upper()
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.server.serve_forever, name="FOSS-emulator", daemon=True)
+            self._thread.start()
+            _RADIO[self.mac] = self
+        return self
+
+    def stop(self):
+        _RADIO.pop(self.mac, None)
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _handler(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != "/js":
+                    self.send_error(404)
+                    return
+                with emulator.lock:
+                    emulator.received += 1
+                    drop = emulator.loss and emulator.random.random() < emulator.loss
+                    delay = emulator.latency + (emulator.random.uniform(0, emulator.jitter) if emulator.jitter else 0.0)
+                if drop:
+                    with emulator.lock:
+                        emulator.dropped += 1
+                    self.close_connection = True
+                    return
+                if delay:
+                    time.sleep(delay)
+
+                try:
+                    command = json.loads(parse_qs(url.query).get("json", [""])[0])
+                    body = emulator.handle(command).encode("utf-8")
+                except KeyError as e:
+                    body = encode_json({"error": f"missing field {e}"}).encode("utf-8")
+                except (ValueError, TypeError, AttributeError, IndexError) as e:
+                    # Malformed commands get an error reply like on the firmware, not a dropped connection
+                    body = encode_json({"error": str(e)}).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def arm_feedback(self):
+        x, y, z, t = forward(self.joints).tolist()
+        b, s, e, h = self.joints
+        return {"T": 1051, "x": x, "y": y, "z": z, "b": b, "s": s, "e": e, "t": h,
+                "torB": 0, "torS": 0, "torE": 0, "torH": 0}
+
+    def base_feedback(self):
+        return {"T": 1001, "L": self.wheels["L"], "R": self.wheels["R"],
+                "r": 0.0, "p": 0.0, "y": 0.0, "temp": 25.0, "v": 12.0}
+
+    def handle(self, command):
+        """
+        Apply one command to the simulated state.
+
+        Args:
+            command (dict): The decoded JSON command.
+
+        Returns:
+            str: The reply body.
+        """
+        if not isinstance(command, dict) or "T" not in command:
+            raise ValueError("missing T code")
+        code = command["T"]
+        with self.lock:
+            if self.kind == UGV:
+                return self._handle_ugv(code, command)
+            return self._handle_arm(code, command)
+
+    def _handle_ugv(self, code, command):
+        if code == 1:
+            self.wheels = {"L": float(command["L"]), "R": float(command["R"])}
+        elif code == 13:
+            self.velocity = {"X": float(command["X"]), "Z": float(command["Z"])}
+            # Differential drive with a 0.2 m track: wheel speeds in m/s
+            self.wheels = {"L": self.velocity["X"] - self.velocity["Z"] * 0.1,
+                           "R": self.velocity["X"] + self.velocity["Z"] * 0.1}
+        elif code == 130:
+            return encode_json(self.base_feedback())
+        return ""
+
+    def _handle_arm(self, code, command):
+        joints = self.joints
+        if code == 100:
+            self.joints = list(_INIT_JOINTS)
+        elif code == 101:
+            joints[int(command["joint"]) - 1] = float(command["rad"])
+        elif code == 102:
+            self.joints = [float(command[name]) for name in ("base", "shoulder", "elbow", "hand")]
+        elif code == 121:
+            joints[int(command["joint"]) - 1] = math.radians(float(command["angle"]))
+        elif code == 122:
+            self.joints = [math.radians(float(command[name])) for name in ("b", "s", "e", "h")]
+        elif code in (104, 1041):
+            solved, reachable = inverse([command["x"], command["y"], command["z"], command["t"]])
+            if reachable:
+                self.joints = solved.tolist()
+        elif code == 105:
+            return encode_json(self.arm_feedback())
+        elif code == 106:
+            joints[3] = float(command["cmd"])
+        elif code == 210:
+            self.torque = int(command["cmd"])
+        elif code == 113:
+            self.pwm = (int(command["pwm_a"]), int(command["pwm_b"]))
+        elif code == 114:
+            self.led = int(command["led"])
+        elif code == 115:
+            self.pwm, self.led = (0, 0), 0
+        elif code == 200:
+            return "\n".join(self.files)
+        elif code == 201:
+            self.files[command["name"]] = command["content"].split("\n")
+        elif code == 202:
+            return "\n".join(self.files.get(command["name"], []))
+        elif code == 203:
+            self.files.pop(command["name"], None)
+        elif code == 204:
+            self.files.setdefault(command["name"], []).extend(command["content"].split("\n"))
+        elif code == 220:
+            self.files[f"{command['name']}.mission"] = [encode_json({"name": command["name"], "intro": command["intro"]})]
+        elif code == 221:
+            return "\n".join(self.files.get(f"{command['name']}.mission", []))
+        elif code == 222:
+            self.files.setdefault(f"{command['name']}.mission", []).append(command["step"])
+        elif code == 228:
+            mission = self.files.get(f"{command['name']}.mission", [])
+            step = int(command["stepNum"])
+            if 0 < step < len(mission):
+                mission[step] = command["step"]
+        elif code == 302:
+            return encode_json({"mac": self.mac})
+        elif code == 303:
+            self.followers.add(command["mac"].upper())
+        elif code == 304:
+            self.followers.discard(command["mac"].upper())
+        elif code in (305, 306) and int(command["cmd"]) == 0:
+            if code == 305:
+                macs = self.followers
+            elif command["mac"].upper() == _BROADCAST_MAC:
+                macs = set(_RADIO) - {self.mac}
+            else:
+                macs = {command["mac"].upper()}
+            angles = [float(command[name]) for name in ("b", "s", "e", "h")]
+            for mac in macs:
+                follower = _RADIO.get(mac)
+                if follower is not None and follower.kind == ARM:
+                    follower.joints = list(angles)  # Rebinding the list needs no lock on the follower
+        elif code == 405:
+            return encode_json({"ip": self.address.split(":")[0], "rssi": -40, "wifi_mode_on_boot": 3})
+        elif code == 601:
+            used = sum(len(line) + 1 for lines in self.files.values() for line in lines)
+            return encode_json({"free": self.flash_size - used, "total": self.flash_size})
+        return ""
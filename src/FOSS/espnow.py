@@ -0,0 +1,250 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Synchronized multi-arm moves over ESP-NOW.
+
+One HTTP request per arm lets the arms start their moves a Wi-Fi round trip (or more)
+apart. An ArmGroup instead registers the followers' MAC addresses with a leader arm once
+and relays joint-space moves through it: a single ESP-NOW broadcast (T:305) when the whole
+group moves, or one unicast (T:306) per follower for a subset. The leader moves with its
+own HTTP request sent at the same time, and arms outside the group fall back to direct HTTP:
+
+    >>> group = ArmGroup(RoArmM2S("192.168.4.1"))
+    >>> group.add("right", RoArmM2S("192.168.4.2"))
+    >>> group.add("spare", mac="24:0A:C4:00:00:01")
+    >>> group.move_joints(0, 0, 1.57, 3.14)
+    GroupReport(skew=..., requests=2, ...)
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# T:301 modes and the T:305/306 "cmd" value of a joint-space move (b, s, e, h in radians)
+MODE_FOLLOWER = 3
+JOINTS_CMD = 0
+
+GroupReport = namedtuple("GroupReport", ("skew", "requests", "times", "errors"))
+GroupReport.__doc__ = """Outcome of one group move.
+
+skew: Seconds between the first and the last arm's move, estimated on the host as the
+midpoint of the request that delivered each move. Arms reached by one ESP-NOW relay share
+its time, the radio hop itself (a few milliseconds) is not included.
+requests: HTTP requests sent.
+times: Estimated move time by arm name, relative to the dispatch.
+errors: Exception by arm name for the moves that failed."""
+
+
+def _mac(reply):
+    mac = reply.get("mac") if hasattr(reply, "get") else None
+    if not mac:
+        raise ValueError(f"No MAC address in the reply {reply!r}")
+    return mac.upper()
+
+
+class ArmGroup:
+    """
+    Drive a group of RoArm-M2-S arms in sync through one leader arm.
+
+    Follower MAC addresses are looked up and added to the leader's peer list once; the
+    membership is kept here, so later moves never re-register anything. The controllers
+    passed in are kept for direct HTTP moves (the leader, arms without a MAC) and for
+    compare().
+    """
+
+    def __init__(self, leader, name="leader", max_workers=8, timeout=2.0):
+        """
+        Args:
+            leader (RoArmM2S): The arm relaying commands to the followers.
+            name (str): The leader's name in reports (default: 'leader').
+            max_workers (int): Threads used to send concurrently (default: 8).
+            timeout (float): Seconds a move waits for the requests (default: 2.0).
+        """
+        self.leader = leader
+        self.leader_name = name
+        self.timeout = timeout
+        self.arms = {name: leader}
+        self.macs = {}
+        self._peers = set()
+        self._leader_mac = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FOSS-espnow")
+
+    @property
+    def leader_mac(self):
+        if self._leader_mac is None:
+            self._leader_mac = _mac(self.leader.cmd_get_mac_address())
+        return self._leader_mac
+
+    @property
+    def members(self):
+        """
+        Returns:
+            dict: MAC address by follower name.
+        """
+        return dict(self.macs)
+
+    def add(self, name, arm=None, mac=None, configure=True):
+        """
+        Add a follower to the group.
+
+        Args:
+            name (str): The follower's name.
+            arm (RoArmM2S): Its controller, used to read the MAC address, to configure it and for compare().
+            mac (str): Its MAC address, when there is no controller or to skip the lookup.
+            configure (bool): Put the follower in follower mode, accepting this leader only (default: True).
+
+        Returns:
+            str: The follower's MAC address.
+        """
+        if arm is None and mac is None:
+            raise ValueError("A follower needs a controller or a MAC address")
+        mac = (mac or _mac(arm.cmd_get_mac_address())).upper()
+        with self._lock:
+            registered = mac in self._peers
+        if not registered:
+            self.leader.cmd_esp_now_add_follower(mac)
+            with self._lock:
+                self._peers.add(mac)
+        if arm is not None:
+            if configure:
+                arm.cmd_esp_now_config(MODE_FOLLOWER, 0, 0, 0)
+                arm.cmd_broadcast_follower(0, self.leader_mac)
+            self.arms[name] = arm
+        self.macs[name] = mac
+        return mac
+
+    def add_direct(self, name, arm):
+        """
+        Add an arm outside the ESP-NOW group (e.g. out of radio range); it moves over HTTP.
+        A follower of that name is dropped from the leader's peer list.
+        """
+        self.arms[name] = arm
+        self._drop_follower(name)
+
+    def remove(self, name):
+        """
+        Remove an arm; a follower is also dropped from the leader's peer list.
+        """
+        self.arms.pop(name, None)
+        self._drop_follower(name)
+
+    def _drop_follower(self, name):
+        mac = self.macs.pop(name, None)
+        if mac is not None and mac not in self.macs.values():
+            self.leader.cmd_esp_now_remove_follower(mac)
+            with self._lock:
+                self._peers.discard(mac)
+
+    def _timed(self, send):
+        start = time.perf_counter()
+        send()
+        return start, time.perf_counter()
+
+    def _dispatch(self, jobs):
+        """
+        Run the (names, send) jobs concurrently and estimate when each name's move was delivered.
+        """
+        origin = time.perf_counter()
+        futures = {self._executor.submit(self._timed, send): names for names, send in jobs}
+        done, not_done = wait(futures, timeout=self.timeout)
+        times, errors = {}, {}
+        for future, names in futures.items():
+            for name in names:
+                if future in not_done:
+                    errors[name] = TimeoutError(f"{name} did not answer in time")
+                elif future.exception() is not None:
+                    errors[name] = future.exception()
+                else:
+                    start, end = future.result()
+                    times[name] = (start + end) / 2 - origin
+        skew = max(times.values()) - min(times.values()) if times else 0.0
+        return skew, times, errors
+
+    def move_joints(self, b, s, e, h, names=None, spd=0, acc=10):
+        """
+        Move arms to the same joint angles at once.
+
+        Followers are reached through the leader: one broadcast when every follower moves,
+        else one unicast per follower. The leader and arms outside the group get a direct
+        cmd_joints_rad_ctrl() at the same time.
+
+        Args:
+            b, s, e, h (float): Base, shoulder, elbow and hand angles in radians.
+            names (iterable): Arms to move (default: every arm of the group).
+            spd (float): Speed of the direct moves (default: 0, the firmware's maximum).
+            acc (float): Acceleration of the direct moves (default: 10).
+
+        Returns:
+            GroupReport: Estimated skew, request count and per-arm errors.
+        """
+        names = list(self.arms.keys() | self.macs.keys()) if names is None else list(names)
+        followers = [name for name in names if name in self.macs]
+        direct = [name for name in names if name not in self.macs]
+        unknown = [name for name in direct if name not in self.arms]
+        if unknown:
+            raise KeyError(f"Unknown arms: {', '.join(unknown)}")
+
+        jobs = [((name,), lambda arm=self.arms[name]: arm.cmd_joints_rad_ctrl(b, s, e, h, spd, acc)) for name in direct]
+        requests = len(direct)
+        if followers and set(followers) == set(self.macs):
+            jobs.append((followers, lambda: self.leader.cmd_esp_now_many_ctrl(0, b, s, e, h, JOINTS_CMD, "")))
+            requests += 1
+        else:
+            jobs += [((name,), lambda mac=self.macs[name]: self.leader.cmd_esp_now_single(mac, 0, b, s, e, h, JOINTS_CMD, ""))
+                     for name in followers]
+            requests += len(followers)
+        skew, times, errors = self._dispatch(jobs)
+        return GroupReport(skew, requests, times, errors)
+
+    def move_joints_direct(self, b, s, e, h, names=None, spd=0, acc=10):
+        """
+        Move arms with one concurrent HTTP request each, the approach move_joints() replaces.
+
+        Returns:
+            GroupReport: Estimated skew, request count and per-arm errors.
+        """
+        names = list(self.arms) if names is None else list(names)
+        jobs = [((name,), lambda arm=self.arms[name]: arm.cmd_joints_rad_ctrl(b, s, e, h, spd, acc)) for name in names]
+        skew, times, errors = self._dispatch(jobs)
+        return GroupReport(skew, len(jobs), times, errors)
+
+    def compare(self, b, s, e, h, repeats=10):
+        """
+        Measure the skew of group moves against one HTTP request per arm, alternating both.
+        Only arms with a controller take part.
+
+        Returns:
+            dict: {"group": ..., "direct": ...} with the mean and max skew in seconds and the requests per move.
+        """
+        names = list(self.arms)
+        runs = {"group": [], "direct": []}
+        for _ in range(repeats):
+            runs["group"].append(self.move_joints(b, s, e, h, names))
+            runs["direct"].append(self.move_joints_direct(b, s, e, h, names))
+        return {mode: {"mean_skew": sum(report.skew for report in reports) / len(reports),
+                       "max_skew": max(report.skew for report in reports),
+                       "requests": reports[-1].requests}
+                for mode, reports in runs.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
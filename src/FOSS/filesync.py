@@ -0,0 +1,220 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Incremental mirroring of a local directory to the RoArm-M2-S flash file system.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+from .missions import chunk_lines
+
+SyncReport = namedtuple("SyncReport", ("uploaded", "skipped", "deleted", "requests"))
+SyncReport.__doc__ = "Files uploaded, skipped (unchanged) and deleted by FileSync.sync(), and the requests it took."
+
+_FILE_NAME = re.compile(r"[\w\-]+(?:\.[\w\-]+)+")
+# "free": 123, free space: 123, free_bytes=123, ... but not the "T":601 echo or the total
+_FREE_SPACE = re.compile(r"\bfree[a-z _-]*\"?\s*[:=]?\s*(\d+)", re.IGNORECASE)
+
+
+def parse_file_listing(text):
+    """
+    Extract file names from a cmd_scan_files() reply.
+
+    Accepts a JSON list/object of names or the plain text listing printed by the firmware.
+
+    Args:
+        text (str or Response): The reply.
+
+    Returns:
+        set: File names.
+    """
+    text = None if text is None else str(text)
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        value = None
+    if isinstance(value, dict):
+        value = value.get("files", list(value))
+    if isinstance(value, list):
+        return {str(name).lstrip("/") for name in value}
+    return {match.lstrip("/") for match in _FILE_NAME.findall(text or "")}
+
+
+def parse_free_space(text):
+    """
+    Extract the free space in bytes from a cmd_free_flash_space() reply.
+
+    Accepts a JSON object with a "free" field (or "total" and "used") or a plain text
+    reply with the number after a "free" label.
+
+    Args:
+        text (str or Response): The reply.
+
+    Returns:
+        int: Free bytes, or None if the reply does not state them.
+    """
+    text = None if text is None else str(text)
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        value = None
+    if isinstance(value, dict):
+        for key, free in value.items():
+            if key.lower().startswith("free") and isinstance(free, (int, float)):
+                return int(free)
+        if isinstance(value.get("total"), (int, float)) and isinstance(value.get("used"), (int, float)):
+            return int(value["total"] - value["used"])
+        return None
+    match = _FREE_SPACE.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class FileSync:
+    """
+    Mirrors a local directory to the arm's flash, transferring only new or changed files.
+
+    The last cmd_scan_files() listing and the hash of every file pushed (or read back) are
+    cached, optionally in a JSON state file, so re-running a sync where nothing changed
+    costs a single listing request. Large files are sent in chunks of several lines
+    through cmd_append_line().
+
+    Only files pushed (or verified) by this sync are managed by it: sync(delete=True) never
+    removes other flash files, e.g. the ".mission" files written by MissionCompiler.
+    """
+
+    def __init__(self, arm, max_request_bytes=1024, state_path=None):
+        """
+        Args:
+            arm (RoArmM2S): The arm to sync to.
+            max_request_bytes (int): Largest content chunk sent in one request (default: 1024).
+            state_path (str): Optional JSON file persisting the listing and hashes between runs.
+        """
+        self.arm = arm
+        self.max_request_bytes = max_request_bytes
+        self.state_path = state_path
+        self.listing = None
+        self.hashes = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path) as state:
+                saved = json.load(state)
+            self.listing = set(saved.get("listing", ())) if saved.get("listing") is not None else None
+            self.hashes = saved.get("hashes", {})
+
+    def _save(self):
+        if self.state_path:
+            with open(self.state_path, "w") as state:
+                json.dump({"listing": sorted(self.listing) if self.listing is not None else None, "hashes": self.hashes}, state)
+
+    def scan(self):
+        """
+        Refresh the cached listing from the arm.
+
+        Returns:
+            set: Names of the files on the flash.
+        """
+        self.listing = parse_file_listing(self.arm.cmd_scan_files())
+        for name in set(self.hashes) - self.listing:
+            del self.hashes[name]
+        return self.listing
+
+    def push(self, name, content):
+        """
+        Write `content` to flash file `name`, in as few requests as max_request_bytes allows.
+
+        Returns:
+            int: Number of requests sent.
+        """
+        # Split on "\n" only, so "\r" and a trailing newline survive the round trip
+        chunks = chunk_lines(content.split("\n"), self.max_request_bytes)
+        self.arm.cmd_create_file(name, next(chunks))
+        requests = 1
+        for chunk in chunks:
+            self.arm.cmd_append_line(name, chunk)
+            requests += 1
+        self.hashes[name] = _digest(content)
+        if self.listing is not None:
+            self.listing.add(name)
+        return requests
+
+    def sync(self, local_dir, delete=False, rescan=False):
+        """
+        Mirror the files of `local_dir` (not recursive) to the flash.
+
+        Args:
+            local_dir (str): Directory with the text files to push.
+            delete (bool): Also delete flash files this sync pushed earlier that are no longer in `local_dir` (default: False).
+            rescan (bool): Ask the arm for a fresh listing even if one is cached (default: False).
+
+        Returns:
+            SyncReport: What was transferred.
+
+        Raises:
+            OSError: With errno ENOSPC if the changed files do not fit in the free flash space.
+        """
+        requests = 0
+        if self.listing is None or rescan:
+            self.scan()
+            requests += 1
+
+        local = {}
+        for name in sorted(os.listdir(local_dir)):
+            path = os.path.join(local_dir, name)
+            if os.path.isfile(path):
+                with open(path, encoding="utf-8", newline="") as source:
+                    local[name] = source.read()
+
+        pending = []
+        skipped = []
+        for name, content in local.items():
+            digest = _digest(content)
+            if name in self.listing and name not in self.hashes:
+                # Present on the flash but never pushed from here: one read beats a full upload
+                self.hashes[name] = _digest(str(self.arm.cmd_read_file(name) or ""))
+                requests += 1
+            if name in self.listing and self.hashes.get(name) == digest:
+                skipped.append(name)
+            else:
+                pending.append(name)
+
+        if pending:
+            needed = sum(len(local[name].encode("utf-8")) for name in pending)
+            free = parse_free_space(self.arm.cmd_free_flash_space())
+            requests += 1
+            if free is not None and needed > free:
+                raise OSError(errno.ENOSPC, f"{needed} bytes to upload but only {free} bytes free on the flash")
+
+        for name in pending:
+            requests += self.push(name, local[name])
+
+        deleted = []
+        if delete:
+            for name in sorted((self.listing & set(self.hashes)) - set(local)):
+                self.arm.cmd_delete_file(name)
+                self.listing.discard(name)
+                self.hashes.pop(name, None)
+                deleted.append(name)
+                requests += 1
+
+        self._save()
+        return SyncReport(pending, skipped, deleted, requests)
@@ -0,0 +1,218 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+Result = namedtuple("Result", ("name", "value", "error", "latency"))
+Result.__doc__ = "Outcome of one fleet command on one device; `error` is None on success."
+
+
+class DeviceHealth:
+    """
+    Latency and error tracking for one fleet member.
+
+    A device is marked unhealthy after `max_failures` consecutive failures and is skipped
+    by the fleet until `retry_after` seconds have passed, so one unreachable robot does
+    not keep tying up workers for the whole fleet.
+    """
+
+    def __init__(self, max_failures=3, retry_after=5.0):
+        self.max_failures = max_failures
+        self.retry_after = retry_after
+        self.sent = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_latency = None
+        self.average_latency = None
+        self.last_error = None
+        self._failed_at = 0.0
+
+    @property
+    def healthy(self):
+        if self.consecutive_failures < self.max_failures:
+            return True
+        return time.monotonic() - self._failed_at >= self.retry_after
+
+    def record(self, latency, error):
+        self.sent += 1
+        self.last_latency = latency
+        if error is None:
+            self.consecutive_failures = 0
+            # Exponential moving average, cheap enough to update on every command
+            self.average_latency = latency if self.average_latency is None else 0.8 * self.average_latency + 0.2 * latency
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            self._failed_at = time.monotonic()
+
+    def as_dict(self):
+        return {
+            "healthy": self.healthy, "sent": self.sent, "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures, "last_latency": self.last_latency,
+            "average_latency": self.average_latency, "last_error": repr(self.last_error) if self.last_error else None,
+        }
+
+
+class Fleet:
+    """
+    Concurrent control of many UGVController / RoArmM2S instances.
+
+    Commands are fanned out on a thread pool, so a fleet-wide stop costs one round trip
+    instead of N. Every call waits at most `timeout` seconds and returns one Result per
+    device; slow or failing devices show up as errors and are temporarily isolated
+    (see DeviceHealth) instead of stalling the rest of the fleet.
+
+    The controllers report communication errors by returning None, so a None reply counts
+    as a failure. Pass none_is_error=False when None is a normal reply, e.g. with a send
+    queue enabled on the devices.
+
+    Example:
+        fleet = Fleet({"rover1": UGVController(ip="10.0.0.11"), "rover2": UGVController(ip="10.0.0.12")})
+        fleet.broadcast("move", 0, 0)
+    """
+
+    def __init__(self, devices=None, max_workers=32, timeout=2.0, max_failures=3, retry_after=5.0, none_is_error=True):
+        """
+        Args:
+            devices (dict): Controllers by name.
+            max_workers (int): Size of the worker pool (default: 32).
+            timeout (float): Seconds a broadcast/scatter waits for the devices (default: 2.0).
+            max_failures (int): Consecutive failures before a device is isolated (default: 3).
+            retry_after (float): Seconds an isolated device is skipped before it is retried (default: 5.0).
+            none_is_error (bool): Count a None reply as a failure (default: True).
+        """
+        self.devices = {}
+        self.health = {}
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self.retry_after = retry_after
+        self.none_is_error = none_is_error
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FOSS-fleet")
+        self._busy = set()
+        self._timed_out = set()
+        self._lock = threading.Lock()
+        for name, device in (devices or {}).items():
+            self.add(name, device)
+
+    def add(self, name, device):
+        self.devices[name] = device
+        self.health[name] = DeviceHealth(self.max_failures, self.retry_after)
+
+    def remove(self, name):
+        self.devices.pop(name, None)
+        self.health.pop(name, None)
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __getitem__(self, name):
+        return self.devices[name]
+
+    def _call(self, name, method, args, kwargs):
+        start = time.perf_counter()
+        value = error = None
+        try:
+            value = getattr(self.devices[name], method)(*args, **kwargs)
+            if value is None and self.none_is_error:
+                error = ConnectionError(f"{name} did not reply to {method}")
+        except Exception as e:
+            error = e
+        latency = time.perf_counter() - start
+        with self._lock:
+            # A call that outlived its scatter() was already recorded there as a timeout
+            if name in self._timed_out:
+                self._timed_out.discard(name)
+            else:
+                self.health[name].record(latency, error)
+            self._busy.discard(name)
+        return Result(name, value, error, latency)
+
+    def scatter(self, calls, timeout=None):
+        """
+        Run a different call on each device, all at once.
+
+        Args:
+            calls (dict): {name: (method, args)} or {name: (method, args, kwargs)}.
+            timeout (float): Seconds to wait for the devices (default: the fleet timeout).
+
+        Returns:
+            dict: Result by device name. Devices that are isolated, still busy with a previous
+                  command, or that did not answer in time get a Result with an error.
+
+        Raises:
+            KeyError: If a name is not a fleet member; nothing is sent then.
+        """
+        unknown = [name for name in calls if name not in self.health]
+        if unknown:
+            raise KeyError(f"Unknown devices: {', '.join(map(str, unknown))}")
+        results = {}
+        futures = {}
+        for name, call in calls.items():
+            method, args = call[0], call[1]
+            kwargs = call[2] if len(call) > 2 else {}
+            with self._lock:
+                if not self.health[name].healthy:
+                    results[name] = Result(name, None, ConnectionError(f"{name} is isolated after repeated failures"), 0.0)
+                    continue
+                if name in self._busy:
+                    # Never queue behind a device that is still stuck on an earlier command
+                    results[name] = Result(name, None, TimeoutError(f"{name} is still busy with a previous command"), 0.0)
+                    continue
+                self._busy.add(name)
+            futures[self._executor.submit(self._call, name, method, args, kwargs)] = name
+
+        done, not_done = wait(futures, timeout=self.timeout if timeout is None else timeout)
+        for future in done:
+            result = future.result()
+            results[result.name] = result
+        for future in not_done:
+            name = futures[future]
+            with self._lock:
+                running = name in self._busy
+                if running:
+                    error = TimeoutError(f"{name} did not answer in time")
+                    self.health[name].record(self.timeout if timeout is None else timeout, error)
+                    self._timed_out.add(name)
+            # A call that finished after wait() returned is already recorded
+            results[name] = Result(name, None, error, None) if running else future.result()
+        return results
+
+    def broadcast(self, method, *args, **kwargs):
+        """
+        Run the same call on every device, all at once, e.g. fleet.broadcast("move", 0, 0).
+
+        Returns:
+            dict: Result by device name.
+        """
+        return self.scatter({name: (method, args, kwargs) for name in self.devices})
+
+    def status(self):
+        """
+        Returns:
+            dict: DeviceHealth.as_dict() by device name.
+        """
+        return {name: health.as_dict() for name, health in self.health.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,204 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Client-side forward and inverse kinematics for the RoArm-M2-S.
+
+The geometry follows the link lengths used by the Waveshare firmware: the origin is the
+shoulder axis, the upper arm is 236.82 mm long with a 30 mm forward offset, and the
+forearm (to the gripper) is 280.15 mm long with a 1.73 mm offset. Joint angles use the
+firmware convention: shoulder 0 is upright, elbow pi/2 is a horizontal forearm and the
+hand angle is passed through unchanged as "t".
+
+Every function works on arrays of shape (N, 4), so whole paths are solved in one call:
+
+    >>> joints, reachable = kinematics.inverse(path.points)
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from .trajectory import JOINTS, XYZT, Trajectory
+
+UPPER_ARM = np.hypot(236.82, 30.00)
+UPPER_ARM_OFFSET = np.arctan2(30.00, 236.82)
+FOREARM = np.hypot(280.15, 1.73)
+FOREARM_OFFSET = np.arctan2(1.73, 280.15)
+
+# (min, max) in radians for base, shoulder, elbow and hand
+JOINT_LIMITS = np.array([
+    [-np.pi, np.pi],
+    [-np.pi / 2, np.pi / 2],
+    [-np.pi / 4, np.pi],
+    [0.0, np.pi],
+])
+
+
+def forward(joints):
+    """
+    Joint angles to end effector poses.
+
+    Args:
+        joints (array): (base, shoulder, elbow, hand) in radians, shape (N, 4) or (4,).
+
+    Returns:
+        ndarray: (x, y, z, t) poses in mm and radians, same shape as `joints`.
+    """
+    joints = np.asarray(joints, dtype=float)
+    base, shoulder, elbow, hand = np.moveaxis(joints, -1, 0)
+    upper = np.pi / 2 - shoulder - UPPER_ARM_OFFSET
+    fore = np.pi / 2 - shoulder - elbow - FOREARM_OFFSET
+    reach = UPPER_ARM * np.cos(upper) + FOREARM * np.cos(fore)
+    height = UPPER_ARM * np.sin(upper) + FOREARM * np.sin(fore)
+    return np.stack((reach * np.cos(base), reach * np.sin(base), height, hand), axis=-1)
+
+
+def inverse(poses, limits=JOINT_LIMITS):
+    """
+    End effector poses to joint angles (elbow-up solution).
+
+    Args:
+        poses (array): (x, y, z, t) in mm and radians, shape (N, 4) or (4,).
+        limits (array): (4, 2) joint limits used to flag unreachable poses (default: JOINT_LIMITS).
+
+    Returns:
+        tuple: (joints, reachable) where joints has the shape of `poses` and is NaN for
+               unreachable poses, and reachable is a boolean array.
+    """
+    poses = np.asarray(poses, dtype=float)
+    x, y, z, t = np.moveaxis(poses, -1, 0)
+    reach = np.hypot(x, y)
+
+    cos_elbow = (reach ** 2 + z ** 2 - UPPER_ARM ** 2 - FOREARM ** 2) / (2 * UPPER_ARM * FOREARM)
+    with np.errstate(invalid="ignore"):
+        bend = np.arccos(cos_elbow)
+    upper = np.arctan2(z, reach) + np.arctan2(FOREARM * np.sin(bend), UPPER_ARM + FOREARM * cos_elbow)
+    fore = upper - bend
+
+    shoulder = np.pi / 2 - UPPER_ARM_OFFSET - upper
+    elbow = np.pi / 2 - shoulder - fore - FOREARM_OFFSET
+    joints = np.stack((np.arctan2(y, x), shoulder, elbow, t), axis=-1)
+
+    reachable = np.abs(cos_elbow) <= 1.0
+    reachable &= np.all((joints >= limits[:, 0]) & (joints <= limits[:, 1]), axis=-1)
+    joints[~reachable] = np.nan
+    return joints, reachable
+
+
+class InverseKinematicsCache:
+    """
+    Inverse kinematics with an LRU cache of solved targets.
+
+    Targets are quantized to `resolution` (mm and radians) before lookup, so poses that
+    only differ by float noise share a solution. Batches are de-duplicated first, so a
+    path that revisits the same targets only solves each of them once.
+    """
+
+    def __init__(self, maxsize=4096, resolution=0.01, limits=JOINT_LIMITS):
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.limits = limits
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __call__(self, x, y, z, t):
+        """
+        Solve a single target.
+
+        Returns:
+            tuple: (base, shoulder, elbow, hand) in radians, or None if the pose is unreachable.
+        """
+        key = (round(x / self.resolution), round(y / self.resolution), round(z / self.resolution), round(t / self.resolution))
+        try:
+            joints = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            solved, reachable = inverse((x, y, z, t), self.limits)
+            joints = tuple(solved.tolist()) if reachable else None
+            self._cache[key] = joints
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return joints
+
+    def solve(self, poses):
+        """
+        Solve a batch of targets, computing each distinct (quantized) target once.
+
+        Targets already in the cache are looked up, the others are solved in one inverse()
+        call and added to the cache, so a path solved twice is only computed once.
+
+        Args:
+            poses (array): (x, y, z, t) poses, shape (N, 4).
+
+        Returns:
+            tuple: (joints, reachable) as returned by inverse().
+        """
+        poses = np.asarray(poses, dtype=float)
+        keys = np.round(poses / self.resolution).astype(np.int64)
+        unique, first, index = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        index = index.reshape(-1)
+        solutions = np.full((len(unique), 4), np.nan)
+        reachable = np.zeros(len(unique), dtype=bool)
+
+        cache = self._cache
+        keys = [tuple(key) for key in unique.tolist()]
+        missing = []
+        for row, key in enumerate(keys):
+            if key not in cache:
+                missing.append(row)
+                continue
+            cache.move_to_end(key)
+            joints = cache[key]
+            if joints is not None:
+                solutions[row] = joints
+                reachable[row] = True
+
+        if missing:
+            # Like __call__, each target is solved from its first (unquantized) pose
+            solved, solved_reachable = inverse(poses[first[missing]], self.limits)
+            solutions[missing] = solved
+            reachable[missing] = solved_reachable
+            for row, joints, ok in zip(missing, solved.tolist(), solved_reachable.tolist()):
+                cache[keys[row]] = tuple(joints) if ok else None
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+
+        self.misses += len(missing)
+        self.hits += len(poses) - len(missing)
+        return solutions[index], reachable[index]
+
+
+def joint_trajectory(trajectory, limits=JOINT_LIMITS):
+    """
+    Convert a Cartesian (XYZT) trajectory into a joint-space one with the same timing,
+    to be streamed with cmd_joints_rad_ctrl.
+
+    Raises:
+        ValueError: If any sample is unreachable.
+    """
+    if trajectory.space == JOINTS:
+        return trajectory
+    if trajectory.space != XYZT:
+        raise ValueError(f"Unsupported trajectory space: {trajectory.space!r}")
+
+    joints, reachable = inverse(trajectory.points, limits)
+    if not reachable.all():
+        first = int(np.argmin(reachable))
+        raise ValueError(f"{int((~reachable).sum())} unreachable samples, first at t={trajectory.times[first]:.3f}s: {trajectory.points[first].tolist()}")
+    return Trajectory(trajectory.times, joints, JOINTS)
@@ -0,0 +1,181 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+from bisect import bisect_left
+
+from .transport import Transport, command_code
+
+# Upper bounds, in seconds, of the latency histogram buckets (plus an implicit +Inf)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Layout of the per (device, T code) counter lists
+_COUNT, _SUM, _ERRORS, _BYTES_OUT, _BYTES_IN, _BUCKETS = range(6)
+
+
+class Metrics:
+    """
+    Per-device, per-"T"-code command metrics: latency histogram, error count and bytes.
+
+    Each (device, code) pair is a flat list of counters updated under one lock, so
+    recording a command costs about a microsecond and is fine in a 100 Hz loop.
+    Export with prometheus() or snapshot().
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.enabled = True
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, device, code, latency, error, bytes_out, bytes_in):
+        """
+        Record one command.
+
+        Args:
+            device (str): Device label.
+            code (int): The command "T" code (None if unknown).
+            latency (float): Round trip in seconds.
+            error (Exception): The error raised by the send, or None.
+            bytes_out (int): Command size.
+            bytes_in (int): Reply size.
+        """
+        key = (device, code)
+        bucket = _BUCKETS + bisect_left(self.buckets, latency)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0, 0.0, 0, 0, 0] + [0] * (len(self.buckets) + 1)
+            series[_COUNT] += 1
+            series[_SUM] += latency
+            series[_BYTES_OUT] += bytes_out
+            series[_BYTES_IN] += bytes_in
+            series[bucket] += 1
+            if error is not None:
+                series[_ERRORS] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {device: {code: {"count", "errors", "latency_sum", "bytes_out", "bytes_in", "buckets"}}},
+                  where buckets maps each upper bound (and "+Inf") to its cumulative count.
+        """
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        result = {}
+        for (device, code), values in sorted(series.items(), key=lambda item: (item[0][0], item[0][1] or -1)):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + ("+Inf",), values[_BUCKETS:]):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            result.setdefault(device, {})[str(code)] = {
+                "count": values[_COUNT], "errors": values[_ERRORS], "latency_sum": values[_SUM],
+                "bytes_out": values[_BYTES_OUT], "bytes_in": values[_BYTES_IN], "buckets": buckets,
+            }
+        return result
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def prometheus(self, prefix="foss"):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        lines = [
+            f"# HELP {prefix}_command_latency_seconds Command round trip time.",
+            f"# TYPE {prefix}_command_latency_seconds histogram",
+        ]
+        counters = []
+        for device, codes in self.snapshot().items():
+            for code, values in codes.items():
+                labels = f'device="{device}",code="{code}"'
+                for bound, count in values["buckets"].items():
+                    lines.append(f'{prefix}_command_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{prefix}_command_latency_seconds_sum{{{labels}}} {values['latency_sum']}")
+                lines.append(f"{prefix}_command_latency_seconds_count{{{labels}}} {values['count']}")
+                counters.append((labels, values))
+
+        for name, field, help_text in (
+            ("command_errors_total", "errors", "Commands that failed."),
+            ("command_sent_bytes_total", "bytes_out", "Command bytes sent."),
+            ("command_received_bytes_total", "bytes_in", "Reply bytes received."),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, values in counters:
+                lines.append(f"{prefix}_{name}{{{labels}}} {values[field]}")
+        return "\n".join(lines) + "\n"
+
+
+# Default registry shared by every InstrumentedTransport that is not given its own
+METRICS = Metrics()
+
+# Disabled registry of transports instrumented only to run hooks (e.g. by Recorder.attach()),
+# so they publish nothing; enable_metrics() switches them to a real registry
+NO_METRICS = Metrics()
+NO_METRICS.enabled = False
+
+
+class InstrumentedTransport(Transport):
+    """
+    Transport wrapper that records every command in a Metrics registry and runs hooks.
+
+    Pre-send hooks are called as hook(command_json) and post-send hooks as
+    hook(command_json, response, error, latency). When `metrics.enabled` is False and no
+    hooks are registered, send() goes straight to the wrapped transport.
+    """
+
+    def __init__(self, transport, device, metrics=None):
+        """
+        Args:
+            transport (Transport): The transport to instrument.
+            device (str): Device label used in the metrics.
+            metrics (Metrics): Registry to record into (default: METRICS).
+        """
+        self.transport = transport
+        self.device = device
+        self.metrics = metrics or METRICS
+        self.pre_send = []
+        self.post_send = []
+
+    def send(self, command_json):
+        if not (self.metrics.enabled or self.pre_send or self.post_send):
+            return self.transport.send(command_json)
+
+        for hook in self.pre_send:
+            hook(command_json)
+        response = error = None
+        start = time.perf_counter()
+        try:
+            response = self.transport.send(command_json)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            if self.metrics.enabled:
+                self.metrics.record(self.device, command_code(command_json), latency, error,
+                                    len(command_json), len(response) if response else 0)
+            for hook in self.post_send:
+                hook(command_json, response, error, latency)
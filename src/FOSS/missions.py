@@ -0,0 +1,197 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Mission compiler with incremental upload for the RoArm-M2-S.
+
+The firmware stores a mission as the file "<name>.mission" on its flash: a header line
+{"name":...,"intro":...} followed by one JSON step per line. A new or rebuilt mission is
+written straight to that file, several steps per request; an existing mission is diffed
+against a hashed copy of what was last uploaded and only changed steps are replaced
+(T:228) or appended (T:222).
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+
+from .commands import encode_json
+
+UploadReport = namedtuple("UploadReport", ("name", "requests", "replaced", "appended", "rebuilt"))
+UploadReport.__doc__ = "What MissionCompiler.upload() sent to the arm."
+
+
+def compile_step(step):
+    """
+    Normalize a mission step to compact JSON.
+
+    Args:
+        step (dict or str): The step command, e.g. {"T": 104, "x": 235, ...} or its JSON text.
+
+    Returns:
+        str: Compact JSON text.
+    """
+    if isinstance(step, str):
+        step = json.loads(step)
+    return encode_json(step)
+
+
+def chunk_lines(lines, max_bytes):
+    """
+    Group lines into newline-joined chunks of at most `max_bytes` (a longer line gets its own chunk).
+
+    Args:
+        lines (iterable): Text lines without line terminators.
+        max_bytes (int): Target maximum chunk size.
+
+    Yields:
+        str: The chunks.
+    """
+    chunk, size = [], 0
+    for line in lines:
+        if chunk and size + len(line) + 1 > max_bytes:
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        yield "\n".join(chunk)
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def parse_mission_content(text):
+    """
+    Parse a cmd_mission_content() reply.
+
+    Args:
+        text (str or Response): Reply text, one JSON object per line.
+
+    Returns:
+        tuple: (header, steps) where header is the {"name", "intro"} dict (or None) and steps
+               is the list of compact JSON step strings.
+    """
+    header, steps = None, []
+    for line in ("" if text is None else str(text)).splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(value, dict):
+            continue
+        if header is None and "T" not in value and "name" in value:
+            header = value
+        elif "T" in value:
+            steps.append(encode_json(value))
+    return header, steps
+
+
+class MissionCompiler:
+    """
+    Uploads missions defined as Python lists of steps with as few requests as possible.
+    """
+
+    def __init__(self, arm, max_request_bytes=1024):
+        """
+        Args:
+            arm (RoArmM2S): The arm to upload missions to.
+            max_request_bytes (int): Largest JSON payload packed into a single file request (default: 1024).
+        """
+        self.arm = arm
+        self.max_request_bytes = max_request_bytes
+        # Mission name -> list of step digests as last uploaded (or read back) from the arm
+        self.uploaded = {}
+
+    def fetch(self, name):
+        """
+        Read a mission back from the arm and remember its step digests.
+
+        Returns:
+            list: Step digests, or None if the arm does not know the mission.
+        """
+        header, steps = parse_mission_content(self.arm.cmd_mission_content(name))
+        if header is None and not steps:
+            self.uploaded.pop(name, None)
+            return None
+        self.uploaded[name] = [_digest(step) for step in steps]
+        return self.uploaded[name]
+
+    def forget(self, name=None):
+        """
+        Drop the cached copy of one mission (or all of them), forcing a fetch on the next upload.
+        """
+        if name is None:
+            self.uploaded.clear()
+        else:
+            self.uploaded.pop(name, None)
+
+    def _lines(self, name, intro, steps):
+        """
+        Returns:
+            list: The lines of the mission file: its header, then one step per line.
+        """
+        return [encode_json({"name": name, "intro": intro})] + steps
+
+    def _rebuild(self, name, intro, steps):
+        chunks = chunk_lines(self._lines(name, intro, steps), self.max_request_bytes)
+        requests = 1
+        self.arm.cmd_create_file(f"{name}.mission", next(chunks))
+        for chunk in chunks:
+            self.arm.cmd_append_line(f"{name}.mission", chunk)
+            requests += 1
+        return requests
+
+    def upload(self, name, steps, intro=""):
+        """
+        Make the mission on the arm match `steps`, sending only what changed.
+
+        Args:
+            name (str): Mission name.
+            steps (list): Steps as dicts or JSON strings.
+            intro (str): Mission description, used when the mission is (re)built (default: "").
+
+        Returns:
+            UploadReport: Number of requests and steps sent.
+        """
+        steps = [compile_step(step) for step in steps]
+        digests = [_digest(step) for step in steps]
+
+        previous = self.uploaded.get(name)
+        if previous is None:
+            previous = self.fetch(name)
+
+        changed = []
+        if previous is not None and len(previous) <= len(steps):
+            changed = [index for index, digest in enumerate(previous) if digest != digests[index]]
+            appended = len(steps) - len(previous)
+            incremental = len(changed) + appended
+            rebuild_cost = sum(1 for _ in chunk_lines(self._lines(name, intro, steps), self.max_request_bytes))
+
+        if previous is None or len(previous) > len(steps) or incremental > rebuild_cost:
+            # New mission, removed steps, or too many changes: rewrite the whole file
+            requests = self._rebuild(name, intro, steps)
+            self.uploaded[name] = digests
+            return UploadReport(name, requests, 0, len(steps), True)
+
+        for index in changed:
+            self.arm.cmd_replace_step_json(name, index + 1, steps[index])
+        for step in steps[len(previous):]:
+            self.arm.cmd_append_step_json(name, step)
+        self.uploaded[name] = digests
+        return UploadReport(name, incremental, len(changed), appended, False)
@@ -10,64 +10,202 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import threading
+
 import rclpy
+from rclpy.executors import MultiThreadedExecutor
 from rclpy.node import Node
-import keyboard
+from geometry_msgs.msg import Twist
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
+
+from .bridge import CmdVelBridge
+from .ugvcontroller import UGVController
+
+
+class CmdVelBridgeNode(Node):
+    """
+    Subscribes to geometry_msgs/Twist on cmd_vel and drives the rover through
+    UGVController.cmd_ros_control on a rate limited timer with a deadman timeout.
+    Command latency is published on /diagnostics.
+    """
+
+    def __init__(self, ugv=None):
+        super().__init__("cmd_vel_bridge")
+        self.declare_parameter("ip", "192.168.4.1")
+        self.declare_parameter("rate_hz", 20.0)
+        self.declare_parameter("deadman_timeout", 0.5)
+        self.declare_parameter("keepalive", 0.5)
+        self.declare_parameter("max_linear", 1.0)
+        self.declare_parameter("max_angular", 3.0)
+
+        ip = self.get_parameter("ip").value
+        self.ugv = ugv or UGVController(ip=ip)
+        self.bridge = CmdVelBridge(
+            self.ugv,
+            deadman_timeout=self.get_parameter("deadman_timeout").value,
+            keepalive=self.get_parameter("keepalive").value,
+            max_linear=self.get_parameter("max_linear").value,
+            max_angular=self.get_parameter("max_angular").value,
+        )
+
+        self.subscription = self.create_subscription(Twist, "cmd_vel", self.on_cmd_vel, 10)
+        self.diagnostics = self.create_publisher(DiagnosticArray, "/diagnostics", 10)
+        self.timer = self.create_timer(1.0 / self.get_parameter("rate_hz").value, self.on_timer)
+        self.diagnostics_timer = self.create_timer(1.0, self.publish_diagnostics)
+        self.get_logger().info(f"Forwarding cmd_vel to the rover at {ip}")
+
+    def on_cmd_vel(self, msg):
+        self.bridge.on_twist(msg.linear.x, msg.angular.z)
+
+    def on_timer(self):
+        self.bridge.tick()
+
+    def publish_diagnostics(self):
+        bridge = self.bridge
+        status = DiagnosticStatus()
+        status.name = "cmd_vel_bridge"
+        status.hardware_id = self.ugv.ip
+        status.level = DiagnosticStatus.OK if not bridge.errors else DiagnosticStatus.WARN
+        status.message = "OK" if not bridge.errors else f"{bridge.errors} commands failed"
+        status.values = [
+            KeyValue(key="commands", value=str(bridge.commands)),
+            KeyValue(key="errors", value=str(bridge.errors)),
+            KeyValue(key="deadman_stops", value=str(bridge.deadman_stops)),
+            KeyValue(key="last_latency_ms", value=f"{(bridge.last_latency or 0.0) * 1000:.3f}"),
+            KeyValue(key="max_latency_ms", value=f"{bridge.max_latency * 1000:.3f}"),
+        ]
+        msg = DiagnosticArray()
+        msg.header.stamp = self.get_clock().now().to_msg()
+        msg.status = [status]
+        self.diagnostics.publish(msg)
 
 
 class KeyboardControlNode(Node):
-    def __init__(self):
+    """
+    Keyboard teleop: publishes a Twist on cmd_vel whenever the arrow keys change state,
+    and republishes the held command on a timer so the bridge's deadman does not stop
+    the rover while a key is held. Angular velocity follows REP-103: positive turns left.
+
+    Key presses arrive as events from the keyboard module's hook, so nothing is polled.
+    """
+
+    def __init__(self, linear_speed=0.5, angular_speed=1.0, repeat_hz=10.0):
+        """
+        Args:
+            linear_speed (float): Forward/backward speed in m/s (default: 0.5).
+            angular_speed (float): Turn rate in rad/s (default: 1.0).
+            repeat_hz (float): Rate at which a held command is republished; keep it above
+                               1 / deadman_timeout of the bridge (default: 10.0).
+        """
         super().__init__("keyboard_control_node")
+        self.publisher = self.create_publisher(Twist, "cmd_vel", 10)
+        self.linear_speed = linear_speed
+        self.angular_speed = angular_speed
+        self.pressed = set()
+        self.command = (0.0, 0.0)
+        self.done = threading.Event()
+        self.repeat_timer = self.create_timer(1.0 / repeat_hz, self.on_repeat)
         self.get_logger().info("Keyboard Control Node has started!")
-        self.running = True
+
+    def publish(self, linear, angular):
+        self.command = (float(linear), float(angular))
+        msg = Twist()
+        msg.linear.x = self.command[0]
+        msg.angular.z = self.command[1]
+        self.publisher.publish(msg)
 
     def move_forward(self):
         self.get_logger().info("Moving forward...")
+        self.publish(self.linear_speed, 0.0)
 
     def move_backward(self):
         self.get_logger().info("Moving backward...")
+        self.publish(-self.linear_speed, 0.0)
 
     def turn_left(self):
         self.get_logger().info("Turning left...")
+        self.publish(0.0, self.angular_speed)
 
     def turn_right(self):
         self.get_logger().info("Turning right...")
+        self.publish(0.0, -self.angular_speed)
 
     def stop(self):
         self.get_logger().info("Stopping the robot...")
+        self.publish(0.0, 0.0)
+
+    def on_repeat(self):
+        if self.command != (0.0, 0.0):
+            self.publish(*self.command)
+
+    def on_key(self, event):
+        if event.name == "esc":
+            self.shutdown()
+            return
+        if event.name not in ("up", "down", "left", "right"):
+            return
+        if event.event_type == "down":
+            if event.name in self.pressed:
+                return  # Auto-repeat: the repeat timer keeps the command alive
+            self.pressed.add(event.name)
+        else:
+            self.pressed.discard(event.name)
+
+        if "up" in self.pressed:
+            self.move_forward()
+        elif "down" in self.pressed:
+            self.move_backward()
+        elif "left" in self.pressed:
+            self.turn_left()
+        elif "right" in self.pressed:
+            self.turn_right()
+        else:
+            self.stop()
 
     def shutdown(self):
         self.get_logger().info("Shutting down the node...")
-        self.running = False
+        self.stop()
+        self.done.set()
+
+
+def bridge_main(args=None):
+    rclpy.init(args=args)
+    node = CmdVelBridgeNode()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.ugv.cmd_ros_control(0.0, 0.0)
+        node.destroy_node()
+        rclpy.try_shutdown()
 
 
 def main(args=None):
+    import keyboard
+
     rclpy.init(args=args)
-    node = KeyboardControlNode()
+    bridge = CmdVelBridgeNode()
+    teleop = KeyboardControlNode()
+    executor = MultiThreadedExecutor()
+    executor.add_node(bridge)
+    executor.add_node(teleop)
+    keyboard.hook(teleop.on_key)
 
     try:
-        node.get_logger().info("Use arrow keys to control the robot. Press 'Esc' to quit.")
-
-        while node.running:
-            if keyboard.is_pressed("up"):
-                node.move_forward()
-            elif keyboard.is_pressed("down"):
-                node.move_backward()
-            elif keyboard.is_pressed("left"):
-                node.turn_left()
-            elif keyboard.is_pressed("right"):
-                node.turn_right()
-            elif keyboard.is_pressed("esc"):
-                node.shutdown()
-            else:
-                node.stop()
+        teleop.get_logger().info("Use arrow keys to control the robot. Press 'Esc' to quit.")
+        while rclpy.ok() and not teleop.done.is_set():
+            executor.spin_once(timeout_sec=0.1)
 
     except KeyboardInterrupt:
-        node.shutdown()
+        teleop.shutdown()
 
     finally:
-        node.get_logger().info("Exiting...")
-        rclpy.shutdown()
+        teleop.get_logger().info("Exiting...")
+        keyboard.unhook_all()
+        bridge.ugv.cmd_ros_control(0.0, 0.0)
+        executor.shutdown()
+        rclpy.try_shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,370 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Binary command/response recorder and timed replay.
+
+A recording is an append-only file: a 16 byte header (magic and start time) followed by
+records, each a fixed header (RECORD) and its payloads:
+
+    offset    uint64  microseconds since the start of the recording, when the command was sent
+    latency   uint32  round trip in microseconds
+    device    uint16  device number, defined by an earlier KIND_DEVICE record
+    kind      uint8   KIND_EXCHANGE or KIND_DEVICE
+    flags     uint8   FLAG_ERROR, FLAG_COMMAND_REF
+    cmd_len   uint32  command length in bytes
+    resp_len  uint32  response (or error text) length in bytes
+
+Repeated commands (feedback polls, a joystick held still) are written once and later
+records point at the first copy with FLAG_COMMAND_REF and an 8 byte file offset, so a
+multi-hour session mostly costs the header and the response bytes. Recordings are read
+through mmap, so they can be indexed and seeked without loading them into memory.
+
+A record is written when its reply arrives, so commands sent concurrently (several
+controllers, a scheduler) can be appended out of send order; Recording sorts its index
+by send time.
+"""
+
+import mmap
+import struct
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from .metrics import NO_METRICS
+
+MAGIC = b"FOSSREC1"
+HEADER = struct.Struct("<8sd")
+RECORD = struct.Struct("<QIHBBII")
+_OFFSET = struct.Struct("<Q")
+
+KIND_EXCHANGE = 0
+KIND_DEVICE = 1
+
+FLAG_ERROR = 0x01
+FLAG_COMMAND_REF = 0x02
+
+Exchange = namedtuple("Exchange", ("time", "latency", "device", "command", "response", "error"))
+Exchange.__doc__ = "One recorded command: send time in seconds since the start of the recording, round trip, device name, command, response or error text."
+
+ReplayReport = namedtuple("ReplayReport", ("sent", "skipped", "errors", "mismatches", "duration", "max_lag"))
+ReplayReport.__doc__ = "Result of Replayer.run(); `mismatches` counts responses differing from the recording, `max_lag` is the worst send lateness in seconds."
+
+
+class Recorder:
+    """
+    Append every command sent by one or more controllers to a binary recording.
+
+    The recorder registers a post-send hook on the controller's InstrumentedTransport
+    (see enable_metrics()), so it sees the real round trips under the send queue.
+    """
+
+    def __init__(self, path, max_interned=4096, buffering=1 << 16):
+        """
+        Args:
+            path (str): File to write; an existing file is replaced.
+            max_interned (int): Number of distinct commands remembered for de-duplication (default: 4096).
+            buffering (int): Write buffer size in bytes (default: 64 KiB). Call flush() to force a write.
+        """
+        self.path = path
+        self.max_interned = max_interned
+        self.start = time.perf_counter()
+        self.records = 0
+        self._file = open(path, "wb", buffering=buffering)
+        self._file.write(HEADER.pack(MAGIC, time.time()))
+        self._position = HEADER.size
+        self._devices = {}
+        self._interned = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def _write(self, offset, latency, device, command, response, error):
+        flags = 0
+        if error is not None:
+            flags |= FLAG_ERROR
+            response = f"{type(error).__name__}: {error}"
+        payload = command.encode()
+        response = (response or "").encode()
+        with self._lock:
+            if self._file is None:
+                return
+            device_id = self._devices.get(device)
+            if device_id is None:
+                device_id = self._devices[device] = len(self._devices)
+                self._write_record(0, 0, device_id, KIND_DEVICE, 0, device.encode(), b"")
+            reference = self._interned.get(payload)
+            if reference is not None:
+                flags |= FLAG_COMMAND_REF
+                self._write_record(offset, latency, device_id, KIND_EXCHANGE, flags, _OFFSET.pack(reference), response, len(payload))
+                return
+            if len(self._interned) >= self.max_interned:
+                self._interned.clear()
+            # Commands repeated later point at this copy of the payload
+            self._interned[payload] = self._position + RECORD.size
+            self._write_record(offset, latency, device_id, KIND_EXCHANGE, flags, payload, response)
+
+    def _write_record(self, offset, latency, device_id, kind, flags, payload, response, command_len=None):
+        header = RECORD.pack(int(offset * 1e6), min(int(latency * 1e6), 0xFFFFFFFF), device_id, kind, flags,
+                             len(payload) if command_len is None else command_len, len(response))
+        self._file.write(header)
+        self._file.write(payload)
+        self._file.write(response)
+        self._position += len(header) + len(payload) + len(response)
+        if kind == KIND_EXCHANGE:
+            self.records += 1
+
+    def record(self, device, command_json, response, error=None, latency=0.0, sent_at=None):
+        """
+        Append one exchange (also usable to record commands sent outside a controller).
+
+        Args:
+            device (str): Device name.
+            command_json (str): The command sent.
+            response (str): The reply text, or None.
+            error (Exception): The error raised by the transport, if any.
+            latency (float): Round trip in seconds.
+            sent_at (float): time.perf_counter() when the command was sent (default: now - latency).
+        """
+        if sent_at is None:
+            sent_at = time.perf_counter() - latency
+        self._write(sent_at - self.start, latency, device, command_json, response, error)
+
+    def attach(self, controller, device=None):
+        """
+        Record every command sent by `controller`.
+
+        The recorder hooks into the controller's InstrumentedTransport. If metrics were not
+        enabled on the controller, it is instrumented with the unpublished NO_METRICS registry,
+        so attaching a recorder does not make the controller report to FOSS.metrics.METRICS.
+
+        Args:
+            controller (UGVController or RoArmM2S): The controller to record.
+            device (str): Device name in the recording (default: the controller's IP address).
+        """
+        device = device or getattr(controller, "ip", None) or controller.ip_address
+        instrumented = controller.enable_metrics(metrics=NO_METRICS, device=device)
+
+        def hook(command_json, response, error, latency):
+            self.record(device, command_json, response, error, latency)
+
+        instrumented.post_send.append(hook)
+        self._hooks.append((instrumented, hook))
+
+    def detach(self):
+        """
+        Stop recording every attached controller.
+        """
+        for instrumented, hook in self._hooks:
+            if hook in instrumented.post_send:
+                instrumented.post_send.remove(hook)
+        self._hooks = []
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Recording:
+    """
+    Memory-mapped, read-only view of a recording.
+
+    Opening a recording only walks the record headers, keeping one 8 byte offset per
+    exchange in send time order; commands and responses are decoded when an exchange is
+    accessed. A truncated last record (e.g. after a crash) is ignored.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Recording to open.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a FOSS recording")
+        magic, self.started = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a FOSS recording")
+        self.devices = []
+        self._offsets = array("Q")
+        self._index()
+
+    def _index(self):
+        data, size = self._map, len(self._map)
+        position = HEADER.size
+        times = array("Q")
+        while position + RECORD.size <= size:
+            offset, _, _, kind, flags, command_len, response_len = RECORD.unpack_from(data, position)
+            payload_len = _OFFSET.size if flags & FLAG_COMMAND_REF else command_len
+            end = position + RECORD.size + payload_len + response_len
+            if end > size:
+                break
+            if kind == KIND_DEVICE:
+                self.devices.append(data[position + RECORD.size:position + RECORD.size + command_len].decode())
+            else:
+                self._offsets.append(position)
+                times.append(offset)
+            position = end
+
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            # Records were appended in completion order: sort them by send time (stable, so ties keep the file order)
+            order = sorted(range(len(times)), key=times.__getitem__)
+            self._offsets = array("Q", (self._offsets[index] for index in order))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        data = self._map
+        position = self._offsets[index]
+        offset, latency, device_id, _, flags, command_len, response_len = RECORD.unpack_from(data, position)
+        position += RECORD.size
+        if flags & FLAG_COMMAND_REF:
+            source = _OFFSET.unpack_from(data, position)[0]
+            command = data[source:source + command_len]
+            position += _OFFSET.size
+        else:
+            command = data[position:position + command_len]
+            position += command_len
+        text = data[position:position + response_len].decode()
+        error = text if flags & FLAG_ERROR else None
+        return Exchange(offset / 1e6, latency / 1e6, self.devices[device_id], command.decode(),
+                        None if error is not None else text, error)
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def time_at(self, index):
+        """
+        Returns:
+            float: Send time of exchange `index` in seconds, without decoding its payloads.
+        """
+        return RECORD.unpack_from(self._map, self._offsets[index])[0] / 1e6
+
+    def duration(self):
+        return self.time_at(len(self) - 1) if len(self) else 0.0
+
+    def seek(self, seconds):
+        """
+        Binary search for the first exchange sent at or after `seconds`.
+
+        Returns:
+            int: Exchange index (len(self) when every exchange is earlier).
+        """
+        low, high = 0, len(self._offsets)
+        while low < high:
+            middle = (low + high) // 2
+            if self.time_at(middle) < seconds:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def window(self, start=None, end=None):
+        """
+        Iterate over the exchanges sent between `start` and `end` seconds.
+        """
+        index = 0 if start is None else self.seek(start)
+        stop = len(self) if end is None else self.seek(end)
+        for index in range(index, stop):
+            yield self[index]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Replayer:
+    """
+    Re-issue a recording against real devices or emulators with its original timing.
+
+    Targets are controllers (their send_command() is used) or transports, keyed by the
+    device names stored in the recording. Exchanges of other devices are skipped.
+    """
+
+    def __init__(self, recording, targets, speed=1.0, spin=0.002):
+        """
+        Args:
+            recording (Recording): The recording to play.
+            targets (dict): Device name to controller or Transport.
+            speed (float): Time scale, 2.0 replays twice as fast; 0 sends as fast as possible (default: 1.0).
+            spin (float): Seconds before each deadline when sleeping switches to spinning (default: 0.002).
+        """
+        self.recording = recording
+        self.speed = speed
+        self.spin = spin
+        self._send = {name: getattr(target, "send_command", None) or target.send for name, target in targets.items()}
+
+    def run(self, start=None, end=None):
+        """
+        Replay the exchanges between `start` and `end` seconds, blocking until done.
+
+        Returns:
+            ReplayReport: Counts and the worst send lateness.
+        """
+        clock = time.perf_counter
+        sent = skipped = errors = mismatches = 0
+        max_lag = 0.0
+        origin = None
+        begin = clock()
+        for exchange in self.recording.window(start, end):
+            send = self._send.get(exchange.device)
+            if send is None:
+                skipped += 1
+                continue
+            if origin is None:
+                origin = exchange.time
+            if self.speed > 0:
+                deadline = begin + (exchange.time - origin) / self.speed
+                remaining = deadline - clock()
+                if remaining > self.spin:
+                    time.sleep(remaining - self.spin)
+                while clock() < deadline:
+                    pass
+                max_lag = max(max_lag, clock() - deadline)
+            try:
+                response = send(exchange.command)
+            except Exception:
+                errors += 1
+                continue
+            sent += 1
+            if exchange.response is not None and response != exchange.response:
+                mismatches += 1
+        return ReplayReport(sent, skipped, errors, mismatches, clock() - begin, max_lag)
@@ -0,0 +1,226 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Typed results of the cmd_* methods.
+
+A result is the reply text itself (a str subclass) and only decodes it (with orjson when
+installed) the first time a field is read, so a loop that ignores most replies never
+parses them. json.loads(), slicing, `in` and the str methods work as they did on the plain
+string replies; only indexing with a string key reads a JSON field instead.
+"""
+
+import math
+
+from .commands import decode_json
+from .filesync import parse_file_listing, parse_free_space
+from .missions import parse_mission_content
+from .telemetry import ARM_FEEDBACK_FIELDS, BASE_FEEDBACK_FIELDS
+
+_UNPARSED = object()
+
+
+class Response(str):
+    """
+    Reply of a command the package has no specific type for: the reply text, with lazy
+    access to its decoded JSON.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, text):
+        """
+        Args:
+            text (str): The reply text.
+        """
+        self._data = _UNPARSED
+
+    @property
+    def text(self):
+        """
+        Returns:
+            str: The reply text as a plain str.
+        """
+        return str.__str__(self)
+
+    @property
+    def data(self):
+        """
+        Returns:
+            The decoded JSON reply, or None when the reply is not JSON.
+        """
+        data = self._data
+        if data is _UNPARSED:
+            try:
+                data = decode_json(self.text)
+            except (TypeError, ValueError):
+                data = None
+            self._data = data
+        return data
+
+    @property
+    def code(self):
+        """
+        Returns:
+            int: The "T" code of the reply, or None.
+        """
+        return self.get("T")
+
+    def get(self, key, default=None):
+        data = self.data
+        return data.get(key, default) if isinstance(data, dict) else default
+
+    def __getitem__(self, key):
+        """
+        A string key reads a field of the JSON reply; integers and slices index the text.
+        """
+        if isinstance(key, str):
+            data = self.data
+            if not isinstance(data, dict):
+                raise KeyError(key)
+            return data[key]
+        return str.__getitem__(self, key)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r})"
+
+    def __reduce__(self):
+        # Copies and pickles carry the text only, the JSON is decoded again on first access
+        return type(self), (self.text,)
+
+
+def _fields(cls, fields):
+    nan = math.nan
+    for name in fields:
+        setattr(cls, name, property(lambda self, name=name: self.get(name, nan)))
+    cls.fields = fields
+    return cls
+
+
+class _Frame(Response):
+    __slots__ = ()
+    fields = ()
+
+    def values(self):
+        """
+        Returns:
+            tuple: The frame's `fields` as floats, NaN when missing.
+        """
+        data = self.data if isinstance(self.data, dict) else {}
+        nan = math.nan
+        return tuple(float(data.get(name, nan)) for name in self.fields)
+
+
+class ArmFeedback(_Frame):
+    """
+    RoArm-M2-S feedback frame (T:1051): end effector position x, y, z, joint angles
+    b, s, e, t in radians and joint loads torB, torS, torE, torH. Missing fields are NaN.
+    """
+
+    __slots__ = ()
+
+    @property
+    def position(self):
+        return self.x, self.y, self.z
+
+    @property
+    def joints(self):
+        return self.b, self.s, self.e, self.t
+
+
+class BaseFeedback(_Frame):
+    """
+    UGV base feedback frame (T:1001): wheel speeds L, R, IMU roll r, pitch p, yaw y,
+    temperature temp and voltage v. Missing fields are NaN.
+    """
+
+    __slots__ = ()
+
+    @property
+    def wheel_speeds(self):
+        return self.L, self.R
+
+
+_fields(ArmFeedback, ARM_FEEDBACK_FIELDS)
+_fields(BaseFeedback, BASE_FEEDBACK_FIELDS)
+
+
+class FileListing(Response):
+    """
+    Reply of cmd_scan_files().
+    """
+
+    __slots__ = ()
+
+    @property
+    def files(self):
+        """
+        Returns:
+            set: File names on the flash.
+        """
+        return parse_file_listing(self.text)
+
+
+class FreeSpace(Response):
+    """
+    Reply of cmd_free_flash_space().
+    """
+
+    __slots__ = ()
+
+    @property
+    def free(self):
+        """
+        Returns:
+            int: Free bytes, or None if the reply has no number in it.
+        """
+        return parse_free_space(self.text)
+
+
+class MissionContent(Response):
+    """
+    Reply of cmd_mission_content().
+    """
+
+    __slots__ = ()
+
+    @property
+    def header(self):
+        return parse_mission_content(self.text)[0]
+
+    @property
+    def steps(self):
+        return parse_mission_content(self.text)[1]
+
+
+# Result type by request "T" code, everything else is a plain Response
+ARM_RESULTS = {105: ArmFeedback, 200: FileListing, 221: MissionContent, 601: FreeSpace}
+UGV_RESULTS = {130: BaseFeedback}
+
+
+def make_result(results, code, text):
+    """
+    Wrap the reply to command `code`.
+
+    Args:
+        results (dict): ARM_RESULTS or UGV_RESULTS.
+        code (int): The "T" code of the request.
+        text (str): The reply text, or None (queued commands, communication errors).
+
+    Returns:
+        Response: The typed result, or None when `text` is None.
+    """
+    if text is None:
+        return None
+    return results.get(code, Response)(text)
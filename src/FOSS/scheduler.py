@@ -0,0 +1,212 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from collections import deque
+from concurrent.futures import Future, wait
+
+from .transport import Transport, command_code
+
+
+def _group(name, *codes):
+    return {code: name for code in codes}
+
+
+# RoArm-M2-S resource groups by "T" code. Commands of one group drive the same hardware
+# (or firmware state) and are sent in order; different groups are independent.
+ARM_GROUPS = {
+    **_group("motion", 100, 101, 102, 104, 1041, 106, 111, 112, 121, 122, 123, 210, 1, 2, 107, 108, 109),
+    **_group("feedback", 105),
+    **_group("io", 113, 114, 115),
+    **_group("wifi", 401, 402, 403, 404, 405, 406, 407),
+    **_group("espnow", 300, 301, 302, 303, 304, 305, 306),
+    **_group("storage", 200, 201, 202, 203, 204, 220, 221, 222, 228),
+    **_group("system", 600, 601, 602, 603, 604, 605),
+}
+
+# UGV resource groups. T:1 and T:2 mean different things on the rover and the arm.
+UGV_GROUPS = {
+    **_group("motion", 1, 2, 13),
+    **_group("feedback", 130, 131),
+}
+
+PRIORITY_GROUPS = frozenset({"motion"})
+BARRIER_GROUPS = frozenset({"system"})
+
+
+class _Lane:
+    """
+    FIFO of one resource group, drained by its own thread.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.queue = deque()
+        self.ready = threading.Condition()
+        self.last = None
+        self.sent = 0
+        self.errors = 0
+        self.thread = None
+
+
+class CommandScheduler(Transport):
+    """
+    Send commands of independent subsystems concurrently.
+
+    Every command is mapped by its "T" code to a resource group (motion, feedback, LEDs and
+    switches, Wi-Fi, ...). Each group has its own lane: commands of a lane are sent one at
+    a time and in submission order, so per-actuator ordering is kept, while lanes run in
+    parallel, so a slow Wi-Fi or file query no longer delays the next motion command.
+
+    The ESP32 only serves a couple of connections, so non-priority lanes share
+    `max_in_flight - 1` slots and the priority (motion) lanes always find a free one.
+    Barrier groups (reboot, NVS clear) wait for every lane to drain and hold every later
+    command until they are done.
+    """
+
+    def __init__(self, transport, groups=ARM_GROUPS, priority=PRIORITY_GROUPS, barriers=BARRIER_GROUPS, max_in_flight=2):
+        """
+        Args:
+            transport (Transport): The transport that actually delivers the commands.
+            groups (dict): "T" code to resource group name (default: ARM_GROUPS). Unknown codes use the "default" group.
+            priority (frozenset): Groups that never wait for a background slot (default: PRIORITY_GROUPS).
+            barriers (frozenset): Groups that are ordered against every other group (default: BARRIER_GROUPS).
+            max_in_flight (int): Concurrent requests the device accepts (default: 2).
+        """
+        self.transport = transport
+        self.groups = groups
+        self.priority = priority
+        self.barriers = barriers
+        self._background = threading.BoundedSemaphore(max(1, max_in_flight - 1))
+        self._lanes = {}
+        self._barrier = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def group(self, command_json):
+        """
+        Returns:
+            str: The resource group of a command.
+        """
+        return self.groups.get(command_code(command_json), "default")
+
+    def submit(self, command_json, after=()):
+        """
+        Queue a command on its resource group's lane.
+
+        Args:
+            command_json (str): The JSON command to send.
+            after (iterable): Futures of other commands that must complete first, for
+                              dependencies across groups.
+
+        Returns:
+            Future: Resolves to the response text, or to the transport's exception.
+        """
+        group = self.group(command_json)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The scheduler is closed")
+            lane = self._lanes.get(group)
+            if lane is None:
+                lane = self._lanes[group] = _Lane(group)
+                lane.thread = threading.Thread(target=self._run, args=(lane,), name=f"FOSS-lane-{group}", daemon=True)
+                lane.thread.start()
+            dependencies = [f for f in after if f is not None]
+            if group in self.barriers:
+                dependencies.extend(other.last for other in self._lanes.values() if other.last is not None)
+                self._barrier = future
+            elif self._barrier is not None and not self._barrier.done():
+                dependencies.append(self._barrier)
+            # Queue under the same lock as the last/barrier bookkeeping, so lane order always
+            # matches it; a later command queued first would wait on a barrier waiting on it
+            lane.last = future
+            with lane.ready:
+                lane.queue.append((future, command_json, dependencies))
+                lane.ready.notify()
+        return future
+
+    def send(self, command_json):
+        """
+        Send a command through its lane and wait for the reply.
+
+        Args:
+            command_json (str): The JSON command to send.
+
+        Returns:
+            str: The response text from the device.
+        """
+        return self.submit(command_json).result()
+
+    def _run(self, lane):
+        background = None if lane.name in self.priority else self._background
+        while True:
+            with lane.ready:
+                while not lane.queue:
+                    if self._closed:
+                        return
+                    lane.ready.wait()
+                future, command_json, dependencies = lane.queue.popleft()
+            if dependencies:
+                wait(dependencies)
+            if not future.set_running_or_notify_cancel():
+                continue
+            if background is not None:
+                background.acquire()
+            try:
+                future.set_result(self.transport.send(command_json))
+                lane.sent += 1
+            except Exception as e:
+                lane.errors += 1
+                future.set_exception(e)
+            finally:
+                if background is not None:
+                    background.release()
+
+    def drain(self):
+        """
+        Block until every command submitted so far was sent.
+        """
+        with self._lock:
+            pending = [lane.last for lane in self._lanes.values() if lane.last is not None]
+        wait(pending)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per group counters for sent and failed commands, plus the queue depth.
+        """
+        with self._lock:
+            return {name: {"sent": lane.sent, "errors": lane.errors, "pending": len(lane.queue)}
+                    for name, lane in self._lanes.items()}
+
+    def close(self, flush=True):
+        """
+        Stop the lanes. The wrapped transport is left open, since it is usually shared.
+
+        Args:
+            flush (bool): Send whatever is still queued before returning, else cancel it (default: True).
+        """
+        if flush:
+            self.drain()
+        with self._lock:
+            self._closed = True
+            lanes = list(self._lanes.values())
+        for lane in lanes:
+            with lane.ready:
+                while lane.queue:
+                    lane.queue.popleft()[0].cancel()
+                lane.ready.notify()
+        for lane in lanes:
+            lane.thread.join()
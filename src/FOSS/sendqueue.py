@@ -0,0 +1,165 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import OrderedDict
+
+from .transport import Transport, command_code
+
+# Motion setpoints where only the most recent value matters, by "T" code and the actuator
+# they drive. Setpoints of one actuator replace each other whatever their code, so a queued
+# move() is superseded by a newer cmd_ros_control() and the other way round.
+#   1: UGV wheel speeds (move)          13: UGV ROS-style velocities
+UGV_COALESCED = {1: "drive", 13: "drive"}
+
+#   102: arm joints in radians         104: arm xyzt goal
+#   1041: arm xyzt direct              122: arm joints in degrees
+#   123: arm constant (jog) control
+ARM_COALESCED = dict.fromkeys((102, 104, 1041, 122, 123), "motion")
+
+# T:1 is the wheel speeds on the rover but the end-of-arm tool type on the arm, so the
+# controllers pass their own table; this union is only the default for bare transports.
+COALESCED_COMMANDS = {**UGV_COALESCED, **ARM_COALESCED}
+
+
+class CoalescingTransport(Transport):
+    """
+    Send queue that drains at a fixed control rate and coalesces superseded setpoints.
+
+    send() only queues the command and returns immediately. A background thread wakes up
+    every control period and sends everything that is pending. While waiting, a new motion
+    setpoint replaces an unsent one for the same actuator (a new T:13 replaces the queued
+    T:1) and takes its place at the end of the queue, so the robot always ends on the latest
+    stick position and motion latency is bounded by one period instead of growing with the
+    queue. Every other command is queued in order and always sent.
+    """
+
+    def __init__(self, transport, rate_hz=20.0, coalesce=COALESCED_COMMANDS):
+        """
+        Initialize the send queue and start draining it.
+
+        Args:
+            transport (Transport): The transport that actually delivers the commands.
+            rate_hz (float): Control rate at which the queue is drained (default: 20.0).
+            coalesce (dict): Actuator by "T" code; unsent commands of an actuator are replaced by
+                             newer ones (default: COALESCED_COMMANDS).
+        """
+        self.transport = transport
+        self.period = 1.0 / rate_hz
+        self.coalesce = coalesce
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_response = None
+        self.last_error = None
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="FOSS-send-queue", daemon=True)
+        self._thread.start()
+
+    def send(self, command_json):
+        """
+        Queue a JSON command for the next control period.
+
+        Args:
+            command_json (str): The JSON command to send.
+
+        Returns:
+            None: Replies are not waited for, the latest one is kept in `last_response`.
+
+        Raises:
+            RuntimeError: If the queue was closed, since nothing would send the command.
+        """
+        code = command_code(command_json)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The send queue is closed")
+            key = self.coalesce.get(code)
+            if key is not None:
+                if self._pending.pop(key, None) is not None:
+                    self.dropped += 1
+            else:
+                key = (code, self._sequence)
+                self._sequence += 1
+            self._pending[key] = command_json
+        return None
+
+    def pending(self):
+        """
+        Returns:
+            int: Number of commands waiting for the next control period.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters for sent, dropped (coalesced) and failed commands, plus the queue depth.
+        """
+        with self._lock:
+            return {"sent": self.sent, "dropped": self.dropped, "errors": self.errors, "pending": len(self._pending)}
+
+    def _drain(self):
+        with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, OrderedDict()
+
+        for command_json in batch.values():
+            try:
+                response = self.transport.send(command_json)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = e
+            else:
+                with self._lock:
+                    self.sent += 1
+                    self.last_response = response
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self._drain()
+            next_tick += self.period
+            now = time.monotonic()
+            if next_tick < now:
+                # Fell behind (slow link): skip the missed ticks instead of bursting
+                next_tick = now + self.period - (now - next_tick) % self.period
+            self._stop.wait(next_tick - now)
+
+    def close(self, flush=True):
+        """
+        Stop draining the queue.
+
+        The wrapped transport is left open, since it is usually shared with other controllers.
+
+        Args:
+            flush (bool): Send whatever is still pending before returning, else drop it (default: True).
+        """
+        with self._lock:
+            self._closed = True
+        self._stop.set()
+        self._thread.join()
+        if flush:
+            self._drain()
+        else:
+            with self._lock:
+                self.dropped += len(self._pending)
+                self._pending.clear()
@@ -0,0 +1,209 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shadow of the last acknowledged device state.
+
+Control loops tend to re-send setters that change nothing: the LED that is already on,
+the same PID gains, move(0, 0) on every tick while stopped. With a shadow enabled
+(enable_shadow() on a controller) such writes are answered from the shadow instead of
+going over the network, until the entry's refresh interval elapses and the command is
+sent again to re-assert it.
+
+Only replies count as acknowledgements, so nothing is suppressed behind a send queue
+(whose commands return None) or after a communication error. Commands sent with
+send_command() bypass the shadow; call clear() after changing the state that way.
+"""
+
+import threading
+import time
+
+from .commands import ROARM_M2S, UGV
+
+ALL = None
+
+# Shadowed setters by "T" code: (state name, index of the argument naming the target or None).
+# Commands that share a state name overwrite each other, e.g. both wheel commands set the drive.
+UGV_SHADOW = {
+    1: ("drive", None),
+    13: ("drive", None),
+    2: ("motor_pid", None),
+    131: ("feedback_flow", None),
+}
+
+ARM_SHADOW = {
+    114: ("led", None),
+    113: ("switch", None),
+    115: ("switch", None),
+    210: ("torque", None),
+    108: ("joint_pid", 0),
+    107: ("grab_torque", None),
+    1: ("eoat_type", None),
+    2: ("eoat_config", None),
+}
+
+_ARM_MOTION = (100, 101, 102, 104, 1041, 106, 121, 122, 123)
+
+# State names forgotten when a command changes them behind the shadow's back (ALL: everything)
+UGV_INVALIDATES = {}
+
+ARM_INVALIDATES = {
+    109: ("joint_pid",),
+    600: ALL,
+    604: ALL,
+    **{code: ("torque",) for code in _ARM_MOTION},  # Moving the arm re-locks the joints
+}
+
+# The UGV base stops its motors when no drive command arrived for a few seconds, so the drive
+# state is re-asserted well within that heartbeat even when the setpoint did not change.
+UGV_REFRESH = {"drive": 0.5}
+ARM_REFRESH = {}
+
+
+class _Entry:
+    __slots__ = ("command", "result", "time", "size")
+
+    def __init__(self, command, result, timestamp, size):
+        self.command = command
+        self.result = result
+        self.time = timestamp
+        self.size = size
+
+
+class StateShadow:
+    """
+    Last acknowledged value of every shadowed setter of one device, keyed by state name and target.
+    """
+
+    def __init__(self, shadowed, invalidates=None, encoders=None, refresh=5.0, refresh_overrides=None):
+        """
+        Args:
+            shadowed (dict): "T" code to (state name, target argument index), e.g. ARM_SHADOW.
+            invalidates (dict): "T" code to the state names it invalidates, or ALL.
+            encoders (CommandSet): Encoders used to count the bytes saved (default: none counted).
+            refresh (float): Seconds after which an unchanged write is sent again anyway (default: 5.0).
+            refresh_overrides (dict): Refresh interval by state name, e.g. {"drive": 0.5}.
+        """
+        self.shadowed = shadowed
+        self.invalidates = invalidates or {}
+        self.encoders = encoders
+        self.refresh = refresh
+        self.refresh_overrides = dict(refresh_overrides or {})
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.suppressed = 0
+        self.refreshed = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def for_ugv(cls, refresh=5.0, **refresh_overrides):
+        return cls(UGV_SHADOW, UGV_INVALIDATES, UGV, refresh, {**UGV_REFRESH, **refresh_overrides})
+
+    @classmethod
+    def for_arm(cls, refresh=5.0, **refresh_overrides):
+        return cls(ARM_SHADOW, ARM_INVALIDATES, ROARM_M2S, refresh, {**ARM_REFRESH, **refresh_overrides})
+
+    def _key(self, code, args):
+        name, target = self.shadowed[code]
+        return name if target is None else (name, args[target])
+
+    def lookup(self, code, args):
+        """
+        Check a write against the shadow before sending it.
+
+        Args:
+            code (int): The "T" code.
+            args (tuple): The command arguments.
+
+        Returns:
+            The last acknowledged result when the write would not change the state and the
+            entry is still fresh, otherwise None (send the command).
+        """
+        if code not in self.shadowed:
+            return None
+        key = self._key(code, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.command != (code, args):
+                return None
+            name = key if isinstance(key, str) else key[0]
+            if time.monotonic() - entry.time >= self.refresh_overrides.get(name, self.refresh):
+                self.refreshed += 1
+                return None
+            self.suppressed += 1
+            self.bytes_saved += entry.size
+            return entry.result
+
+    def update(self, code, args, result):
+        """
+        Record a sent command and its reply.
+
+        Args:
+            code (int): The "T" code.
+            args (tuple): The command arguments.
+            result: The reply; None (no acknowledgement) forgets the entry.
+        """
+        invalidated = self.invalidates.get(code, ())
+        if code not in self.shadowed and code not in self.invalidates:
+            return
+        with self._lock:
+            if invalidated is ALL:
+                self._entries.clear()
+            else:
+                for name in invalidated:
+                    self._forget(name)
+            if code not in self.shadowed:
+                return
+            self.sent += 1
+            key = self._key(code, args)
+            if result is None:
+                self._entries.pop(key, None)
+                return
+            size = len(self.encoders[code](*args)) if self.encoders is not None else 0
+            self._entries[key] = _Entry((code, args), result, time.monotonic(), size)
+
+    def _forget(self, name):
+        for key in [key for key in self._entries if key == name or (isinstance(key, tuple) and key[0] == name)]:
+            del self._entries[key]
+
+    def invalidate(self, name):
+        """
+        Forget a state, e.g. "led" or "joint_pid", so the next write to it is sent.
+        """
+        with self._lock:
+            self._forget(name)
+
+    def clear(self):
+        """
+        Forget everything, e.g. after a reconnect or a raw send_command().
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def state(self):
+        """
+        Returns:
+            dict: State key to the last acknowledged (code, args).
+        """
+        with self._lock:
+            return {key: entry.command for key, entry in self._entries.items()}
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters for shadowed writes sent, suppressed and re-asserted after the refresh interval, and the bytes not sent.
+        """
+        with self._lock:
+            return {"sent": self.sent, "suppressed": self.suppressed, "refreshed": self.refreshed, "bytes_saved": self.bytes_saved}
@@ -0,0 +1,381 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from .commands import ROARM_M2S, UGV, decode_json
+
+# Fields of the RoArm-M2-S feedback frame ({"T":1051,...}) answering cmd_servo_rad_feedback():
+# end effector position (x, y, z), joint angles in radians (b, s, e, t) and joint loads (tor*).
+ARM_FEEDBACK_CODE = 1051
+ARM_FEEDBACK_FIELDS = ("x", "y", "z", "b", "s", "e", "t", "torB", "torS", "torE", "torH")
+ARM_FEEDBACK_REQUEST = ROARM_M2S[105]()
+
+ArmState = namedtuple("ArmState", ("time",) + ARM_FEEDBACK_FIELDS)
+ArmState.__doc__ = "One timestamped RoArm-M2-S feedback sample (missing fields are NaN)."
+
+
+class RingBuffer:
+    """
+    Fixed size ring buffer of float rows stored in a single preallocated array('d').
+
+    Appending overwrites the oldest row once the buffer is full and never allocates.
+    It is written by a single thread; readers copy rows out under a short lock.
+    """
+
+    def __init__(self, capacity, width):
+        """
+        Args:
+            capacity (int): Number of rows kept.
+            width (int): Number of floats per row.
+        """
+        self.capacity = capacity
+        self.width = width
+        self.count = 0
+        self._data = array("d", bytes(8 * capacity * width))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, row):
+        """
+        Args:
+            row (sequence): `width` floats.
+        """
+        offset = (self.count % self.capacity) * self.width
+        data = self._data
+        with self._lock:
+            for index, value in enumerate(row, offset):
+                data[index] = value
+            self.count += 1
+
+    def rows(self, last=None):
+        """
+        Copy out the most recent rows, oldest first.
+
+        Args:
+            last (int): Number of rows to return (default: every row in the buffer).
+
+        Returns:
+            list: Tuples of `width` floats.
+        """
+        with self._lock:
+            available = min(self.count, self.capacity)
+            last = available if last is None else min(last, available)
+            data, width = self._data, self.width
+            rows = []
+            for index in range(self.count - last, self.count):
+                offset = (index % self.capacity) * width
+                rows.append(tuple(data[offset:offset + width]))
+        return rows
+
+
+def parse_arm_feedback(text):
+    """
+    Safely parse a RoArm-M2-S feedback reply.
+
+    Args:
+        text (str): Reply text, e.g. '{"T":1051,"x":309.6,"y":2.6,...}'.
+
+    Returns:
+        tuple: The ARM_FEEDBACK_FIELDS values (NaN when missing), or None if the text is not a feedback frame.
+    """
+    try:
+        frame = decode_json(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(frame, dict) or frame.get("T") != ARM_FEEDBACK_CODE:
+        return None
+    nan = math.nan
+    return tuple(float(frame.get(field, nan)) for field in ARM_FEEDBACK_FIELDS)
+
+
+class FeedbackStream:
+    """
+    Background feedback stream.
+
+    A daemon thread requests a feedback frame at a fixed rate and/or collects the feedback
+    lines streamed by the transport (SerialTransport.read_timed_lines), and stores every decoded
+    sample in a RingBuffer. Control code reads the current state with `latest`, a plain
+    attribute read that never blocks or touches the network. Subclasses provide request()
+    and decode() for a given device.
+    """
+
+    fields = ()
+    sample_type = None
+    name = "FOSS-feedback"
+
+    def __init__(self, device, rate_hz=20.0, capacity=4096, poll=True):
+        """
+        Args:
+            device: The controller to read feedback from.
+            rate_hz (float): Feedback rate in Hz (default: 20.0).
+            capacity (int): Number of samples kept in the ring buffer (default: 4096).
+            poll (bool): Request feedback every period. Set to False when the transport
+                         already streams feedback lines (default: True).
+        """
+        self.device = device
+        self.period = 1.0 / rate_hz
+        self.poll = poll
+        self.buffer = RingBuffer(capacity, 1 + len(self.fields))
+        self.latest = None
+        self.samples = 0
+        self.errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def request(self):
+        """Ask the device for one feedback frame and return the reply text."""
+        raise NotImplementedError
+
+    def decode(self, text, timestamp, monotonic=None):
+        """
+        Decode a reply into a row of floats starting with `timestamp`, or None. `monotonic`
+        is the time.monotonic() of the sample, for the time steps of integrated state.
+        """
+        raise NotImplementedError
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def ingest(self, text, timestamp, monotonic=None):
+        """
+        Decode and store one feedback line (also usable to feed frames received elsewhere).
+
+        Args:
+            text (str): The feedback line.
+            timestamp (float): time.time() of the sample, stored in the row.
+            monotonic (float): time.monotonic() of the sample (default: `timestamp`).
+        """
+        row = self.decode(text, timestamp, monotonic)
+        if row is None:
+            return
+        self.buffer.append(row)
+        self.samples += 1
+        # Publishing a new immutable tuple is atomic, so readers never see a half-written sample
+        self.latest = self.sample_type._make(row)
+
+    def _run(self):
+        # Lines are stamped on arrival by the transport, so samples read in one batch keep their real spacing
+        read_timed_lines = getattr(self.device.transport, "read_timed_lines", None)
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if read_timed_lines is not None:
+                    for received, arrived, line in read_timed_lines(monotonic=True):
+                        self.ingest(line, received, arrived)
+                if self.poll:
+                    reply = self.request()
+                    if reply is not None:
+                        self.ingest(reply, time.time(), time.monotonic())
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+
+            next_tick += self.period
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now
+            self._stop.wait(next_tick - now)
+
+    def window(self, seconds=None, last=None):
+        """
+        Return the buffered samples, oldest first.
+
+        Args:
+            seconds (float): Only samples from the last `seconds` seconds.
+            last (int): Only the last `last` samples.
+
+        Returns:
+            list: Samples of `sample_type`.
+        """
+        rows = self.buffer.rows(last)
+        if seconds is not None:
+            since = time.time() - seconds
+            rows = [row for row in rows if row[0] >= since]
+        return [self.sample_type._make(row) for row in rows]
+
+
+class ArmFeedbackStream(FeedbackStream):
+    """
+    Feedback stream for a RoArm-M2-S, polling cmd_servo_rad_feedback() (T:105).
+    """
+
+    fields = ARM_FEEDBACK_FIELDS
+    sample_type = ArmState
+    name = "FOSS-arm-feedback"
+
+    def __init__(self, arm, rate_hz=20.0, capacity=4096, poll=True):
+        super().__init__(arm, rate_hz=rate_hz, capacity=capacity, poll=poll)
+        self.arm = arm
+
+    def request(self):
+        return self.arm.send_command(ARM_FEEDBACK_REQUEST)
+
+    def decode(self, text, timestamp, monotonic=None):
+        values = parse_arm_feedback(text)
+        return None if values is None else (timestamp,) + values
+
+
+# Fields of the UGV base feedback frame ({"T":1001,...}): left/right wheel speeds,
+# IMU roll/pitch/yaw, board temperature and battery voltage.
+BASE_FEEDBACK_CODE = 1001
+BASE_FEEDBACK_FIELDS = ("L", "R", "r", "p", "y", "temp", "v")
+BASE_FEEDBACK_REQUEST = UGV[130]()
+
+BaseState = namedtuple("BaseState", ("time",) + BASE_FEEDBACK_FIELDS + ("odom_x", "odom_y", "odom_theta", "linear", "angular"))
+BaseState.__doc__ = "One timestamped UGV base feedback sample with the dead-reckoning pose and velocity at that time."
+
+
+def parse_base_feedback(text):
+    """
+    Safely parse a UGV base feedback frame.
+
+    Args:
+        text (str): Frame text, e.g. '{"T":1001,"L":0.1,"R":0.1,"r":0.2,...}'.
+
+    Returns:
+        tuple: The BASE_FEEDBACK_FIELDS values (NaN when missing), or None if the text is not a base feedback frame.
+    """
+    try:
+        frame = decode_json(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(frame, dict) or frame.get("T") != BASE_FEEDBACK_CODE:
+        return None
+    nan = math.nan
+    return tuple(float(frame.get(field, nan)) for field in BASE_FEEDBACK_FIELDS)
+
+
+class DifferentialOdometry:
+    """
+    Incremental dead-reckoning for a differential (skid steer) drive, O(1) per sample.
+
+    Integrates the wheel speeds with the midpoint rule: between two samples the rover
+    moves along a straight line heading at the average of the start and end headings.
+    """
+
+    def __init__(self, track_width=0.2):
+        """
+        Args:
+            track_width (float): Distance between the left and right wheels in meters (default: 0.2).
+        """
+        self.track_width = track_width
+        self.reset()
+
+    def reset(self, x=0.0, y=0.0, theta=0.0):
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.linear = 0.0
+        self.angular = 0.0
+        self._last_time = None
+
+    def update(self, timestamp, left_speed, right_speed, monotonic=None):
+        """
+        Integrate one wheel speed sample.
+
+        Args:
+            timestamp (float): Sample time in seconds.
+            left_speed (float): Left wheel speed in m/s.
+            right_speed (float): Right wheel speed in m/s.
+            monotonic (float): time.monotonic() of the sample. Time steps are measured on it
+                               when given, so wall clock adjustments (NTP) do not distort the
+                               pose (default: `timestamp`).
+
+        Returns:
+            tuple: (x, y, theta, linear, angular) after the update.
+        """
+        now = timestamp if monotonic is None else monotonic
+        if self._last_time is not None and left_speed == left_speed and right_speed == right_speed:
+            dt = now - self._last_time
+            if dt > 0:
+                # Velocities of the previous sample hold until this one (zero-order hold)
+                heading = self.theta + 0.5 * self.angular * dt
+                self.x += self.linear * dt * math.cos(heading)
+                self.y += self.linear * dt * math.sin(heading)
+                self.theta = (self.theta + self.angular * dt + math.pi) % (2 * math.pi) - math.pi
+        self._last_time = now
+        if left_speed == left_speed and right_speed == right_speed:  # Skip NaN
+            self.linear = 0.5 * (left_speed + right_speed)
+            self.angular = (right_speed - left_speed) / self.track_width
+        return self.x, self.y, self.theta, self.linear, self.angular
+
+
+class BaseFeedbackStream(FeedbackStream):
+    """
+    Feedback stream for a UGV base, polling the base feedback frame (T:130) and
+    integrating wheel odometry on every sample.
+    """
+
+    fields = BASE_FEEDBACK_FIELDS + ("odom_x", "odom_y", "odom_theta", "linear", "angular")
+    sample_type = BaseState
+    name = "FOSS-base-feedback"
+
+    def __init__(self, ugv, rate_hz=20.0, capacity=4096, poll=True, track_width=0.2):
+        """
+        Args:
+            ugv (UGVController): The rover to read feedback from.
+            rate_hz (float): Feedback rate in Hz (default: 20.0).
+            capacity (int): Number of samples kept in the ring buffer (default: 4096).
+            poll (bool): Request feedback every period; disable when the base streams it (default: True).
+            track_width (float): Distance between left and right wheels in meters (default: 0.2).
+        """
+        super().__init__(ugv, rate_hz=rate_hz, capacity=capacity, poll=poll)
+        self.ugv = ugv
+        self.odometry = DifferentialOdometry(track_width)
+
+    def request(self):
+        # Straight to the transport: UGVController.send_command prints every reply
+        return self.ugv.transport.send(BASE_FEEDBACK_REQUEST)
+
+    def decode(self, text, timestamp, monotonic=None):
+        values = parse_base_feedback(text)
+        if values is None:
+            return None
+        return (timestamp,) + values + self.odometry.update(timestamp, values[0], values[1], monotonic)
+
+    @property
+    def pose(self):
+        """
+        Returns:
+            tuple: Latest (x, y, theta) in meters and radians, or None before the first sample.
+        """
+        latest = self.latest
+        return None if latest is None else (latest.odom_x, latest.odom_y, latest.odom_theta)
+
+    @property
+    def velocity(self):
+        """
+        Returns:
+            tuple: Latest (linear, angular) velocity in m/s and rad/s, or None before the first sample.
+        """
+        latest = self.latest
+        return None if latest is None else (latest.linear, latest.angular)
@@ -0,0 +1,300 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Trajectory generation and paced playback for the RoArm-M2-S.
+
+Paths are generated in one NumPy pass, time-parameterized with a trapezoidal speed
+profile under speed and acceleration limits, and sampled at a fixed control rate:
+
+    >>> path = trajectory.circle(center=(200, 0), radius=50, z=150, t=3.14, max_speed=80)
+    >>> report = trajectory.TrajectoryExecutor(arm).run(path)
+
+Cartesian paths ("xyzt") are in millimeters (x, y, z) plus the hand angle t in radians,
+and are streamed with cmd_xyzt_direct_ctrl (T:1041). Joint paths ("joints") are
+base/shoulder/elbow/hand in radians, streamed with cmd_joints_rad_ctrl (T:102).
+"""
+
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .commands import ROARM_M2S
+
+XYZT = "xyzt"
+JOINTS = "joints"
+
+
+class Trajectory:
+    """
+    A time-stamped path: `times` with shape (N,) in seconds and `points` with shape (N, 4).
+    """
+
+    def __init__(self, times, points, space=XYZT):
+        self.times = np.asarray(times, dtype=float)
+        self.points = np.asarray(points, dtype=float)
+        self.space = space
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def __repr__(self):
+        return f"Trajectory(space={self.space!r}, samples={len(self)}, duration={self.duration:.3f}s)"
+
+
+def _trapezoid(length, max_speed, max_accel, times):
+    """Distance travelled at `times` along a path of `length` with a trapezoidal speed profile."""
+    accel_time = max_speed / max_accel
+    if length < max_speed * accel_time:
+        # Triangular profile: max_speed is never reached
+        accel_time = np.sqrt(length / max_accel)
+        max_speed = max_accel * accel_time
+    cruise_time = (length - max_speed * accel_time) / max_speed
+    total = 2 * accel_time + cruise_time
+
+    decel_start = accel_time + cruise_time
+    remaining = np.clip(total - times, 0.0, None)
+    return np.where(
+        times < accel_time, 0.5 * max_accel * times ** 2,
+        np.where(times < decel_start, 0.5 * max_accel * accel_time ** 2 + max_speed * (times - accel_time),
+                 length - 0.5 * max_accel * remaining ** 2))
+
+
+def _duration(length, max_speed, max_accel):
+    accel_time = max_speed / max_accel
+    if length < max_speed * accel_time:
+        return 2 * np.sqrt(length / max_accel)
+    return length / max_speed + accel_time
+
+
+def time_parameterize(points, max_speed, max_accel, rate_hz=50.0, space=XYZT):
+    """
+    Time-parameterize a dense polyline with a trapezoidal speed profile and resample it at `rate_hz`.
+
+    For Cartesian paths the limits apply to the x/y/z speed in mm/s (and mm/s²). For joint
+    paths they apply to every joint in rad/s (and rad/s²), i.e. to the largest joint motion.
+
+    Args:
+        points (array): Polyline vertices, shape (M, 4).
+        max_speed (float): Speed limit along the path.
+        max_accel (float): Acceleration limit along the path.
+        rate_hz (float): Sampling (control) rate in Hz (default: 50.0).
+        space (str): XYZT or JOINTS (default: XYZT).
+
+    Returns:
+        Trajectory: Samples at 1/rate_hz intervals, ending exactly on the last vertex.
+    """
+    points = np.asarray(points, dtype=float)
+    steps = np.diff(points, axis=0)
+    if space == XYZT:
+        segment = np.linalg.norm(steps[:, :3], axis=1)
+    else:
+        segment = np.abs(steps).max(axis=1)
+    distance = np.concatenate(([0.0], np.cumsum(segment)))
+    length = distance[-1]
+
+    if length <= 0.0:
+        return Trajectory([0.0], points[-1:], space)
+
+    total = _duration(length, max_speed, max_accel)
+    times = np.arange(0.0, total, 1.0 / rate_hz)
+    times = np.append(times, total)
+    travelled = _trapezoid(length, max_speed, max_accel, times)
+
+    samples = np.empty((len(times), points.shape[1]))
+    for column in range(points.shape[1]):
+        samples[:, column] = np.interp(travelled, distance, points[:, column])
+    return Trajectory(times, samples, space)
+
+
+def line(start, end, max_speed=100.0, max_accel=200.0, rate_hz=50.0):
+    """
+    Straight Cartesian line between two (x, y, z, t) poses.
+    """
+    return time_parameterize(np.array([start, end], dtype=float), max_speed, max_accel, rate_hz, XYZT)
+
+
+def arc(center, radius, start_angle, end_angle, z, t=3.14, max_speed=100.0, max_accel=200.0, rate_hz=50.0, resolution=1.0):
+    """
+    Horizontal arc around `center` at height `z`.
+
+    Args:
+        center (tuple): (x, y) of the arc center in mm.
+        radius (float): Radius in mm.
+        start_angle (float): Start angle in radians.
+        end_angle (float): End angle in radians (may be smaller than start_angle to go clockwise).
+        z (float): Height in mm.
+        t (float): Hand angle in radians, kept constant (default: 3.14).
+        resolution (float): Maximum chord length, in mm, of the polyline approximating the arc (default: 1.0).
+    """
+    sweep = abs(end_angle - start_angle) * radius
+    count = max(2, int(np.ceil(sweep / resolution)) + 1)
+    angles = np.linspace(start_angle, end_angle, count)
+    points = np.empty((count, 4))
+    points[:, 0] = center[0] + radius * np.cos(angles)
+    points[:, 1] = center[1] + radius * np.sin(angles)
+    points[:, 2] = z
+    points[:, 3] = t
+    return time_parameterize(points, max_speed, max_accel, rate_hz, XYZT)
+
+
+def circle(center, radius, z, t=3.14, start_angle=0.0, max_speed=100.0, max_accel=200.0, rate_hz=50.0, resolution=1.0):
+    """
+    Full horizontal circle around `center` at height `z`, starting and ending at `start_angle`.
+    """
+    return arc(center, radius, start_angle, start_angle + 2 * np.pi, z, t, max_speed, max_accel, rate_hz, resolution)
+
+
+def spline(waypoints, space=XYZT, max_speed=None, max_accel=None, rate_hz=50.0, subdivisions=16):
+    """
+    Smooth path through every waypoint (Catmull-Rom cubic spline, chord-length tangents).
+
+    Args:
+        waypoints (array): Waypoints, shape (K, 4), in XYZT or JOINTS space.
+        space (str): XYZT or JOINTS (default: XYZT).
+        max_speed (float): Speed limit (default: 100 mm/s for XYZT, 1 rad/s for JOINTS).
+        max_accel (float): Acceleration limit (default: 200 mm/s² for XYZT, 2 rad/s² for JOINTS).
+        subdivisions (int): Polyline vertices generated per spline segment (default: 16).
+    """
+    max_speed, max_accel = _limits(space, max_speed, max_accel)
+    waypoints = np.asarray(waypoints, dtype=float)
+    if len(waypoints) < 3:
+        return time_parameterize(waypoints, max_speed, max_accel, rate_hz, space)
+
+    # Tangents over the chord-length parameter (one-sided at both ends), so unevenly spaced
+    # waypoints do not overshoot; evenly spaced ones give the uniform Catmull-Rom tangents
+    chords = np.maximum(np.linalg.norm(np.diff(waypoints, axis=0), axis=1), 1e-9)[:, None]
+    tangents = np.empty_like(waypoints)
+    tangents[1:-1] = (waypoints[2:] - waypoints[:-2]) / (chords[1:] + chords[:-1])
+    tangents[0] = (waypoints[1] - waypoints[0]) / chords[0]
+    tangents[-1] = (waypoints[-1] - waypoints[-2]) / chords[-1]
+
+    # Cubic Hermite basis evaluated once and applied to every segment at the same time
+    u = np.linspace(0.0, 1.0, subdivisions, endpoint=False)[:, None, None]
+    h00 = 2 * u ** 3 - 3 * u ** 2 + 1
+    h10 = u ** 3 - 2 * u ** 2 + u
+    h01 = -2 * u ** 3 + 3 * u ** 2
+    h11 = u ** 3 - u ** 2
+    p0, p1 = waypoints[:-1], waypoints[1:]
+    m0, m1 = tangents[:-1] * chords, tangents[1:] * chords  # Scaled to each segment's unit parameter
+    dense = h00 * p0 + h10 * m0 + h01 * p1 + h11 * m1
+    dense = dense.transpose(1, 0, 2).reshape(-1, waypoints.shape[1])
+    dense = np.vstack((dense, waypoints[-1:]))
+    return time_parameterize(dense, max_speed, max_accel, rate_hz, space)
+
+
+def joint_move(start, end, max_speed=1.0, max_accel=2.0, rate_hz=50.0):
+    """
+    Synchronized joint-space move between two (base, shoulder, elbow, hand) configurations in radians.
+    """
+    return time_parameterize(np.array([start, end], dtype=float), max_speed, max_accel, rate_hz, JOINTS)
+
+
+def _limits(space, max_speed, max_accel):
+    if space == XYZT:
+        return max_speed or 100.0, max_accel or 200.0
+    return max_speed or 1.0, max_accel or 2.0
+
+
+ExecutionReport = namedtuple("ExecutionReport", (
+    "samples", "sent", "skipped", "errors", "duration", "mean_error", "max_error", "p99_error"))
+ExecutionReport.__doc__ = "Result of TrajectoryExecutor.run(); timing errors are send lateness in seconds."
+
+
+class TrajectoryExecutor:
+    """
+    Streams a Trajectory to the arm on a precise clock.
+
+    Every sample is encoded before playback starts, so the playback loop only waits and
+    sends. Waits use sleep() until shortly before the deadline and then spin, and the
+    lateness of every send is recorded for the report.
+    """
+
+    def __init__(self, arm, spin=0.002, skip_late=True):
+        """
+        Args:
+            arm (RoArmM2S): The arm to drive.
+            spin (float): Seconds before each deadline when sleeping switches to spinning (default: 0.002).
+            skip_late (bool): Drop samples whose successor is already due, so playback keeps to
+                              the trajectory clock when the link is slower than the rate (default: True).
+        """
+        self.arm = arm
+        self.spin = spin
+        self.skip_late = skip_late
+
+    def encode(self, trajectory):
+        """
+        Encode every sample of `trajectory` into its JSON command.
+
+        Returns:
+            list: JSON command strings.
+
+        Raises:
+            ValueError: If the arm checks its workspace (enable_workspace_check()) and a sample is unreachable.
+        """
+        rows = trajectory.points.tolist()
+        if trajectory.space == XYZT:
+            workspace = getattr(self.arm, "workspace", None)
+            if workspace is not None:
+                workspace.validate(trajectory)
+            encode = ROARM_M2S[1041]
+            return [encode(x, y, z, t) for x, y, z, t in rows]
+        encode = ROARM_M2S[102]
+        return [encode(base, shoulder, elbow, hand, 0, 0) for base, shoulder, elbow, hand in rows]
+
+    def run(self, trajectory):
+        """
+        Play `trajectory` on the arm, blocking until the last sample was sent.
+
+        Returns:
+            ExecutionReport: Sample counts and send timing errors.
+        """
+        commands = self.encode(trajectory)
+        schedule = trajectory.times.tolist()
+        lateness = []
+        skipped = errors = 0
+        send = self.arm.send_command
+        clock = time.perf_counter
+        last = len(commands) - 1
+
+        start = clock()
+        for index, command in enumerate(commands):
+            deadline = start + schedule[index]
+            remaining = deadline - clock()
+            if remaining > self.spin:
+                time.sleep(remaining - self.spin)
+            while clock() < deadline:
+                pass
+
+            now = clock()
+            if self.skip_late and index < last and now >= start + schedule[index + 1]:
+                skipped += 1
+                continue
+            lateness.append(now - deadline)
+            try:
+                send(command)
+            except Exception:
+                errors += 1
+        duration = clock() - start
+
+        lateness = np.asarray(lateness) if lateness else np.zeros(1)
+        return ExecutionReport(
+            samples=len(commands), sent=len(commands) - skipped - errors, skipped=skipped, errors=errors,
+            duration=duration, mean_error=float(lateness.mean()), max_error=float(lateness.max()),
+            p99_error=float(np.percentile(lateness, 99)))
@@ -0,0 +1,319 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import quote
+
+
+_LEADING_CODE = re.compile(r'\{"T":(-?\d+)')
+_COMMAND_CODE = re.compile(r"""["']T["']\s*:\s*(-?\d+)""")
+
+
+def command_code(command_json):
+    """
+    Return the "T" code of a JSON command.
+
+    Args:
+        command_json (str): The JSON command, e.g. '{"T":1041,"x":235,...}'.
+
+    Returns:
+        int: The command code, or None if the command has no "T" field.
+    """
+    # Compiled commands always start with the code, so try the anchored match first
+    match = _LEADING_CODE.match(command_json) or _COMMAND_CODE.search(command_json)
+    return int(match.group(1)) if match else None
+
+
+# Anything outside of this set needs the general (slower) quote() path
+_NEEDS_FULL_QUOTE = re.compile(r'[^A-Za-z0-9_.~:,{}"-]')
+
+
+def quote_command(command_json):
+    """
+    URL-encode a JSON command for the '/js?json=' query string.
+
+    Compiled commands only contain braces and quotes besides unreserved characters,
+    so those are replaced directly and everything else falls back to quote().
+
+    Args:
+        command_json (str): The JSON command.
+
+    Returns:
+        str: The percent-encoded command.
+    """
+    if _NEEDS_FULL_QUOTE.search(command_json):
+        return quote(command_json, safe=":,")
+    return command_json.replace('"', "%22").replace("{", "%7B").replace("}", "%7D")
+
+
+class Transport:
+    """
+    Base class for the links used to deliver JSON commands to a Waveshare ESP32 board.
+
+    A transport only knows how to move a JSON command string to the device and hand back
+    the reply text. Controllers such as UGVController and RoArmM2S build the commands and
+    delegate the delivery to a transport, so the same controller can run over any link.
+    """
+
+    def send(self, command_json):
+        """
+        Send a JSON command to the device.
+
+        Args:
+            command_json (str): The JSON command, e.g. '{"T":105}'.
+
+        Returns:
+            str: The response text from the device.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release any resources (sockets, file descriptors) held by the transport.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class HTTPTransport(Transport):
+    """
+    HTTP transport for the ESP32 '/js?json=' endpoint.
+
+    Instead of opening a new TCP connection for every command, all requests go through a
+    persistent requests.Session with a keep-alive connection pool. The ESP32 only has a
+    handful of sockets, so the pool is kept small and blocks instead of opening extra
+    connections when every pooled connection is busy.
+    """
+
+    def __init__(self, ip, connect_timeout=2.0, read_timeout=5.0, pool_maxsize=2, pool_block=True):
+        """
+        Initialize the HTTP transport.
+
+        Args:
+            ip (str): The device IP address (e.g., '192.168.4.1').
+            connect_timeout (float): Seconds to wait for the TCP connection (default: 2.0).
+            read_timeout (float): Seconds to wait for the reply once connected (default: 5.0).
+            pool_maxsize (int): Maximum number of keep-alive connections to the device (default: 2).
+            pool_block (bool): Wait for a free pooled connection instead of opening a new one
+                               when the pool is exhausted (default: True).
+        """
+        # Imported here so that `import FOSS` stays cheap until an HTTP link is needed
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.ip = ip
+        self.base_url = f"http://{ip}/js?json="
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount("http://", adapter)
+
+    def send(self, command_json):
+        """
+        Send a JSON command over the pooled HTTP session.
+
+        Args:
+            command_json (str): The JSON command to send.
+
+        Returns:
+            str: The response text from the device.
+
+        Raises:
+            RequestException: If there is a communication error with the device.
+        """
+        response = self.session.get(self.base_url + quote_command(command_json), timeout=self.timeout)
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+_shared_transports = {}
+_shared_lock = threading.Lock()
+
+
+def get_transport(ip, **kwargs):
+    """
+    Return the HTTP transport shared by every controller talking to the same device.
+
+    The first call for a given IP creates the transport with the given options, later
+    calls return the same instance so its connection pool is reused.
+
+    Args:
+        ip (str): The device IP address.
+        **kwargs: Options passed to HTTPTransport when the transport is created.
+
+    Returns:
+        HTTPTransport: The shared transport for the device.
+    """
+    with _shared_lock:
+        transport = _shared_transports.get(ip)
+        if transport is None:
+            transport = _shared_transports[ip] = HTTPTransport(ip, **kwargs)
+        return transport
+
+
+def close_transports():
+    """
+    Close and forget every shared transport created by get_transport().
+    """
+    with _shared_lock:
+        for transport in _shared_transports.values():
+            transport.close()
+        _shared_transports.clear()
+
+
+class SerialTransport(Transport):
+    """
+    USB serial (UART) transport for the ESP32 JSON protocol.
+
+    Commands are written as newline-terminated JSON, the same text accepted by the
+    '/js?json=' endpoint. A background thread reads every line the board prints: the first
+    line after a command is handed to the send() waiting for it, every other line (e.g.
+    unsolicited feedback) is kept for read_lines(), stamped with its arrival time.
+    Requires pyserial.
+    """
+
+    def __init__(self, port, baudrate=115200, response_timeout=0.0, max_lines=1024):
+        """
+        Open the serial port and start reading from it.
+
+        Args:
+            port (str): Serial device (e.g., '/dev/ttyUSB0' or '/dev/serial0').
+            baudrate (int): Serial speed (default: 115200).
+            response_timeout (float): Seconds send() waits for a reply line. With the default
+                                      of 0.0, send() returns as soon as the command is written.
+            max_lines (int): Number of received lines kept for read_lines() (default: 1024).
+        """
+        import serial
+
+        self.port = port
+        self.response_timeout = response_timeout
+        self.serial = serial.Serial(port, baudrate=baudrate, timeout=0.1)
+        self.error = None
+        self._lines = deque(maxlen=max_lines)
+        self._waiting = False
+        self._reply = None
+        self._received = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, name=f"FOSS-serial-{port}", daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        buffer = b""
+        while not self._stop.is_set():
+            try:
+                data = self.serial.read(self.serial.in_waiting or 1)
+            except Exception as e:
+                if not self._stop.is_set():
+                    # Keep the error for send(), and wake up the send() waiting for a reply
+                    with self._received:
+                        self.error = e
+                        self._received.notify_all()
+                break
+            if not data:
+                continue
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            received, arrived = time.time(), time.monotonic()
+            with self._received:
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    line = line.decode("utf-8", errors="replace")
+                    if self._waiting and self._reply is None:
+                        self._reply = line
+                    else:
+                        self._lines.append((received, arrived, line))
+                self._received.notify_all()
+
+    def _check(self):
+        if self.error is not None:
+            raise ConnectionError(f"Reading from {self.port} failed: {self.error}") from self.error
+
+    def send(self, command_json):
+        """
+        Write a JSON command to the board.
+
+        Args:
+            command_json (str): The JSON command to send.
+
+        Returns:
+            str: The first line received after the command when response_timeout is set,
+                 otherwise (or if nothing arrives in time) None.
+
+        Raises:
+            ConnectionError: If the reader thread stopped on a serial error.
+        """
+        with self._write_lock:
+            self._check()
+            if not self.response_timeout:
+                self.serial.write(command_json.encode("utf-8") + b"\n")
+                return None
+            with self._received:
+                self._reply = None
+                self._waiting = True
+            try:
+                self.serial.write(command_json.encode("utf-8") + b"\n")
+                with self._received:
+                    self._received.wait_for(lambda: self._reply is not None or self.error is not None, self.response_timeout)
+                    reply = self._reply
+            finally:
+                with self._received:
+                    self._waiting = False
+                    self._reply = None
+            if reply is None:
+                self._check()
+            return reply
+
+    def read_lines(self):
+        """
+        Return and forget every line received so far that was not a reply, without blocking.
+
+        Returns:
+            list: The received lines, oldest first.
+        """
+        return [line for _, line in self.read_timed_lines()]
+
+    def read_timed_lines(self, monotonic=False):
+        """
+        Like read_lines(), with the time.time() at which the reader thread received each line.
+
+        Args:
+            monotonic (bool): Also return the time.monotonic() arrival time, to measure the
+                              spacing of lines without wall clock steps (default: False).
+
+        Returns:
+            list: (timestamp, line) tuples, or (timestamp, monotonic, line) tuples, oldest first.
+        """
+        with self._received:
+            lines = list(self._lines)
+            self._lines.clear()
+        if monotonic:
+            return lines
+        return [(received, line) for received, _, line in lines]
+
+    def close(self):
+        self._stop.set()
+        self._reader.join()
+        self.serial.close()
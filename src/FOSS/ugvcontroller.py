@@ -12,10 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import requests
 import subprocess
 import sys
 
+from .commands import UGV as _COMMANDS, encode_json
+from .deadline import UGV_IDEMPOTENT, UGV_QUERIES, CircuitBreaker, DeadlineTransport, DeviceError
+from .metrics import METRICS, NO_METRICS, InstrumentedTransport
+from .results import UGV_RESULTS, make_result
+from .scheduler import UGV_GROUPS, CommandScheduler
+from .sendqueue import UGV_COALESCED, CoalescingTransport
+from .telemetry import BaseFeedbackStream
+from .transport import get_transport
+
 
 class UGVController:
     """
@@ -25,7 +33,7 @@ class UGVController:
     motor PID configuration, and now movement commands for turning, moving backward, and forward.
     """
 
-    def __init__(self, ssid="UGV", password="12345678", ip="192.168.4.1", interface_name=None):
+    def __init__(self, ssid="UGV", password="12345678", ip="192.168.4.1", interface_name=None, transport=None):
         """
         Initialize the UGV controller.
 
@@ -34,18 +42,212 @@ class UGVController:
             password (str): The Wi-Fi password (default: '12345678').
             ip (str): The rover's IP address (default: '192.168.4.1').
             interface_name (str): Optional wireless interface name (e.g., 'wlan0').
+            transport (Transport): Optional transport used to deliver commands. Defaults to
+                                   the pooled HTTP transport shared by all controllers for `ip`.
         """
         self.ssid = ssid
         self.password = password
         self.ip = ip
         self.interface_name = interface_name or "wlp9s0"
+        self.transport = transport or get_transport(ip)
+        self.feedback = None
+        self.shadow = None
+
+    def enable_send_queue(self, rate_hz=20.0):
+        """
+        Queue commands and send them at a fixed control rate instead of one request per call.
+
+        Superseded movement commands (move, cmd_ros_control) that were not sent yet are
+        replaced by the newest one, so the rover never lags behind a joystick when the
+        network is slower than the input rate. Commands return None in this mode.
+
+        Args:
+            rate_hz (float): Control rate in Hz (default: 20.0).
+
+        Returns:
+            CoalescingTransport: The send queue, with sent/dropped counters in stats().
+        """
+        if not isinstance(self.transport, CoalescingTransport):
+            self.transport = CoalescingTransport(self.transport, rate_hz=rate_hz, coalesce=UGV_COALESCED)
+        return self.transport
+
+    def enable_scheduler(self, max_in_flight=2):
+        """
+        Send commands of independent subsystems concurrently, e.g. base feedback polls
+        no longer wait for motion commands (and the other way round) when several threads
+        drive the rover. Commands of one subsystem keep their order and motion commands always
+        get a free connection.
+
+        Args:
+            max_in_flight (int): Concurrent requests the rover accepts (default: 2).
+
+        Returns:
+            CommandScheduler: The scheduler; submit() returns a Future for pipelining.
+        """
+        if not isinstance(self.transport, CommandScheduler):
+            self.transport = CommandScheduler(self.transport, groups=UGV_GROUPS, max_in_flight=max_in_flight)
+        return self.transport
+
+    def enable_metrics(self, metrics=None, device=None):
+        """
+        Record latency, errors and bytes of every command sent to the rover.
+
+        The instrumentation sits under the send queue or scheduler (if enabled), so it measures the real
+        round trips. Set `metrics.enabled = False` to pause it at almost no cost.
+
+        Args:
+            metrics (Metrics): Registry to record into (default: FOSS.metrics.METRICS).
+            device (str): Device label in the metrics (default: the rover's IP address).
 
-    def connect_to_wifi(self):
+        Returns:
+            InstrumentedTransport: The instrumented transport, to register pre/post-send hooks on.
+        """
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if not isinstance(owner.transport, InstrumentedTransport):
+            owner.transport = InstrumentedTransport(owner.transport, device or self.ip, metrics)
+        elif owner.transport.metrics is NO_METRICS:
+            # Instrumented for hooks only (Recorder.attach()): start publishing
+            owner.transport.metrics = metrics or METRICS
+        return owner.transport
+
+    def disable_metrics(self):
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if isinstance(owner.transport, InstrumentedTransport):
+            owner.transport = owner.transport.transport
+
+    def enable_deadlines(self, deadline=1.0, hedge_after=0.1, retries=2, failure_threshold=3, reset_timeout=2.0, deadlines=None):
+        """
+        Give every command a deadline and fail fast while the rover is unreachable.
+
+        Read-only queries are hedged and retried, other idempotent commands are retried after
+        fast failures and the rest is sent once. Failures raise FOSS.deadline errors (DeadlineExceeded,
+        DeviceUnavailable, CommunicationError), all OSError subclasses.
+
+        Args:
+            deadline (float): Seconds a command may take, all attempts included (default: 1.0).
+            hedge_after (float): Seconds before a query is sent a second time, None disables hedging (default: 0.1).
+            retries (int): Extra attempts for idempotent commands (default: 2).
+            failure_threshold (int): Consecutive failures that open the circuit breaker (default: 3).
+            reset_timeout (float): Seconds the breaker stays open before a probe (default: 2.0).
+            deadlines (dict): Deadline by "T" code for slower commands.
+
+        Returns:
+            DeadlineTransport: The deadline layer, with counters and the breaker state in stats().
+        """
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if not isinstance(owner.transport, DeadlineTransport):
+            owner.transport = DeadlineTransport(owner.transport, deadline=deadline, deadlines=deadlines, queries=UGV_QUERIES,
+                                                idempotent=UGV_IDEMPOTENT, hedge_after=hedge_after, retries=retries,
+                                                breaker=CircuitBreaker(failure_threshold, reset_timeout), device=self.ip)
+        return owner.transport
+
+    def disable_deadlines(self):
+        owner = self.transport if isinstance(self.transport, (CoalescingTransport, CommandScheduler)) else self
+        if isinstance(owner.transport, DeadlineTransport):
+            owner.transport.close()
+            owner.transport = owner.transport.transport
+
+    def enable_shadow(self, refresh=5.0, **refresh_overrides):
+        """
+        Skip drive, PID and feedback flow commands that would not change the rover's last
+        acknowledged state (e.g. move(0, 0) on every tick while stopped) and answer them with
+        the previous reply. The drive state is re-asserted every 0.5 s by default, well within
+        the base's motor heartbeat.
+
+        Args:
+            refresh (float): Seconds after which an unchanged command is sent again anyway (default: 5.0).
+            **refresh_overrides: Refresh interval by state name, e.g. drive=0.25.
+
+        Returns:
+            StateShadow: The shadow, with sent/suppressed counters in stats().
+        """
+        if self.shadow is None:
+            from .shadow import StateShadow
+            self.shadow = StateShadow.for_ugv(refresh, **refresh_overrides)
+        return self.shadow
+
+    def disable_shadow(self):
+        self.shadow = None
+
+    def start_worker(self, rate_hz=50.0, feedback_hz=10.0, address=None, **options):
+        """
+        Start a separate process that owns the link to the rover and streams setpoints at a
+        fixed rate, so the control timing no longer depends on this process' load or GIL.
+
+        Setpoints go through shared memory, e.g. `worker.set(13, 0.2, 0.0)`; the latest feedback
+        and send statistics come back the same way. Use it instead of this controller's
+        own commands while it runs.
+
+        Args:
+            rate_hz (float): Control rate in Hz (default: 50.0).
+            feedback_hz (float): Feedback poll rate in Hz, 0 disables polling (default: 10.0).
+            address (str): IP address or serial port the worker opens (default: the rover's IP address).
+            **options: Other ControlWorker options (keepalive, track_width, serial_timeout, start_method).
+
+        Returns:
+            ControlWorker: The running worker; call stop() when done.
+        """
+        from .worker import ControlWorker
+        return ControlWorker("ugv", address or self.ip, rate_hz=rate_hz, feedback_hz=feedback_hz, **options).start()
+
+    def start_feedback(self, rate_hz=20.0, capacity=4096, poll=True, track_width=0.2):
+        """
+        Start a background stream decoding base feedback (wheel speeds, IMU, voltage)
+        and integrating wheel odometry.
+
+        Args:
+            rate_hz (float): Feedback rate in Hz (default: 20.0).
+            capacity (int): Number of samples kept for windowed reads (default: 4096).
+            poll (bool): Request feedback every period; disable when the base streams it,
+                         see cmd_feedback_flow() (default: True).
+            track_width (float): Distance between left and right wheels in meters (default: 0.2).
+
+        Returns:
+            BaseFeedbackStream: The stream; read `pose`, `velocity` or `latest` without any round trip.
+        """
+        if self.feedback is None:
+            self.feedback = BaseFeedbackStream(self, rate_hz=rate_hz, capacity=capacity, poll=poll, track_width=track_width).start()
+        return self.feedback
+
+    def stop_feedback(self):
+        if self.feedback is not None:
+            self.feedback.stop()
+            self.feedback = None
+
+    def follow_path(self, waypoints, speed=0.3, lookahead=0.3, rate_hz=20.0, timeout=None, **options):
+        """
+        Drive along a list of waypoints with a pure pursuit controller, streaming
+        cmd_ros_control at a fixed rate and using the base feedback odometry as the pose.
+
+        Args:
+            waypoints (array): (N, 2) x, y positions in meters, in the odometry frame.
+            speed (float): Cruise speed in m/s (default: 0.3).
+            lookahead (float): Lookahead distance in meters (default: 0.3).
+            rate_hz (float): Control rate in Hz (default: 20.0).
+            timeout (float): Give up after this many seconds (default: None).
+            **options: Other PurePursuit options (max_angular, max_lateral_accel, goal_tolerance, ...).
+
+        Returns:
+            FollowReport: Whether the goal was reached, ticks, duration and tracking error.
+        """
+        from .drive import Path, PathFollower, PurePursuit
+        controller = PurePursuit(Path(waypoints), lookahead=lookahead, speed=speed, **options)
+        return PathFollower(self, controller, rate_hz=rate_hz).run(timeout=timeout)
+
+    def connect_to_wifi(self, exit_on_error=True):
         """
         Connect to the Wi-Fi network using nmcli.
 
+        Args:
+            exit_on_error (bool): Exit the process when the connection fails (default: True).
+                                  Long-running callers such as the control daemon pass False.
+
+        Returns:
+            bool: True once connected.
+
         Raises:
-            SystemExit: If the Wi-Fi connection fails or nmcli is not installed.
+            SystemExit: If the Wi-Fi connection fails or nmcli is not installed and `exit_on_error` is set.
+            ConnectionError: If the Wi-Fi connection fails or nmcli is not installed otherwise.
         """
         print(f"Connecting to Wi-Fi network '{self.ssid}' using interface '{self.interface_name}'...")
         try:
@@ -61,19 +263,20 @@ class UGVController:
 
             if result.returncode == 0:
                 print(f"Successfully connected to Wi-Fi network '{self.ssid}'.")
-            else:
-                print(f"Failed to activate Wi-Fi connection: {result.stderr.strip()}")
-                sys.exit(1)
+                return True
+            error = f"Failed to activate Wi-Fi connection: {result.stderr.strip()}"
 
         except subprocess.CalledProcessError as e:
-            print(f"Error creating or activating Wi-Fi connection: {e.stderr.strip()}")
-            sys.exit(1)
+            error = f"Error creating or activating Wi-Fi connection: {e.stderr.strip()}"
         except FileNotFoundError:
-            print("Error: nmcli is not installed. Please install NetworkManager CLI tools.")
-            sys.exit(1)
+            error = "Error: nmcli is not installed. Please install NetworkManager CLI tools."
         except Exception as e:
-            print(f"An unexpected error occurred: {e}")
+            error = f"An unexpected error occurred: {e}"
+
+        print(error)
+        if exit_on_error:
             sys.exit(1)
+        raise ConnectionError(error)
 
     def move_forward_6wheels(self, left_front=0.5, left_middle=0.5, left_rear=0.5, 
                          right_front=0.5, right_middle=0.5, right_rear=0.5):
@@ -106,28 +309,54 @@ class UGVController:
         }
         return self.send_json_command(json_data)
 
-    def send_json_command(self, json_data):
+    def send_command(self, command_json):
         """
-        Send a JSON command to the rover.
+        Send an already encoded JSON command to the rover.
 
         Args:
-            json_data (dict): The JSON command to send.
+            command_json (str): The JSON command to send, e.g. '{"T":1,"L":0.5,"R":0.5}'.
 
         Returns:
-            str: The response text from the rover.
+            str: The response text from the rover, or None on a communication error.
 
         Raises:
-            RequestException: If there is a communication error with the rover.
+            DeviceError: With enable_deadlines(), when the command missed its deadline or the rover is unavailable.
         """
         try:
-            url = f"http://{self.ip}/js?json={json_data}"
-            response = requests.get(url)
-            print(f"Response: {response.text}")
-            return response.text
-        except requests.RequestException as e:
+            response = self.transport.send(command_json)
+            print(f"Response: {response}")
+            return response
+        except DeviceError:
+            raise  # Deadline and circuit breaker errors are for the caller to handle
+        except OSError as e:  # requests.RequestException is an OSError
             print(f"Error communicating with the rover: {e}")
             return None
 
+    def _command(self, code, *args):
+        """
+        Encode, send and wrap the reply of command `code` in its typed result (see FOSS.results).
+        """
+        shadow = self.shadow
+        if shadow is None:
+            return make_result(UGV_RESULTS, code, self.send_command(_COMMANDS[code](*args)))
+        result = shadow.lookup(code, args)
+        if result is None:
+            result = make_result(UGV_RESULTS, code, self.send_command(_COMMANDS[code](*args)))
+            shadow.update(code, args, result)
+        return result
+
+    def send_json_command(self, json_data):
+        """
+        Send a JSON command to the rover.
+
+        Args:
+            json_data (dict): The JSON command to send.
+
+        Returns:
+            str: The response text from the rover, or None on a communication error.
+        """
+        return self.send_command(encode_json(json_data))
+
     def move(self, left_speed, right_speed):
         """
         Control left and right wheels together.
@@ -137,12 +366,11 @@ class UGVController:
             right_speed (float): Speed for the right wheels (-1.0 to 1.0).
 
         Returns:
-            str: Response from the rover.
+            Response: Reply from the rover, or None on a communication error.
 
         "T": 1: Control left and right wheels. (at the same time)
         """
-        json_data = {"T": 1, "L": left_speed, "R": right_speed}
-        return self.send_json_command(json_data)
+        return self._command(1, left_speed, right_speed)
 
     def move_individual_wheels(self, left_front, left_rear, right_front, right_rear):
         """
@@ -173,7 +401,7 @@ class UGVController:
                            Default is 0.5 for smooth turning.
 
         Returns:
-            str: Response from the rover.
+            Response: Reply from the rover, or None on a communication error.
         """
         print("Turning right...")
         return self.move(left_speed=speed, right_speed=speed * 0.5)
@@ -187,7 +415,7 @@ class UGVController:
                            Default is 0.5 for smooth turning.
 
         Returns:
-            str: Response from the rover.
+            Response: Reply from the rover, or None on a communication error.
         """
         print("Turning left...")
         return self.move(left_speed=speed * 0.5, right_speed=speed)
@@ -201,7 +429,7 @@ class UGVController:
                            Default is 0.5 for smooth reverse movement.
 
         Returns:
-            str: Response from the rover.
+            Response: Reply from the rover, or None on a communication error.
         """
         print("Moving backwards...")
         return self.move(left_speed=-speed, right_speed=-speed)
@@ -226,20 +454,20 @@ class UGVController:
 
                - Angular velocity: How fast the robot should turn (rotate) left or right.
                   - angular_velocity is mesasured by radians per second (rad/s). (A full circle is 2π radians or about 6.28 radians.)
-                  - Positive Values: Turn right (clockwise).
-                  - Negative Values: Turn left (counter-clockwise).
+                  - Positive Values: Turn left (counter-clockwise), as in ROS (REP-103).
+                  - Negative Values: Turn right (clockwise).
+                  - The firmware drives the wheels at linear -/+ angular * track width / 2 (left/right).
 
                   Example(s):
-                    - angular_velocity = 0.2: The robot slowly turns to the right.
-                    - angular_velocity = -0.5: The robot turns to the left more sharply.
+                    - angular_velocity = 0.2: The robot slowly turns to the left.
+                    - angular_velocity = -0.5: The robot turns to the right more sharply.
 
         Returns:
-            str: Response from the rover.
+            Response: Reply from the rover, or None on a communication error.
 
         "T": 13: ROS-style control for linear and angular velocities.
         """
-        json_data = {"T": 13, "X": linear_velocity, "Z": angular_velocity}
-        return self.send_json_command(json_data)
+        return self._command(13, linear_velocity, angular_velocity)
 
     def set_motor_pid(self, p_coefficient, i_coefficient, d_coefficient, windup_limit=255):
         """
@@ -290,12 +518,33 @@ class UGVController:
                 The default value is 255, meaning the maximum allowed correction is limited to 255.
 
         Returns:
-            str: Response from the rover.
+            Response: Reply from the rover, or None on a communication error.
 
         "T": 2: Configure the motor's PID parameters.
         """
-        json_data = {
-            "T": 2, "P": p_coefficient, "I": i_coefficient,
-            "D": d_coefficient, "L": windup_limit
-        }
-        return self.send_json_command(json_data)
+        return self._command(2, p_coefficient, i_coefficient, d_coefficient, windup_limit)
+
+    def cmd_base_feedback(self):
+        """
+        Request one base feedback frame.
+
+        Returns:
+            BaseFeedback: Decoded lazily from the reply, e.g. '{"T":1001,"L":0,"R":0,"r":0,"p":0,"y":0,"temp":25,"v":12}'.
+
+        "T": 130: Base feedback (wheel speeds, IMU roll/pitch/yaw, temperature, voltage).
+        """
+        return self._command(130)
+
+    def cmd_feedback_flow(self, enabled=True):
+        """
+        Turn the continuous base feedback stream on or off (useful over serial).
+
+        Args:
+            enabled (bool): Stream feedback frames continuously (default: True).
+
+        Returns:
+            Response: Reply from the rover, or None on a communication error.
+
+        "T": 131: Base feedback flow control.
+        """
+        return self._command(131, 1 if enabled else 0)
@@ -0,0 +1,391 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Out-of-process I/O worker with shared-memory setpoints.
+
+A dedicated process owns the transport and sends the current setpoint at a fixed rate,
+so input handling, vision or logging in the application process (and the GIL they hold)
+no longer shift the control timing. The two processes only share a
+multiprocessing.shared_memory block made of seqlock-protected slots:
+
+    setpoint  written by the application: "T" code and up to 8 field values
+    feedback  written by the worker: latest ArmState/BaseState row
+    stats     written by the worker: tick, send and error counters and latencies
+
+Each slot has a single writer. The writer makes the sequence number odd, writes the
+payload and makes it even again; readers retry until they read the same even sequence
+number before and after copying the payload, so they never block the writer and never
+see a torn value. A reader gives up with an error when the sequence stays odd, which
+means the writer died in the middle of a write.
+
+When it exits, the worker stops a UGV by sending its drive command (T:1 or T:13) with
+zero speeds, also when it is terminated or notices that the application process is
+gone. An arm keeps holding its last position.
+
+    >>> with ControlWorker("ugv", "192.168.4.1", rate_hz=50) as worker:
+    ...     worker.set(13, 0.2, 0.0)  # cmd_ros_control setpoint, sent every tick
+    ...     pose = worker.feedback()
+"""
+
+import multiprocessing
+import signal
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+from .commands import ROARM_M2S, UGV
+from .telemetry import (
+    ARM_FEEDBACK_FIELDS, BASE_FEEDBACK_FIELDS, ArmState, BaseState, DifferentialOdometry,
+    parse_arm_feedback, parse_base_feedback)
+
+ARM = "arm"
+UGV_KIND = "ugv"
+
+MAX_VALUES = 8
+
+STARTING = 0
+RUNNING = 1
+STOPPED = 2
+FAILED = 3
+
+# UGV drive commands; the worker sends the streamed one with zero speeds when it exits
+UGV_DRIVE = (1, 13)
+
+WorkerStats = namedtuple("WorkerStats", ("ticks", "sent", "errors", "late", "feedback", "last_latency", "max_latency"))
+WorkerStats.__doc__ = "Counters of a ControlWorker: control ticks, commands sent, send errors, missed ticks, feedback samples and send latencies in seconds."
+
+
+class SeqlockSlot:
+    """
+    Single-writer, lock-free slot in a shared buffer.
+    """
+
+    _SEQUENCE = struct.Struct("<Q")
+
+    # A write takes well under a microsecond, so this many failed attempts means the writer is gone
+    max_retries = 100000
+
+    def __init__(self, buffer, offset, fmt):
+        """
+        Args:
+            buffer (memoryview): The shared buffer.
+            offset (int): Byte offset of the slot (8-byte aligned).
+            fmt (str): struct format of the payload.
+        """
+        self.buffer = buffer
+        self.offset = offset
+        self.payload = struct.Struct(fmt)
+        self.size = self._SEQUENCE.size + self.payload.size
+
+    @property
+    def sequence(self):
+        return self._SEQUENCE.unpack_from(self.buffer, self.offset)[0]
+
+    def write(self, *values):
+        sequence = self.sequence + 1
+        self._SEQUENCE.pack_into(self.buffer, self.offset, sequence)
+        self.payload.pack_into(self.buffer, self.offset + self._SEQUENCE.size, *values)
+        self._SEQUENCE.pack_into(self.buffer, self.offset, sequence + 1)
+
+    def read(self):
+        """
+        Returns:
+            tuple: (sequence, values); sequence 0 means the slot was never written.
+
+        Raises:
+            RuntimeError: If no consistent value could be read in `max_retries` attempts.
+        """
+        buffer, offset = self.buffer, self.offset
+        for _ in range(self.max_retries):
+            before = self._SEQUENCE.unpack_from(buffer, offset)[0]
+            if before & 1:
+                continue  # Write in progress
+            values = self.payload.unpack_from(buffer, offset + self._SEQUENCE.size)
+            if self._SEQUENCE.unpack_from(buffer, offset)[0] == before:
+                return before, values
+        raise RuntimeError(f"Shared slot at offset {offset} is still being written after {self.max_retries} attempts, its writer probably died")
+
+
+def _layout(buffer, kind):
+    """
+    Returns:
+        tuple: (status, stop, setpoint, feedback, stats, error) views of the shared block.
+    """
+    width = 1 + (len(ARM_FEEDBACK_FIELDS) if kind == ARM else len(BASE_FEEDBACK_FIELDS) + 5)
+    status = SeqlockSlot(buffer, 0, "<I4x")  # Written by the worker
+    stop = SeqlockSlot(buffer, status.size, "<I4x")  # Written by the application
+    setpoint = SeqlockSlot(buffer, stop.offset + stop.size, f"<qI4x{MAX_VALUES}d")
+    feedback = SeqlockSlot(buffer, setpoint.offset + setpoint.size, f"<{width}d")
+    stats = SeqlockSlot(buffer, feedback.offset + feedback.size, "<5Q2d")
+    error = stats.offset + stats.size
+    return status, stop, setpoint, feedback, stats, error
+
+
+_ERROR_SIZE = 256
+
+
+def _block_size(kind):
+    return _layout(memoryview(bytearray(4096)), kind)[-1] + _ERROR_SIZE
+
+
+def _open_transport(address, serial_timeout):
+    if address.startswith("/dev/"):
+        from .transport import SerialTransport
+        return SerialTransport(address, response_timeout=serial_timeout)
+    from .transport import HTTPTransport
+    return HTTPTransport(address)
+
+
+def _ugv_stop(setpoint):
+    try:
+        sequence, values = setpoint.read()
+    except RuntimeError:
+        # The application died while publishing a setpoint: stop with T:1 instead
+        return UGV[1](0.0, 0.0)
+    code = values[0] if sequence and values[0] in UGV_DRIVE else 1
+    return UGV[code](0.0, 0.0)
+
+
+def _terminate(signum, frame):
+    # Unwind through _run_worker's finally block so a UGV still gets its stop command
+    raise SystemExit(f"terminated by signal {signum}")
+
+
+def _run_worker(name, kind, address, rate_hz, feedback_hz, keepalive, track_width, serial_timeout):
+    # The application owns the block and unlinks it in ControlWorker.stop()
+    shm = shared_memory.SharedMemory(name=name)
+    buffer = shm.buf
+    status, stop, setpoint, feedback, stats, error = _layout(buffer, kind)
+    transport = None
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        transport = _open_transport(address, serial_timeout)
+        status.write(RUNNING)
+        _control_loop(transport, kind, stop, setpoint, feedback, stats, rate_hz, feedback_hz, keepalive, track_width)
+        status.write(STOPPED)
+    except BaseException as e:
+        message = f"{type(e).__name__}: {e}".encode()[:_ERROR_SIZE - 1]
+        buffer[error:error + len(message) + 1] = message + b"\0"
+        status.write(FAILED)
+    finally:
+        if transport is not None:
+            if kind == UGV_KIND:
+                try:
+                    transport.send(_ugv_stop(setpoint))
+                except Exception:
+                    pass
+            transport.close()
+        del buffer, status, stop, setpoint, feedback, stats
+        shm.close()
+
+
+def _control_loop(transport, kind, stop, setpoint, feedback, stats, rate_hz, feedback_hz, keepalive, track_width):
+    commands = ROARM_M2S if kind == ARM else UGV
+    if kind == ARM:
+        feedback_request, parse = ROARM_M2S[105](), parse_arm_feedback
+        odometry = None
+    else:
+        feedback_request, parse = UGV[130](), parse_base_feedback
+        odometry = DifferentialOdometry(track_width)
+
+    period = 1.0 / rate_hz
+    feedback_period = 1.0 / feedback_hz if feedback_hz else None
+    ticks = sent = errors = late = samples = 0
+    last_latency = max_latency = 0.0
+    last_sequence, last_command, sent_at = 0, None, 0.0
+    next_feedback = time.monotonic()
+    next_tick = time.monotonic()
+    parent = multiprocessing.parent_process()
+
+    while not stop.read()[1][0]:
+        if parent is not None and not parent.is_alive():
+            break  # The application crashed or was killed without stopping the worker
+        now = time.monotonic()
+        ticks += 1
+        sequence, values = setpoint.read()
+        if sequence and (sequence != last_sequence or now - sent_at >= keepalive):
+            code, count = values[0], values[1]
+            if sequence != last_sequence:
+                last_command = commands[code](*values[2:2 + count])
+                last_sequence = sequence
+            start = time.perf_counter()
+            try:
+                transport.send(last_command)
+                sent += 1
+            except Exception:
+                errors += 1
+            last_latency = time.perf_counter() - start
+            max_latency = max(max_latency, last_latency)
+            sent_at = now
+
+        if feedback_period is not None and now >= next_feedback:
+            next_feedback = now + feedback_period
+            try:
+                reply = transport.send(feedback_request)
+                parsed = parse(reply) if reply is not None else None
+            except Exception:
+                errors += 1
+                parsed = None
+            if parsed is not None:
+                timestamp = time.time()
+                row = (timestamp,) + parsed
+                if odometry is not None:
+                    row += odometry.update(timestamp, parsed[0], parsed[1], time.monotonic())
+                feedback.write(*row)
+                samples += 1
+
+        stats.write(ticks, sent, errors, late, samples, last_latency, max_latency)
+
+        next_tick += period
+        now = time.monotonic()
+        if next_tick < now:
+            # Missed ticks are skipped instead of sent in a burst
+            missed = int((now - next_tick) / period) + 1
+            late += missed
+            next_tick += missed * period
+        time.sleep(next_tick - now)
+
+
+class ControlWorker:
+    """
+    Worker process that owns a device transport and streams setpoints at a fixed rate.
+
+    By default the current setpoint is sent on every tick. With a `keepalive` it is only
+    sent when it changes and at least every `keepalive` seconds, which is still often
+    enough for the firmware's motion timeout not to stop the robot.
+    """
+
+    def __init__(self, kind, address, rate_hz=50.0, feedback_hz=10.0, keepalive=0.0, track_width=0.2,
+                 serial_timeout=0.05, start_method="spawn"):
+        """
+        Args:
+            kind (str): "ugv" or "arm".
+            address (str): Device IP address, or serial port (e.g. '/dev/ttyUSB0').
+            rate_hz (float): Control rate in Hz (default: 50.0).
+            feedback_hz (float): Feedback poll rate in Hz, 0 disables polling (default: 10.0).
+            keepalive (float): Re-send an unchanged setpoint after this many seconds, 0 sends it every tick (default: 0.0).
+            track_width (float): UGV wheel track in meters, for the odometry (default: 0.2).
+            serial_timeout (float): Seconds to wait for replies on serial ports (default: 0.05).
+            start_method (str): multiprocessing start method (default: 'spawn', which does not
+                                inherit the application's threads and open sockets).
+        """
+        if kind not in (ARM, UGV_KIND):
+            raise ValueError(f"Unknown device kind {kind!r}, expected 'arm' or 'ugv'")
+        self.kind = kind
+        self.address = address
+        self._commands = ROARM_M2S if kind == ARM else UGV
+        self._state_type = ArmState if kind == ARM else BaseState
+        self._args = (kind, address, rate_hz, feedback_hz, keepalive, track_width, serial_timeout)
+        self._context = multiprocessing.get_context(start_method)
+        self._shm = None
+        self.process = None
+
+    def start(self, timeout=10.0):
+        """
+        Start the worker process and wait until it has opened the transport.
+
+        Raises:
+            RuntimeError: If the worker fails to start.
+        """
+        if self.process is not None:
+            return self
+        self._shm = shared_memory.SharedMemory(create=True, size=_block_size(self.kind))
+        self._shm.buf[:] = bytes(self._shm.size)
+        self._status, self._stop, self._setpoint, self._feedback, self._stats, self._error = _layout(self._shm.buf, self.kind)
+        self.process = self._context.Process(target=_run_worker, args=(self._shm.name,) + self._args,
+                                             name=f"FOSS-worker-{self.kind}", daemon=True)
+        self.process.start()
+        deadline = time.monotonic() + timeout
+        while self.status == STARTING:
+            if time.monotonic() > deadline or not self.process.is_alive():
+                break
+            time.sleep(0.005)
+        if self.status != RUNNING:
+            error = self.error or "worker did not start"
+            self.stop()
+            raise RuntimeError(f"FOSS worker for {self.address}: {error}")
+        return self
+
+    @property
+    def status(self):
+        return self._status.read()[1][0]
+
+    @property
+    def error(self):
+        """
+        Returns:
+            str: Why the worker failed, or None.
+        """
+        raw = bytes(self._shm.buf[self._error:self._error + _ERROR_SIZE])
+        return raw.split(b"\0", 1)[0].decode(errors="replace") or None
+
+    def set(self, code, *values):
+        """
+        Publish a new setpoint. Never blocks, the worker picks it up on its next tick.
+
+        Args:
+            code (int): "T" code of the command to stream, e.g. 1 or 13 for the UGV, 1041 or 102 for the arm.
+            *values: The command's field values, in the declared order (numbers only).
+        """
+        encoder = self._commands[code]
+        if len(values) != len(encoder.fields) or len(values) > MAX_VALUES:
+            raise ValueError(f"T:{code} takes {len(encoder.fields)} values: {', '.join(name for name, _ in encoder.fields)}")
+        padded = tuple(float(value) for value in values) + (0.0,) * (MAX_VALUES - len(values))
+        self._setpoint.write(code, len(values), *padded)
+
+    def feedback(self):
+        """
+        Returns:
+            ArmState or BaseState: Latest feedback sample, or None before the first one.
+        """
+        sequence, values = self._feedback.read()
+        return self._state_type._make(values) if sequence else None
+
+    def stats(self):
+        """
+        Returns:
+            WorkerStats: Latest counters published by the worker.
+        """
+        return WorkerStats._make(self._stats.read()[1])
+
+    def stop(self, timeout=10.0):
+        """
+        Ask the worker to exit, wait for it and release the shared memory. A UGV worker
+        sends a zero speed setpoint before it exits.
+
+        Args:
+            timeout (float): Seconds to wait before terminating the worker. The default is
+                longer than HTTPTransport's connect and read timeouts together, so a worker
+                blocked in a send gets to finish it; a terminated worker still sends the stop.
+        """
+        if self.process is None:
+            return
+        self._stop.write(1)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+        del self._status, self._stop, self._setpoint, self._feedback, self._stats
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
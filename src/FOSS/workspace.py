@@ -0,0 +1,235 @@
+# flake8: noqa: E501
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Precomputed reachable workspace of the RoArm-M2-S.
+
+The base turns the whole arm around the vertical axis, so whether a target can be
+reached only depends on its distance from that axis (reach) and its height, plus the base
+and hand angle limits. The index is a 2D voxel grid over (reach, z) built from the joint
+limits with the inverse kinematics. Each cell is inside, outside or on the boundary of
+the workspace; only targets in boundary cells are solved exactly, so a check is O(1) and
+a whole path is checked in one vectorized pass:
+
+    >>> workspace = Workspace.load()
+    >>> workspace.contains(235, 0, 234)
+    True
+    >>> workspace.validate(path)  # raises ValueError before anything is sent
+"""
+
+import hashlib
+import math
+import os
+
+import numpy as np
+
+from .kinematics import FOREARM, JOINT_LIMITS, UPPER_ARM, inverse
+from .trajectory import JOINTS
+
+OUTSIDE = 0
+INSIDE = 1
+BOUNDARY = 2
+
+
+def _cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "FOSS")
+
+
+class Workspace:
+    """
+    O(1) reachability checks against a voxel index of the arm's workspace.
+    """
+
+    def __init__(self, cells, resolution, limits=JOINT_LIMITS):
+        """
+        Args:
+            cells (ndarray): uint8 (reach, z) grid of OUTSIDE/INSIDE/BOUNDARY cells, as built by build().
+            resolution (float): Cell size in mm.
+            limits (array): (4, 2) joint limits the index was built for.
+        """
+        self.cells = cells
+        self.resolution = resolution
+        self.limits = np.asarray(limits, dtype=float)
+        self.max_reach = cells.shape[0] * resolution
+        self.min_z = -cells.shape[1] * resolution / 2
+        self._rows, self._columns = cells.shape
+        self._bytes = cells.tobytes()
+        (self._base_min, self._base_max), (self._hand_min, self._hand_max) = self.limits[0], self.limits[3]
+        self._full_turn = self._base_max - self._base_min >= 2 * math.pi - 1e-9
+
+    @classmethod
+    def build(cls, resolution=2.0, limits=JOINT_LIMITS):
+        """
+        Compute the index from the joint limits.
+
+        Reachability is evaluated at every grid node; a cell whose four corners are all
+        reachable is INSIDE, one with no reachable corner is OUTSIDE and the rest are BOUNDARY.
+
+        Args:
+            resolution (float): Cell size in mm (default: 2.0).
+            limits (array): (4, 2) joint limits (default: kinematics.JOINT_LIMITS).
+
+        Returns:
+            Workspace: The index.
+        """
+        limits = np.asarray(limits, dtype=float)
+        rows = int(math.ceil((UPPER_ARM + FOREARM) / resolution)) + 1
+        columns = 2 * rows
+        reach = np.arange(rows + 1) * resolution
+        z = np.arange(columns + 1) * resolution - rows * resolution
+        reach, z = np.meshgrid(reach, z, indexing="ij")
+
+        # Base and hand limits are checked separately, so solve at base 0 and a valid hand angle
+        hand = np.clip(np.pi / 2, limits[3, 0], limits[3, 1])
+        base_limits = limits.copy()
+        base_limits[0] = (-np.pi, np.pi)
+        poses = np.stack((reach, np.zeros_like(reach), z, np.full_like(reach, hand)), axis=-1)
+        _, nodes = inverse(poses.reshape(-1, 4), base_limits)
+        nodes = nodes.reshape(reach.shape).astype(np.uint8)
+
+        corners = nodes[:-1, :-1] + nodes[1:, :-1] + nodes[:-1, 1:] + nodes[1:, 1:]
+        cells = np.full(corners.shape, BOUNDARY, dtype=np.uint8)
+        cells[corners == 4] = INSIDE
+        cells[corners == 0] = OUTSIDE
+        return cls(cells, resolution, limits)
+
+    @staticmethod
+    def cache_path(resolution=2.0, limits=JOINT_LIMITS):
+        """
+        Returns:
+            str: The cache file for an index with these parameters (and the current link lengths).
+        """
+        key = repr((resolution, np.asarray(limits, dtype=float).round(9).tolist(), float(UPPER_ARM), float(FOREARM)))
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(_cache_dir(), f"workspace-{digest}.npy")
+
+    @classmethod
+    def load(cls, resolution=2.0, limits=JOINT_LIMITS, path=None):
+        """
+        Load the index from the disk cache, building and caching it on the first use.
+
+        Args:
+            resolution (float): Cell size in mm (default: 2.0).
+            limits (array): (4, 2) joint limits (default: kinematics.JOINT_LIMITS).
+            path (str): Cache file (default: cache_path() under $XDG_CACHE_HOME/FOSS).
+
+        Returns:
+            Workspace: The index.
+        """
+        path = path or cls.cache_path(resolution, limits)
+        try:
+            return cls(np.load(path), resolution, limits)
+        except (OSError, ValueError):
+            pass
+        workspace = cls.build(resolution, limits)
+        try:
+            workspace.save(path)
+        except OSError:
+            pass  # Read-only home directory: keep the index in memory only
+        return workspace
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, self.cells)
+        os.replace(temporary, path)
+
+    def contains(self, x, y, z, t=None):
+        """
+        Check a single target.
+
+        Args:
+            x, y, z (float): Target position in mm.
+            t (float): Hand angle in radians, not checked when None.
+
+        Returns:
+            bool: True if the arm can reach the target.
+        """
+        if t is not None and not self._hand_min <= t <= self._hand_max:
+            return False
+        if not self._full_turn and not self._base_min <= math.atan2(y, x) <= self._base_max:
+            return False
+        row = int(math.hypot(x, y) / self.resolution)
+        column = int((z - self.min_z) // self.resolution)
+        if row >= self._rows or not 0 <= column < self._columns:
+            return False
+        state = self._bytes[row * self._columns + column]
+        if state == BOUNDARY:
+            return bool(inverse((x, y, z, self._hand_min if t is None else t), self.limits)[1])
+        return state == INSIDE
+
+    def check(self, points):
+        """
+        Check many targets in one vectorized pass.
+
+        Args:
+            points (array): (x, y, z) or (x, y, z, t) targets, shape (N, 3) or (N, 4).
+
+        Returns:
+            ndarray: Boolean mask of the reachable targets.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        x, y, z = points[:, 0], points[:, 1], points[:, 2]
+        rows = (np.hypot(x, y) / self.resolution).astype(np.int64)
+        columns = np.floor((z - self.min_z) / self.resolution).astype(np.int64)
+        inside = (rows < self._rows) & (columns >= 0) & (columns < self._columns)
+
+        state = np.full(len(points), OUTSIDE, dtype=np.uint8)
+        state[inside] = self.cells[rows[inside], columns[inside]]
+        reachable = state == INSIDE
+        if points.shape[1] > 3:
+            hand = points[:, 3]
+            in_limits = (hand >= self._hand_min) & (hand <= self._hand_max)
+            reachable &= in_limits
+            state[~in_limits] = OUTSIDE
+        if not self._full_turn:
+            base = np.arctan2(y, x)
+            in_limits = (base >= self._base_min) & (base <= self._base_max)
+            reachable &= in_limits
+            state[~in_limits] = OUTSIDE
+
+        boundary = np.flatnonzero(state == BOUNDARY)
+        if len(boundary):
+            poses = np.empty((len(boundary), 4))
+            poses[:, :3] = points[boundary, :3]
+            poses[:, 3] = points[boundary, 3] if points.shape[1] > 3 else self._hand_min
+            reachable[boundary] = inverse(poses, self.limits)[1]
+        return reachable
+
+    def validate(self, trajectory):
+        """
+        Check every sample of a Cartesian trajectory (or an (N, 4) array of targets).
+
+        Raises:
+            ValueError: If any target is unreachable.
+        """
+        if getattr(trajectory, "space", None) == JOINTS:
+            return
+        points = getattr(trajectory, "points", trajectory)
+        reachable = self.check(points)
+        if not reachable.all():
+            first = int(np.argmin(reachable))
+            raise ValueError(f"{int((~reachable).sum())} unreachable targets, first at index {first}: {np.asarray(points)[first].tolist()}")
+
+    def require(self, x, y, z, t=None):
+        """
+        Raises:
+            ValueError: If the target is unreachable.
+        """
+        if not self.contains(x, y, z, t):
+            raise ValueError(f"Target outside of the arm's workspace: x={x}, y={y}, z={z}, t={t}")
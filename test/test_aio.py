@@ -0,0 +1,46 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from FOSS.aio import AsyncRoArmM2S, AsyncUGVController  # noqa: E402
+from FOSS.workspace import Workspace  # noqa: E402
+
+
+def test_workspace_check_guards_async_moves(arm_emulator):
+    async def run():
+        arm = AsyncRoArmM2S(arm_emulator.address)
+        arm.enable_workspace_check(Workspace.build(resolution=10.0))
+        try:
+            with pytest.raises(ValueError):
+                await arm.cmd_xyzt_direct_ctrl(2000, 0, 0, 3.14)
+            received = arm_emulator.received
+            await arm.cmd_xyzt_direct_ctrl(235, 0, 234, 3.14)
+            return received
+        finally:
+            arm.transport.close()
+
+    assert asyncio.run(run()) == 0
+    assert arm_emulator.received == 1
+
+
+def test_blocking_helpers_are_unsupported():
+    arm = AsyncRoArmM2S("127.0.0.1:1")
+    ugv = AsyncUGVController(ip="127.0.0.1:1")
+    with pytest.raises(TypeError, match="RoArmM2S"):
+        arm.sync_files("missions")
+    with pytest.raises(TypeError, match="UGVController"):
+        ugv.follow_path([])
@@ -0,0 +1,198 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import sys
+import types
+from collections import namedtuple
+
+import pytest
+
+from FOSS.bridge import CmdVelBridge
+
+KeyEvent = namedtuple("KeyEvent", ("name", "event_type"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeUGV:
+    ip = "fake"
+
+    def __init__(self):
+        self.sent = []
+
+    def cmd_ros_control(self, x, z):
+        self.sent.append((x, z))
+        return {"T": 13}
+
+
+class _Vector:
+    def __init__(self):
+        self.x = self.y = self.z = 0.0
+
+
+class Twist:
+    def __init__(self):
+        self.linear = _Vector()
+        self.angular = _Vector()
+
+
+class _Topic:
+    def __init__(self, bus, name):
+        self.bus = bus
+        self.name = name
+
+    def publish(self, msg):
+        for callback in self.bus.get(self.name, ()):
+            callback(msg)
+
+
+class _Logger:
+    def info(self, message):
+        pass
+
+
+class _Parameter:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeNode:
+    """
+    Stand-in for rclpy.node.Node: topics are delivered synchronously and timers are
+    fired by the test.
+    """
+
+    bus = {}
+
+    def __init__(self, name):
+        self.name = name
+        self.timers = []
+        self.parameters = {}
+
+    def declare_parameter(self, name, value):
+        self.parameters[name] = _Parameter(value)
+
+    def get_parameter(self, name):
+        return self.parameters[name]
+
+    def create_publisher(self, msg_type, topic, depth):
+        return _Topic(self.bus, topic)
+
+    def create_subscription(self, msg_type, topic, callback, depth):
+        self.bus.setdefault(topic, []).append(callback)
+
+    def create_timer(self, period, callback):
+        self.timers.append((period, callback))
+
+    def get_logger(self):
+        return _Logger()
+
+
+@pytest.fixture
+def node_module(monkeypatch):
+    FakeNode.bus = {}
+    modules = {name: types.ModuleType(name) for name in (
+        "rclpy", "rclpy.executors", "rclpy.node", "geometry_msgs", "geometry_msgs.msg",
+        "diagnostic_msgs", "diagnostic_msgs.msg")}
+    modules["rclpy.executors"].MultiThreadedExecutor = object
+    modules["rclpy.node"].Node = FakeNode
+    modules["geometry_msgs.msg"].Twist = Twist
+    for name in ("DiagnosticArray", "DiagnosticStatus", "KeyValue"):
+        setattr(modules["diagnostic_msgs.msg"], name, object)
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, "FOSS.node", raising=False)
+    return importlib.import_module("FOSS.node")
+
+
+def test_bridge_sends_changes_and_keepalives():
+    clock, ugv = FakeClock(), FakeUGV()
+    bridge = CmdVelBridge(ugv, deadman_timeout=0.5, keepalive=0.5, clock=clock)
+    bridge.on_twist(0.2, 0.0)
+    bridge.tick()
+    clock.now = 0.1
+    bridge.on_twist(0.2, 0.0)
+    assert bridge.tick() is None
+    clock.now = 0.45
+    bridge.on_twist(0.2, 0.0)
+    bridge.tick()
+    clock.now = 0.6
+    bridge.on_twist(0.2, 0.0)
+    bridge.tick()
+    assert ugv.sent == [(0.2, 0.0), (0.2, 0.0)]
+
+
+def test_bridge_deadman_stops_once():
+    clock, ugv = FakeClock(), FakeUGV()
+    bridge = CmdVelBridge(ugv, deadman_timeout=0.5, keepalive=10.0, clock=clock)
+    bridge.on_twist(0.3, 1.0)
+    bridge.tick()
+    for step in range(1, 11):
+        clock.now = step * 0.1
+        bridge.tick()
+    assert ugv.sent == [(0.3, 1.0), (0.0, 0.0)]
+    assert bridge.deadman_stops == 1
+
+
+def test_bridge_clamps():
+    ugv = FakeUGV()
+    bridge = CmdVelBridge(ugv, max_linear=1.0, max_angular=2.0, clock=FakeClock())
+    bridge.on_twist(5.0, -9.0)
+    bridge.tick()
+    assert ugv.sent == [(1.0, -2.0)]
+
+
+def test_turns_follow_rep103(node_module):
+    ugv = FakeUGV()
+    bridge_node = node_module.CmdVelBridgeNode(ugv)
+    teleop = node_module.KeyboardControlNode(angular_speed=1.5)
+    teleop.on_key(KeyEvent("left", "down"))
+    bridge_node.on_timer()
+    teleop.on_key(KeyEvent("left", "up"))
+    teleop.on_key(KeyEvent("right", "down"))
+    bridge_node.on_timer()
+    assert ugv.sent == [(0.0, 1.5), (0.0, -1.5)]
+
+
+def test_held_key_outlives_the_deadman(node_module):
+    clock, ugv = FakeClock(), FakeUGV()
+    bridge_node = node_module.CmdVelBridgeNode(ugv)
+    bridge_node.bridge.clock = clock
+    teleop = node_module.KeyboardControlNode(linear_speed=0.4)
+    (repeat_period, on_repeat), = teleop.timers
+    assert repeat_period < bridge_node.get_parameter("deadman_timeout").value
+
+    teleop.on_key(KeyEvent("up", "down"))
+    steps = int(2.0 / repeat_period)
+    for step in range(1, steps + 1):
+        teleop.on_key(KeyEvent("up", "down"))  # Auto-repeat from the OS
+        clock.now = step * repeat_period
+        on_repeat()
+        bridge_node.on_timer()
+    assert set(ugv.sent) == {(0.4, 0.0)}
+    assert bridge_node.bridge.deadman_stops == 0
+
+    teleop.on_key(KeyEvent("up", "up"))
+    bridge_node.on_timer()
+    assert ugv.sent[-1] == (0.0, 0.0)
+    published = len(ugv.sent)
+    clock.now += 1.0
+    on_repeat()
+    bridge_node.on_timer()
+    assert ugv.sent[published:] in ([], [(0.0, 0.0)])
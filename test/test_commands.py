@@ -0,0 +1,55 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from FOSS.commands import ROARM_M2S, UGV, decode_json
+
+
+def test_encoders_emit_compact_json():
+    assert ROARM_M2S[104](235, 0, 234, 3.14, 0.25) == '{"T":104,"x":235.0,"y":0.0,"z":234.0,"t":3.14,"spd":0.25}'
+    assert UGV[1](0.5, -0.5) == '{"T":1,"L":0.5,"R":-0.5}'
+    assert ROARM_M2S[105]() == '{"T":105}'
+    assert ROARM_M2S.encode(210, 1) == '{"T":210,"cmd":1}'
+
+
+def test_string_fields_are_escaped():
+    command = ROARM_M2S[201]("notes.txt", 'say "hi"\n\\ é')
+    assert json.loads(command) == {"T": 201, "name": "notes.txt", "content": 'say "hi"\n\\ é'}
+    assert decode_json(command)["content"] == 'say "hi"\n\\ é'
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf")])
+def test_non_finite_values_are_rejected(value):
+    with pytest.raises(ValueError, match="'L'"):
+        UGV[1](value, 0.0)
+    with pytest.raises(ValueError, match="'joint'"):
+        ROARM_M2S[101](value, 0.0, 0.0, 10.0)
+
+
+@pytest.mark.parametrize("value, sent", [(0.9, 1), (0.4, 0), (-1.6, -2), (2, 2), (True, 1), ("3", 3)])
+def test_int_fields_are_rounded(value, sent):
+    assert json.loads(ROARM_M2S[210](value))["cmd"] == sent
+
+
+def test_numpy_values():
+    np = pytest.importorskip("numpy")
+    command = json.loads(ROARM_M2S[101](np.int64(3), np.float32(0.5), np.float64(1.0), 10))
+    assert command == {"T": 101, "joint": 3, "rad": 0.5, "spd": 1.0, "acc": 10.0}
+    assert json.loads(ROARM_M2S[210](np.float32(0.9)))["cmd"] == 1
+
+
+def test_wrong_arity():
+    with pytest.raises(TypeError):
+        UGV[1](0.5)
@@ -0,0 +1,123 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+
+from FOSS.commands import ROARM_M2S
+from FOSS.deadline import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CommunicationError, DeadlineExceeded, DeadlineTransport,
+    DeviceUnavailable)
+from FOSS.transport import Transport
+
+FEEDBACK = ROARM_M2S[105]()
+MOVE = ROARM_M2S[1041](235, 0, 234, 3.14)
+RELATIVE = ROARM_M2S[111](100)  # delay_millis, not in ARM_IDEMPOTENT: sent once
+INFO = ROARM_M2S[605](1)
+
+
+class ScriptedTransport(Transport):
+    """
+    Plays one (delay, error) step per request, then answers at once.
+    """
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def send(self, command_json):
+        with self.lock:
+            self.requests += 1
+            delay, error = self.steps.pop(0) if self.steps else (0.0, None)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return command_json
+
+
+@pytest.fixture
+def deadline_transport():
+    transports = []
+
+    def make(*steps, **kwargs):
+        transport = DeadlineTransport(ScriptedTransport(*steps), device="arm", **kwargs)
+        transports.append(transport)
+        return transport
+
+    yield make
+    for transport in transports:
+        transport.close()
+
+
+def test_slow_query_is_hedged(deadline_transport):
+    transport = deadline_transport((1.0, None), hedge_after=0.05, deadline=0.5)
+    start = time.monotonic()
+    assert transport.send(FEEDBACK) == FEEDBACK
+    assert time.monotonic() - start < 0.5
+    assert transport.stats()["hedged"] == 1
+
+
+def test_setters_are_not_hedged(deadline_transport):
+    transport = deadline_transport((0.2, None), hedge_after=0.05, deadline=1.0)
+    assert transport.send(INFO) == INFO
+    assert transport.transport.requests == 1 and transport.stats()["hedged"] == 0
+
+
+def test_idempotent_command_is_retried(deadline_transport):
+    transport = deadline_transport((0.0, ConnectionResetError()), (0.0, ConnectionResetError()))
+    assert transport.send(MOVE) == MOVE
+    assert transport.stats()["retried"] == 2
+
+
+def test_relative_command_is_sent_once(deadline_transport):
+    transport = deadline_transport((0.0, ConnectionResetError("reset")))
+    with pytest.raises(CommunicationError) as error:
+        transport.send(RELATIVE)
+    assert isinstance(error.value.__cause__, ConnectionResetError)
+    assert transport.transport.requests == 1
+
+
+def test_deadline_exceeded(deadline_transport):
+    transport = deadline_transport((1.0, None), (1.0, None), (1.0, None), deadline=0.1)
+    with pytest.raises(DeadlineExceeded) as error:
+        transport.send(MOVE)
+    assert isinstance(error.value, TimeoutError) and error.value.code == 1041
+
+
+def test_breaker_opens_and_recovers(deadline_transport):
+    failure = (0.0, ConnectionRefusedError())
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    transport = deadline_transport(failure, failure, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(CommunicationError):
+            transport.send(RELATIVE)
+    assert breaker.state == OPEN
+    with pytest.raises(DeviceUnavailable):
+        transport.send(RELATIVE)
+    assert transport.transport.requests == 2
+
+    time.sleep(0.15)
+    assert transport.send(RELATIVE) == RELATIVE
+    assert breaker.state == CLOSED
+    assert transport.stats()["rejected"] == 1 and transport.stats()["breaker_opened"] == 1
+
+
+def test_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.failure()
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.failure()
+    assert breaker.state == OPEN
@@ -0,0 +1,35 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+
+@pytest.mark.parametrize("command", [
+    '{"T":1}',  # Missing fields
+    '{"T":1,"L":null,"R":0}',  # Wrong field type
+    '{"T":13,"X":[0],"Z":0}',
+    '[1, 2]',  # Not an object
+    'not json',
+])
+def test_malformed_command_gets_an_error_reply(ugv_emulator, command):
+    with requests.Session() as session:
+        url = f"http://{ugv_emulator.address}/js"
+        reply = session.get(url, params={"json": command}, timeout=2.0)
+        assert reply.status_code == 200 and "error" in json.loads(reply.text)
+
+        # The connection is still usable
+        session.get(url, params={"json": '{"T":1,"L":0.1,"R":0.1}'}, timeout=2.0)
+        assert ugv_emulator.wheels == {"L": 0.1, "R": 0.1}
@@ -0,0 +1,82 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+pytest.importorskip("requests")
+
+from FOSS.armcontroller import RoArmM2S  # noqa: E402
+from FOSS.emulator import DeviceEmulator  # noqa: E402
+from FOSS.espnow import ArmGroup  # noqa: E402
+
+
+@pytest.fixture
+def arms():
+    emulators = [DeviceEmulator(kind="arm").start() for _ in range(3)]
+    yield emulators
+    for emulator in emulators:
+        emulator.stop()
+
+
+@pytest.fixture
+def group(arms):
+    leader, left, right = arms
+    group = ArmGroup(RoArmM2S(leader.address))
+    group.add("left", RoArmM2S(left.address))
+    group.add("right", RoArmM2S(right.address))
+    yield group
+    group.close()
+
+
+def test_group_move_is_one_broadcast(arms, group):
+    leader, left, right = arms
+    received = leader.received
+    report = group.move_joints(0.1, 0.2, 1.5, 3.0)
+    assert report.requests == 2 and report.errors == {}
+    assert leader.received - received == 2
+    for emulator in arms:
+        assert emulator.joints == pytest.approx([0.1, 0.2, 1.5, 3.0])
+
+
+def test_subset_move_uses_unicast(arms, group):
+    leader, left, right = arms
+    report = group.move_joints(0.3, 0.0, 1.2, 3.1, names=["left"])
+    assert report.requests == 1 and set(report.times) == {"left"}
+    assert left.joints == pytest.approx([0.3, 0.0, 1.2, 3.1])
+    assert right.joints != pytest.approx([0.3, 0.0, 1.2, 3.1])
+
+
+def test_add_direct_drops_the_follower(arms, group):
+    leader, left, right = arms
+    assert leader.followers == {left.mac, right.mac}
+    group.add_direct("right", RoArmM2S(right.address))
+    assert leader.followers == {left.mac}
+    assert group._peers == {left.mac}
+    assert group.members == {"left": left.mac}
+
+    report = group.move_joints(0.2, 0.1, 1.4, 3.0)
+    assert report.errors == {} and set(report.times) == {"leader", "left", "right"}
+    assert right.joints == pytest.approx([0.2, 0.1, 1.4, 3.0])
+
+
+def test_remove_keeps_a_shared_mac(arms, group):
+    leader, left, right = arms
+    group.add("left-alias", mac=left.mac)
+    group.remove("left")
+    assert leader.followers == {left.mac, right.mac}
+    group.remove("left-alias")
+    assert leader.followers == {right.mac}
+
+
+def test_unknown_arm_is_rejected(group):
+    with pytest.raises(KeyError):
+        group.move_joints(0, 0, 1.57, 3.14, names=["nobody"])
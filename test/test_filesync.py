@@ -0,0 +1,79 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import errno
+
+import pytest
+
+pytest.importorskip("requests")
+
+from FOSS.armcontroller import RoArmM2S  # noqa: E402
+from FOSS.filesync import FileSync, parse_free_space  # noqa: E402
+
+
+@pytest.mark.parametrize("reply, free", [
+    ('{"T":601,"free":5000,"total":9000}', 5000),
+    ('{"T":601,"total":9000,"used":1000}', 8000),
+    ('{"T":601,"total":9000}', None),
+    ("T:601 total: 9000 bytes, free space: 1234 bytes", 1234),
+    ("Free bytes=42", 42),
+    ("flash total 9000", None),
+    (None, None),
+])
+def test_parse_free_space(reply, free):
+    assert parse_free_space(reply) == free
+
+
+@pytest.fixture
+def local(tmp_path):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    (directory / "a.txt").write_text("first\nsecond\n")
+    (directory / "b.txt").write_text("x" * 3000)
+    return directory
+
+
+def test_sync_only_sends_changes(arm_emulator, local, tmp_path):
+    sync = FileSync(RoArmM2S(arm_emulator.address), max_request_bytes=1024, state_path=str(tmp_path / "state.json"))
+    report = sync.sync(str(local))
+    assert sorted(report.uploaded) == ["a.txt", "b.txt"]
+    assert "\n".join(arm_emulator.files["a.txt"]) == "first\nsecond\n"
+    assert "\n".join(arm_emulator.files["b.txt"]) == "x" * 3000
+
+    # Nothing changed: no request at all, even from a new process with the state file
+    received = arm_emulator.received
+    assert sync.sync(str(local)).requests == 0
+    assert FileSync(sync.arm, state_path=sync.state_path).sync(str(local)).requests == 0
+    assert arm_emulator.received == received
+
+    (local / "a.txt").write_text("changed\n")
+    report = sync.sync(str(local))
+    assert report.uploaded == ["a.txt"] and report.skipped == ["b.txt"]
+    assert "\n".join(arm_emulator.files["a.txt"]) == "changed\n"
+
+
+def test_delete_only_touches_synced_files(arm_emulator, local):
+    arm_emulator.files["other.mission"] = ["{}"]
+    sync = FileSync(RoArmM2S(arm_emulator.address))
+    sync.sync(str(local))
+    (local / "b.txt").unlink()
+    report = sync.sync(str(local), delete=True)
+    assert report.deleted == ["b.txt"]
+    assert set(arm_emulator.files) == {"a.txt", "other.mission"}
+
+
+def test_sync_checks_free_space(arm_emulator, local):
+    arm_emulator.flash_size = 100
+    with pytest.raises(OSError) as error:
+        FileSync(RoArmM2S(arm_emulator.address)).sync(str(local))
+    assert error.value.errno == errno.ENOSPC
+    assert "a.txt" not in arm_emulator.files
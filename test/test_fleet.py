@@ -0,0 +1,99 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import pytest
+
+from FOSS.emulator import DeviceEmulator
+from FOSS.fleet import Fleet
+from FOSS.ugvcontroller import UGVController
+
+
+class FakeDevice:
+    def __init__(self, reply="ok", error=None):
+        self.reply = reply
+        self.error = error
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def ping(self, *args):
+        self.calls.append(args)
+        self.release.wait(5.0)
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+
+@pytest.fixture
+def fleet():
+    fleet = Fleet(timeout=0.5, max_failures=2, retry_after=60.0)
+    yield fleet
+    for device in fleet.devices.values():
+        device.release.set()
+    fleet.close()
+
+
+def test_failures_are_reported_per_device(fleet):
+    fleet.add("good", FakeDevice())
+    fleet.add("broken", FakeDevice(error=ConnectionRefusedError("refused")))
+    fleet.add("silent", FakeDevice(reply=None))
+    results = fleet.broadcast("ping", 1)
+    assert results["good"].value == "ok" and results["good"].error is None
+    assert isinstance(results["broken"].error, ConnectionRefusedError)
+    assert isinstance(results["silent"].error, ConnectionError)
+    assert fleet.status()["broken"]["failures"] == 1
+
+
+def test_failing_device_is_isolated(fleet):
+    broken = FakeDevice(error=ConnectionRefusedError())
+    fleet.add("broken", broken)
+    for _ in range(2):
+        fleet.broadcast("ping")
+    result = fleet.broadcast("ping")["broken"]
+    assert "isolated" in str(result.error)
+    assert len(broken.calls) == 2
+    assert not fleet.status()["broken"]["healthy"]
+
+
+def test_slow_device_times_out_without_blocking_the_others(fleet):
+    slow = FakeDevice()
+    slow.release.clear()
+    fleet.add("slow", slow)
+    fleet.add("fast", FakeDevice())
+    results = fleet.broadcast("ping")
+    assert isinstance(results["slow"].error, TimeoutError) and results["fast"].error is None
+    # Still stuck: not queued behind the pending call
+    assert "busy" in str(fleet.broadcast("ping")["slow"].error)
+    assert len(slow.calls) == 1
+
+
+def test_unknown_device_is_rejected_before_sending(fleet):
+    device = FakeDevice()
+    fleet.add("known", device)
+    with pytest.raises(KeyError, match="nobody"):
+        fleet.scatter({"known": ("ping", ()), "nobody": ("ping", ())})
+    assert device.calls == []
+
+
+def test_broadcast_to_emulated_rovers():
+    pytest.importorskip("requests")
+    emulators = [DeviceEmulator(kind="ugv").start() for _ in range(3)]
+    try:
+        with Fleet({f"rover{index}": UGVController(ip=emulator.address) for index, emulator in enumerate(emulators)}) as fleet:
+            results = fleet.broadcast("move", 0.2, -0.2)
+            assert all(result.error is None for result in results.values())
+        assert all(emulator.wheels == {"L": 0.2, "R": -0.2} for emulator in emulators)
+    finally:
+        for emulator in emulators:
+            emulator.stop()
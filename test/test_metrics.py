@@ -0,0 +1,78 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from FOSS.armcontroller import RoArmM2S
+from FOSS.commands import ROARM_M2S
+from FOSS.metrics import InstrumentedTransport, Metrics
+from FOSS.transport import Transport
+
+FEEDBACK = ROARM_M2S[105]()
+
+
+class FailingTransport(Transport):
+    def send(self, command_json):
+        raise ConnectionResetError("reset")
+
+
+def test_snapshot_and_prometheus_export():
+    metrics = Metrics(buckets=(0.01, 0.1))
+    metrics.record("arm", 105, 0.005, None, 9, 100)
+    metrics.record("arm", 105, 0.05, None, 9, 100)
+    metrics.record("arm", 1041, 0.5, OSError(), 40, 0)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["arm"]["105"]["buckets"] == {"0.01": 1, "0.1": 2, "+Inf": 2}
+    assert snapshot["arm"]["105"]["count"] == 2 and snapshot["arm"]["105"]["bytes_in"] == 200
+    assert snapshot["arm"]["1041"]["errors"] == 1
+    assert json.loads(metrics.to_json()) == snapshot
+
+    text = metrics.prometheus(prefix="test")
+    assert text.endswith("\n")
+    assert 'test_command_latency_seconds_bucket{device="arm",code="105",le="0.1"} 2' in text
+    assert 'test_command_latency_seconds_count{device="arm",code="1041"} 1' in text
+    assert 'test_command_errors_total{device="arm",code="1041"} 1' in text
+    assert "# TYPE test_command_sent_bytes_total counter" in text
+
+
+def test_instrumented_arm(arm_emulator):
+    pytest.importorskip("requests")
+    metrics = Metrics()
+    arm = RoArmM2S(arm_emulator.address)
+    instrumented = arm.enable_metrics(metrics=metrics, device="arm")
+    for _ in range(3):
+        arm.cmd_servo_rad_feedback()
+    values = metrics.snapshot()["arm"]["105"]
+    assert values["count"] == 3 and values["errors"] == 0
+    assert values["bytes_out"] == 3 * len(FEEDBACK) and values["bytes_in"] > 0
+
+    metrics.enabled = False
+    arm.cmd_servo_rad_feedback()
+    assert metrics.snapshot()["arm"]["105"]["count"] == 3
+
+    arm.disable_metrics()
+    assert arm.transport is instrumented.transport
+
+
+def test_errors_are_recorded_and_hooks_run():
+    metrics = Metrics()
+    transport = InstrumentedTransport(FailingTransport(), "arm", metrics)
+    seen = []
+    transport.pre_send.append(seen.append)
+    transport.post_send.append(lambda command, response, error, latency: seen.append(type(error)))
+    with pytest.raises(ConnectionResetError):
+        transport.send(FEEDBACK)
+    assert seen == [FEEDBACK, ConnectionResetError]
+    assert metrics.snapshot()["arm"]["105"]["errors"] == 1
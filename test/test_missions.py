@@ -0,0 +1,92 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+from FOSS.armcontroller import RoArmM2S  # noqa: E402
+from FOSS.missions import MissionCompiler, chunk_lines, compile_step  # noqa: E402
+
+
+def steps(count, x=235):
+    return [{"T": 104, "x": x + index, "y": 0, "z": 234, "t": 3.14, "spd": 0.25} for index in range(count)]
+
+
+@pytest.fixture
+def compiler(arm_emulator):
+    return MissionCompiler(RoArmM2S(arm_emulator.address), max_request_bytes=512)
+
+
+def stored(emulator, name):
+    header, *lines = emulator.files[f"{name}.mission"]
+    return json.loads(header), [json.loads(line) for line in lines]
+
+
+def test_chunk_lines():
+    assert list(chunk_lines(["aaa", "bbb", "ccc"], 8)) == ["aaa\nbbb", "ccc"]
+    assert list(chunk_lines(["a" * 20, "b"], 8)) == ["a" * 20, "b"]
+    assert compile_step('{"T": 104, "x": 1}') == '{"T":104,"x":1}'
+
+
+def test_new_mission_is_written_in_chunks(arm_emulator, compiler):
+    report = compiler.upload("pick", steps(40), intro="pick and place")
+    assert report.rebuilt and report.appended == 40
+    assert report.requests == arm_emulator.received - 1 < 40  # The first request is the fetch
+    header, uploaded = stored(arm_emulator, "pick")
+    assert header == {"name": "pick", "intro": "pick and place"}
+    assert uploaded == steps(40)
+
+
+def test_unchanged_mission_costs_nothing(arm_emulator, compiler):
+    compiler.upload("pick", steps(10))
+    received = arm_emulator.received
+    report = compiler.upload("pick", steps(10))
+    assert report.requests == 0 and not report.rebuilt
+    assert arm_emulator.received == received
+
+
+def test_changed_and_appended_steps(arm_emulator, compiler):
+    compiler.upload("pick", steps(40))
+    changed = steps(42)
+    changed[3]["x"] = 0
+    received = arm_emulator.received
+    report = compiler.upload("pick", changed)
+    assert (report.requests, report.replaced, report.appended, report.rebuilt) == (3, 1, 2, False)
+    assert report.requests == arm_emulator.received - received
+    assert stored(arm_emulator, "pick")[1] == changed
+
+
+def test_removed_steps_rebuild(arm_emulator, compiler):
+    compiler.upload("pick", steps(10))
+    report = compiler.upload("pick", steps(5), intro="shorter")
+    assert report.rebuilt
+    assert stored(arm_emulator, "pick") == ({"name": "pick", "intro": "shorter"}, steps(5))
+
+
+def test_mostly_changed_mission_is_rebuilt(arm_emulator, compiler):
+    compiler.upload("pick", steps(20))
+    report = compiler.upload("pick", steps(20, x=100))
+    assert report.rebuilt and report.requests < 20
+    assert stored(arm_emulator, "pick")[1] == steps(20, x=100)
+
+
+def test_new_compiler_diffs_against_the_arm(arm_emulator, compiler):
+    compiler.upload("pick", steps(10))
+    fresh = MissionCompiler(compiler.arm)
+    changed = steps(10)
+    changed[9]["z"] = 100
+    report = fresh.upload("pick", changed)
+    assert (report.replaced, report.appended, report.rebuilt) == (1, 0, False)
+    assert stored(arm_emulator, "pick")[1] == changed
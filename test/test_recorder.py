@@ -0,0 +1,97 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+pytest.importorskip("requests")
+
+from FOSS.armcontroller import RoArmM2S  # noqa: E402
+from FOSS.commands import ROARM_M2S  # noqa: E402
+from FOSS.emulator import DeviceEmulator  # noqa: E402
+from FOSS.metrics import METRICS, NO_METRICS, Metrics  # noqa: E402
+from FOSS.recorder import FLAG_COMMAND_REF, RECORD, Recorder, Recording, Replayer  # noqa: E402
+
+MOVES = [(0.1, 0.2, 1.5, 3.0), (0.3, 0.1, 1.4, 3.1), (0.0, 0.0, 1.57, 3.14)]
+
+
+def record_session(arm, path, device="arm"):
+    with Recorder(str(path)) as recorder:
+        recorder.attach(arm, device=device)
+        for move in MOVES:
+            arm.cmd_joints_rad_ctrl(*move, 0, 10)
+            arm.cmd_servo_rad_feedback()
+    return recorder
+
+
+def test_round_trip(arm_emulator, tmp_path):
+    path = tmp_path / "session.rec"
+    recorder = record_session(RoArmM2S(arm_emulator.address), path)
+    assert recorder.records == 6
+
+    with Recording(str(path)) as recording:
+        assert recording.devices == ["arm"]
+        exchanges = list(recording)
+        assert [exchange.command for exchange in exchanges[:2]] == [ROARM_M2S[102](*MOVES[0], 0, 10), ROARM_M2S[105]()]
+        assert all(exchange.error is None and exchange.device == "arm" for exchange in exchanges)
+        assert [exchange.time for exchange in exchanges] == sorted(exchange.time for exchange in exchanges)
+        assert recording.seek(recording.duration()) == len(recording) - 1
+        assert len(list(recording.window(start=exchanges[2].time))) == 4
+
+
+def test_repeated_commands_are_stored_once(arm_emulator, tmp_path):
+    path = tmp_path / "session.rec"
+    record_session(RoArmM2S(arm_emulator.address), path)
+    with Recording(str(path)) as recording:
+        flags = [RECORD.unpack_from(recording._map, offset)[4] for offset in recording._offsets]
+        assert sum(1 for flag in flags if flag & FLAG_COMMAND_REF) == 2  # The 2nd and 3rd feedback polls
+
+
+def test_replay_reproduces_the_session(arm_emulator, tmp_path):
+    path = tmp_path / "session.rec"
+    record_session(RoArmM2S(arm_emulator.address), path)
+    with DeviceEmulator(kind="arm") as target, Recording(str(path)) as recording:
+        report = Replayer(recording, {"arm": RoArmM2S(target.address)}, speed=0).run()
+        assert report.sent == 6 and report.errors == 0 and report.skipped == 0
+        assert report.mismatches == 0
+        assert target.joints == pytest.approx(list(MOVES[-1]))
+
+
+def test_truncated_record_is_ignored(arm_emulator, tmp_path):
+    path = tmp_path / "session.rec"
+    record_session(RoArmM2S(arm_emulator.address), path)
+    with open(path, "r+b") as recording:
+        recording.truncate(os.path.getsize(path) - 3)
+    with Recording(str(path)) as recording:
+        assert len(recording) == 5
+
+
+def test_attach_does_not_publish_metrics(arm_emulator, tmp_path):
+    arm = RoArmM2S(arm_emulator.address)
+    record_session(arm, tmp_path / "session.rec", device="unpublished-arm")
+    assert "unpublished-arm" not in METRICS.snapshot()
+    assert arm.transport.metrics is NO_METRICS
+
+    # Enabling metrics afterwards still works
+    metrics = Metrics()
+    arm.enable_metrics(metrics=metrics, device="unpublished-arm")
+    arm.cmd_servo_rad_feedback()
+    assert metrics.snapshot()["unpublished-arm"]["105"]["count"] == 1
+
+
+def test_attach_keeps_enabled_metrics(arm_emulator, tmp_path):
+    arm = RoArmM2S(arm_emulator.address)
+    metrics = Metrics()
+    arm.enable_metrics(metrics=metrics, device="arm")
+    record_session(arm, tmp_path / "session.rec")
+    assert metrics.snapshot()["arm"]["102"]["count"] == 3
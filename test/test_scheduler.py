@@ -0,0 +1,107 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+from FOSS.commands import ROARM_M2S
+from FOSS.scheduler import CommandScheduler
+from FOSS.transport import Transport, command_code
+
+MOVE = ROARM_M2S[1041](235, 0, 234, 3.14)
+FEEDBACK = ROARM_M2S[105]()
+INFO = ROARM_M2S[605](0)
+
+
+class RecordingTransport(Transport):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, command_json):
+        time.sleep(self.delay)
+        with self.lock:
+            self.sent.append(command_json)
+        return command_json
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = CommandScheduler(RecordingTransport(delay=0.005))
+    yield scheduler
+    scheduler.close(flush=False)
+
+
+def test_lane_keeps_submission_order(scheduler):
+    moves = [ROARM_M2S[1041](200 + i, 0, 234, 3.14) for i in range(20)]
+    futures = [scheduler.submit(move) for move in moves]
+    assert wait(futures, timeout=5.0).not_done == set()
+    assert [command for command in scheduler.transport.sent if command in moves] == moves
+    assert scheduler.stats()["motion"] == {"sent": 20, "errors": 0, "pending": 0}
+
+
+def test_barrier_orders_every_lane(scheduler):
+    move = scheduler.submit(MOVE)
+    barrier = scheduler.submit(INFO)
+    feedback = scheduler.submit(FEEDBACK)
+    assert wait([move, barrier, feedback], timeout=5.0).not_done == set()
+    assert scheduler.transport.sent == [MOVE, INFO, FEEDBACK]
+
+
+def test_barrier_waits_for_pending_queue_append(scheduler):
+    assert scheduler.submit(MOVE).result(timeout=5.0) == MOVE
+    lane = scheduler._lanes["motion"]
+    futures = {}
+
+    def submit(name, command_json):
+        futures[name] = scheduler.submit(command_json)
+
+    with lane.ready:
+        # The move is stuck before its queue append, the barrier must not get ahead of it
+        mover = threading.Thread(target=submit, args=("move", MOVE))
+        mover.start()
+        time.sleep(0.05)
+        barrier = threading.Thread(target=submit, args=("barrier", INFO))
+        barrier.start()
+        barrier.join(0.1)
+        assert barrier.is_alive()
+    mover.join(5.0)
+    barrier.join(5.0)
+    submit("after", MOVE)
+    assert wait(futures.values(), timeout=5.0).not_done == set()
+    assert [command_code(command) for command in scheduler.transport.sent] == [1041, 1041, 605, 1041]
+
+
+def test_concurrent_submits_with_barriers_drain(scheduler):
+    futures = []
+
+    def worker(index):
+        for i in range(20):
+            futures.append(scheduler.submit(INFO if (index + i) % 7 == 0 else MOVE if i % 2 else FEEDBACK))
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wait(futures, timeout=10.0).not_done == set()
+
+
+def test_submit_after_close_raises():
+    scheduler = CommandScheduler(RecordingTransport())
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(MOVE)
@@ -0,0 +1,99 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import pytest
+
+from conftest import wait_until
+from FOSS.commands import ROARM_M2S, UGV
+from FOSS.sendqueue import ARM_COALESCED, UGV_COALESCED, CoalescingTransport
+from FOSS.transport import Transport
+from FOSS.ugvcontroller import UGVController
+
+
+class RecordingTransport(Transport):
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, command_json):
+        with self.lock:
+            self.sent.append(command_json)
+        return command_json
+
+
+@pytest.fixture
+def queue():
+    # One drain at start, then none for a minute: close() flushes
+    queue = CoalescingTransport(RecordingTransport(), rate_hz=1 / 60, coalesce=UGV_COALESCED)
+    assert wait_until(lambda: queue.pending() == 0)
+    yield queue
+    queue.close(flush=False)
+
+
+def test_superseded_setpoints_are_dropped(queue):
+    for speed in (0.1, 0.2, 0.3):
+        assert queue.send(UGV[1](speed, speed)) is None
+    queue.close()
+    assert queue.transport.sent == [UGV[1](0.3, 0.3)]
+    assert queue.stats() == {"sent": 1, "dropped": 2, "errors": 0, "pending": 0}
+
+
+def test_setpoints_of_one_actuator_replace_each_other(queue):
+    queue.send(UGV[1](0.5, 0.5))
+    queue.send(UGV[130]())
+    queue.send(UGV[13](0.2, 0.0))
+    queue.close()
+    # The newer T:13 takes the T:1's place at the end of the queue
+    assert queue.transport.sent == [UGV[130](), UGV[13](0.2, 0.0)]
+
+
+def test_other_commands_are_all_sent_in_order(queue):
+    commands = [UGV[130](), UGV[131](1), UGV[130](), UGV[131](0)]
+    for command in commands:
+        queue.send(command)
+    queue.close()
+    assert queue.transport.sent == commands
+
+
+def test_send_after_close_raises(queue):
+    queue.close()
+    with pytest.raises(RuntimeError):
+        queue.send(UGV[1](0.0, 0.0))
+
+
+def test_close_without_flush_drops_pending(queue):
+    queue.send(UGV[130]())
+    queue.close(flush=False)
+    assert queue.transport.sent == [] and queue.stats()["dropped"] == 1
+
+
+def test_send_queue_against_the_emulator(ugv_emulator):
+    pytest.importorskip("requests")
+    ugv = UGVController(ip=ugv_emulator.address)
+    queue = ugv.enable_send_queue(rate_hz=20)
+    for step in range(50):
+        ugv.move(step / 100, step / 100)
+    queue.close()
+    assert ugv_emulator.wheels == {"L": 0.49, "R": 0.49}
+    assert ugv_emulator.received == queue.stats()["sent"] < 50
+
+
+def test_arm_table_coalesces_moves():
+    queue = CoalescingTransport(RecordingTransport(), rate_hz=1 / 60, coalesce=ARM_COALESCED)
+    assert wait_until(lambda: queue.pending() == 0)
+    queue.send(ROARM_M2S[1041](235, 0, 234, 3.14))
+    queue.send(ROARM_M2S[1](1))  # End-of-arm tool type, not a drive command on the arm
+    queue.send(ROARM_M2S[102](0, 0, 1.57, 3.14, 0, 10))
+    queue.close()
+    assert queue.transport.sent == [ROARM_M2S[1](1), ROARM_M2S[102](0, 0, 1.57, 3.14, 0, 10)]
@@ -0,0 +1,188 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import select
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("serial")
+tty = pytest.importorskip("tty")
+
+from FOSS.telemetry import ArmFeedbackStream  # noqa: E402
+from FOSS.transport import SerialTransport  # noqa: E402
+
+FEEDBACK = '{"T":1051,"x":235,"y":0,"z":234,"b":0,"s":0,"e":1.57,"t":3.14,"torB":0,"torS":0,"torE":0,"torH":0}'
+
+
+class FakeBoard:
+    """
+    Fake of the board's USB serial port on a pty: every newline-terminated command gets
+    the line returned by `reply` (None: no answer), and push() prints unsolicited lines.
+    """
+
+    def __init__(self, reply=lambda command: FEEDBACK):
+        self.reply = reply
+        self.commands = []
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        buffer = b""
+        while not self._stop.is_set():
+            if not select.select([self.master], [], [], 0.05)[0]:
+                continue
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                self.commands.append(line.decode())
+                answer = self.reply(line.decode())
+                if answer is not None:
+                    self.push(answer)
+
+    def push(self, line):
+        os.write(self.master, line.encode() + b"\n")
+
+    def close(self):
+        """Unplug the board: reads from the port fail from now on."""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            os.close(self.master)
+            os.close(self.slave)
+
+
+@pytest.fixture
+def board():
+    board = FakeBoard()
+    yield board
+    board.close()
+
+
+def wait_until(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_reply_is_handed_to_send_only(board):
+    with SerialTransport(board.port, response_timeout=1.0) as transport:
+        board.push('{"T":1001,"L":0}')
+        assert wait_until(lambda: transport._lines)
+        assert transport.send('{"T":105}') == FEEDBACK
+        assert transport.read_lines() == ['{"T":1001,"L":0}']
+        assert transport.read_lines() == []
+
+
+def test_fire_and_forget_keeps_lines_for_read_lines(board):
+    with SerialTransport(board.port) as transport:
+        assert transport.send('{"T":105}') is None
+        assert wait_until(lambda: transport._lines)
+        assert transport.read_lines() == [FEEDBACK]
+
+
+def test_send_with_concurrent_read_lines(board):
+    # read_lines() emptying the buffer while send() waits must not lose the reply
+    board.reply = lambda command: command.replace('{"T":105,', '{"T":1051,')
+    stop = threading.Event()
+    drained = []
+
+    def drain():
+        while not stop.is_set():
+            drained.extend(transport.read_lines())
+
+    with SerialTransport(board.port, response_timeout=1.0) as transport:
+        thread = threading.Thread(target=drain)
+        thread.start()
+        try:
+            for i in range(200):
+                assert transport.send(f'{{"T":105,"i":{i}}}') == f'{{"T":1051,"i":{i}}}'
+        finally:
+            stop.set()
+            thread.join()
+    assert drained == []
+
+
+def test_no_reply_times_out(board):
+    board.reply = lambda command: None
+    with SerialTransport(board.port, response_timeout=0.1) as transport:
+        start = time.monotonic()
+        assert transport.send('{"T":105}') is None
+        assert time.monotonic() - start >= 0.1
+
+
+def test_reader_error_fails_pending_and_later_sends(board):
+    board.reply = lambda command: None
+    transport = SerialTransport(board.port, response_timeout=5.0)
+    try:
+        threading.Timer(0.2, board.close).start()
+        start = time.monotonic()
+        with pytest.raises(ConnectionError):
+            transport.send('{"T":105}')
+        assert time.monotonic() - start < 2.0
+        assert transport.error is not None
+        with pytest.raises(ConnectionError):
+            transport.send('{"T":105}')
+    finally:
+        transport._stop.set()
+        transport._reader.join()
+
+
+class _Arm:
+    def __init__(self, transport):
+        self.transport = transport
+
+    def send_command(self, command_json):
+        return self.transport.send(command_json)
+
+
+def test_polled_feedback_is_ingested_once(board):
+    with SerialTransport(board.port, response_timeout=1.0) as transport:
+        stream = ArmFeedbackStream(_Arm(transport), rate_hz=50.0).start()
+        try:
+            assert wait_until(lambda: len(board.commands) >= 10)
+        finally:
+            stream.stop()
+        assert stream.samples == len(board.commands)
+
+
+def test_lines_are_stamped_on_arrival(board):
+    with SerialTransport(board.port) as transport:
+        board.push('{"T":1001,"L":0.1,"R":0.1}')
+        time.sleep(0.2)
+        board.push('{"T":1001,"L":0.1,"R":0.1}')
+        assert wait_until(lambda: len(transport._lines) == 2)
+        (first, _), (second, _) = transport.read_timed_lines()
+        assert second - first >= 0.15
+
+
+def test_lines_are_stamped_with_a_monotonic_time(board):
+    with SerialTransport(board.port) as transport:
+        before = time.monotonic()
+        board.push('{"T":1001,"L":0.1,"R":0.1}')
+        assert wait_until(lambda: transport._lines)
+        [(received, arrived, line)] = transport.read_timed_lines(monotonic=True)
+        assert before <= arrived <= time.monotonic()
+        assert line == '{"T":1001,"L":0.1,"R":0.1}'
@@ -0,0 +1,97 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from FOSS.armcontroller import RoArmM2S  # noqa: E402
+from FOSS.shadow import StateShadow  # noqa: E402
+from FOSS.ugvcontroller import UGVController  # noqa: E402
+
+
+@pytest.fixture
+def arm(arm_emulator):
+    arm = RoArmM2S(arm_emulator.address)
+    arm.enable_shadow()
+    return arm
+
+
+def test_unchanged_setter_is_skipped(arm_emulator, arm):
+    first = arm.cmd_light_ctrl(128)
+    received = arm_emulator.received
+    assert arm.cmd_light_ctrl(128) == first
+    assert arm_emulator.received == received
+    arm.cmd_light_ctrl(0)
+    assert arm_emulator.received == received + 1 and arm_emulator.led == 0
+    stats = arm.shadow.stats()
+    assert stats["suppressed"] == 1 and stats["sent"] == 2 and stats["bytes_saved"] > 0
+
+
+def test_targets_are_shadowed_separately(arm_emulator, arm):
+    arm.cmd_set_joint_pid(1, 16, 0)
+    arm.cmd_set_joint_pid(2, 16, 0)
+    received = arm_emulator.received
+    arm.cmd_set_joint_pid(1, 16, 0)
+    arm.cmd_set_joint_pid(2, 16, 0)
+    assert arm_emulator.received == received
+
+    # Resetting the PID gains changes them behind the shadow's back
+    arm.cmd_reset_pid()
+    arm.cmd_set_joint_pid(1, 16, 0)
+    assert arm_emulator.received == received + 2
+
+
+def test_moves_invalidate_the_torque_lock(arm_emulator, arm):
+    arm.cmd_torque_ctrl(0)
+    arm.cmd_joints_rad_ctrl(0, 0, 1.57, 3.14, 0, 10)
+    received = arm_emulator.received
+    arm.cmd_torque_ctrl(0)
+    assert arm_emulator.received == received + 1 and arm_emulator.torque == 0
+
+
+def test_refresh_interval_re_sends(arm_emulator):
+    arm = RoArmM2S(arm_emulator.address)
+    arm.enable_shadow(led=0.05)
+    arm.cmd_light_ctrl(255)
+    time.sleep(0.1)
+    received = arm_emulator.received
+    arm.cmd_light_ctrl(255)
+    assert arm_emulator.received == received + 1
+    assert arm.shadow.stats()["refreshed"] == 1
+
+
+def test_ugv_drive_is_re_asserted(ugv_emulator):
+    ugv = UGVController(ip=ugv_emulator.address)
+    ugv.enable_shadow(drive=0.1)
+    ugv.move(0, 0)
+    received = ugv_emulator.received
+    ugv.move(0, 0)
+    assert ugv_emulator.received == received
+    # T:13 shares the drive state with T:1
+    ugv.cmd_ros_control(0.2, 0.0)
+    assert ugv_emulator.received == received + 1
+    time.sleep(0.15)
+    ugv.cmd_ros_control(0.2, 0.0)
+    assert ugv_emulator.received == received + 2
+
+
+def test_failed_writes_are_not_acknowledged():
+    shadow = StateShadow.for_arm()
+    shadow.update(114, (255,), None)
+    assert shadow.lookup(114, (255,)) is None
+    shadow.update(114, (255,), "ok")
+    assert shadow.lookup(114, (255,)) == "ok"
+    shadow.update(600, (), "ok")  # Reboot forgets everything
+    assert shadow.state() == {}
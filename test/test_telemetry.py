@@ -0,0 +1,46 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from FOSS.telemetry import BaseFeedbackStream, DifferentialOdometry
+
+FRAME = '{"T":1001,"L":0.5,"R":0.5,"r":0,"p":0,"y":0,"temp":25,"v":12}'
+
+
+def test_odometry_integrates_straight_and_turning_moves():
+    odometry = DifferentialOdometry(track_width=0.2)
+    odometry.update(0.0, 0.5, 0.5)
+    x, y, theta, linear, angular = odometry.update(2.0, 0.5, 0.5)
+    assert (x, y, theta, linear, angular) == pytest.approx((1.0, 0.0, 0.0, 0.5, 0.0))
+
+    odometry.reset()
+    odometry.update(0.0, -0.1, 0.1)
+    theta = odometry.update(1.0, -0.1, 0.1)[2]
+    assert theta == pytest.approx(1.0)
+    assert odometry.x == pytest.approx(0.0) and odometry.y == pytest.approx(0.0)
+
+
+def test_odometry_steps_on_the_monotonic_clock():
+    odometry = DifferentialOdometry()
+    odometry.update(1000.0, 0.5, 0.5, monotonic=10.0)
+    # The wall clock was set back by NTP between the two samples
+    x = odometry.update(400.0, 0.5, 0.5, monotonic=11.0)[0]
+    assert x == pytest.approx(0.5)
+
+
+def test_stream_passes_the_monotonic_time_to_odometry():
+    stream = BaseFeedbackStream(ugv=None, poll=False)
+    stream.ingest(FRAME, 1000.0, 10.0)
+    stream.ingest(FRAME, 400.0, 12.0)
+    assert stream.latest.time == 400.0
+    assert stream.pose == pytest.approx((1.0, 0.0, 0.0))
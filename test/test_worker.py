@@ -0,0 +1,95 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("requests")
+
+from conftest import wait_until  # noqa: E402
+from FOSS.worker import STOPPED, UGV_KIND, ControlWorker, SeqlockSlot, _block_size, _layout, _ugv_stop  # noqa: E402
+
+APPLICATION = """
+import sys, time
+from FOSS.worker import ControlWorker
+
+if __name__ == "__main__":
+    worker = ControlWorker("ugv", sys.argv[1], rate_hz=50, feedback_hz=0).start()
+    worker.set(1, 0.2, 0.2)
+    print("running", flush=True)
+    time.sleep(60)
+"""
+
+
+def test_stop_sends_zero_speed(ugv_emulator):
+    worker = ControlWorker(UGV_KIND, ugv_emulator.address, rate_hz=50, feedback_hz=0).start()
+    try:
+        worker.set(13, 0.3, 0.5)
+        assert wait_until(lambda: ugv_emulator.velocity == {"X": 0.3, "Z": 0.5}, timeout=5.0)
+    finally:
+        worker.stop()
+    assert ugv_emulator.velocity == {"X": 0.0, "Z": 0.0}
+
+
+def test_terminated_worker_still_stops(ugv_emulator):
+    worker = ControlWorker(UGV_KIND, ugv_emulator.address, rate_hz=50, feedback_hz=0).start()
+    process = worker.process
+    try:
+        worker.set(1, 0.2, 0.2)
+        assert wait_until(lambda: ugv_emulator.wheels == {"L": 0.2, "R": 0.2}, timeout=5.0)
+        process.terminate()
+        process.join(5.0)
+        assert ugv_emulator.wheels == {"L": 0.0, "R": 0.0}
+    finally:
+        worker.stop()
+
+
+def test_stop_command_without_readable_setpoint():
+    buffer = memoryview(bytearray(_block_size(UGV_KIND)))
+    setpoint = _layout(buffer, UGV_KIND)[2]
+    setpoint.write(13, 2, 0.3, 0.5, *(0.0,) * 6)
+    assert json.loads(_ugv_stop(setpoint)) == {"T": 13, "X": 0.0, "Z": 0.0}
+
+    # The writer died in the middle of a write: the sequence number stays odd
+    SeqlockSlot._SEQUENCE.pack_into(buffer, setpoint.offset, setpoint.sequence + 1)
+    setpoint.max_retries = 10
+    assert json.loads(_ugv_stop(setpoint)) == {"T": 1, "L": 0.0, "R": 0.0}
+
+
+def test_worker_status_after_stop(ugv_emulator):
+    worker = ControlWorker(UGV_KIND, ugv_emulator.address, rate_hz=50, feedback_hz=0).start()
+    worker._stop.write(1)
+    assert wait_until(lambda: worker.status == STOPPED, timeout=5.0)
+    worker.stop()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_worker_stops_when_application_dies(ugv_emulator, tmp_path):
+    script = tmp_path / "application.py"
+    script.write_text(APPLICATION)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    application = subprocess.Popen([sys.executable, str(script), ugv_emulator.address], stdout=subprocess.PIPE, env=env)
+    try:
+        assert application.stdout.readline() == b"running\n"
+        assert wait_until(lambda: ugv_emulator.wheels == {"L": 0.2, "R": 0.2}, timeout=5.0)
+        application.send_signal(signal.SIGKILL)
+        application.wait()
+        assert wait_until(lambda: ugv_emulator.wheels == {"L": 0.0, "R": 0.0}, timeout=5.0)
+    finally:
+        application.kill()
+        application.wait()
+        application.stdout.close()